@@ -0,0 +1,131 @@
+import atexit
+import os
+import string
+import struct
+import threading
+import zlib
+import numpy as np
+from .PyxelUnicode import PyxelUnicode
+
+CACHE_MAGIC = b'PUGC'
+CACHE_VERSION = 1
+HEADER_FORMAT = '<4sHqqI'  # magic, version, font file size, font file mtime (ns), glyph count
+GLYPH_FORMAT = '<IHH'  # codepoint, width, height
+PREWARM_CHARS = ''.join(ch for ch in string.printable if ch not in string.whitespace) + ' '
+
+_fonts = {}  # (font path, size, multipler, mode) -> PyxelUnicode
+_saved_counts = {}  # registry key -> glyph count stored in the cache file
+_lock = threading.Lock()
+_cache_dir = None
+
+
+def _key(font_path, original_size, multipler, mode):
+    return os.path.abspath(font_path), original_size, multipler, mode
+
+
+def _cache_file(key):
+    font_path, original_size, multipler, mode = key
+    name = os.path.splitext(os.path.basename(font_path))[0]
+    return os.path.join(_cache_dir, f'{name}_{original_size}_{multipler}_{mode}.glyphs')
+
+
+def _font_stamp(font_path):
+    stat = os.stat(font_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _load_glyph_tables(key):
+    """Read cached glyph tables for a font; stale or unreadable caches are ignored
+    """
+    path = _cache_file(key)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, size, mtime, count = struct.unpack_from(HEADER_FORMAT, data, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or (size, mtime) != _font_stamp(key[0]):
+            return {}
+        payload = zlib.decompress(data[struct.calcsize(HEADER_FORMAT):])
+    except (OSError, struct.error, zlib.error):
+        return {}
+    tables = {}
+    offset = 0
+    glyph_size = struct.calcsize(GLYPH_FORMAT)
+    for _ in range(count):
+        codepoint, width, height = struct.unpack_from(GLYPH_FORMAT, payload, offset)
+        offset += glyph_size
+        pixels = payload[offset:offset + width * height]
+        offset += width * height
+        tables[chr(codepoint)] = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width)
+    return tables
+
+
+def _save_glyph_tables(key, font):
+    tables = font.glyph_tables()
+    if _saved_counts.get(key) == len(tables):
+        return
+    chunks = []
+    for char, table in tables.items():
+        height = len(table)
+        width = len(table[0]) if height else 0
+        chunks.append(struct.pack(GLYPH_FORMAT, ord(char), width, height))
+        # one byte per pixel: 0/255 in bilevel mode, the gray value in grayscale mode
+        chunks.append(np.asarray(table, dtype=np.uint8).tobytes())
+    header = struct.pack(HEADER_FORMAT, CACHE_MAGIC, CACHE_VERSION, *_font_stamp(key[0]), len(tables))
+    os.makedirs(_cache_dir, exist_ok=True)
+    path = _cache_file(key)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(header + zlib.compress(b''.join(chunks)))
+    os.replace(path + '.tmp', path)
+    _saved_counts[key] = len(tables)
+
+
+def set_cache_dir(path):
+    """Enable the on-disk glyph cache; glyph tables are written back when the process exits
+    """
+    global _cache_dir
+    if _cache_dir is None:
+        atexit.register(save_cache)
+    _cache_dir = path
+
+
+def get_font(font_path: str, original_size: int, multipler: int = 8, mode: str = '1') -> PyxelUnicode:
+    """Return the process-wide PyxelUnicode for (font, size, multipler, mode)
+    so every screen shares one set of rasterized glyphs
+    """
+    key = _key(font_path, original_size, multipler, mode)
+    with _lock:
+        font = _fonts.get(key)
+        if font is None:
+            tables = _load_glyph_tables(key) if _cache_dir else {}
+            font = _fonts[key] = PyxelUnicode(font_path, original_size, multipler, mode, glyph_tables=tables)
+            _saved_counts[key] = len(tables)
+    return font
+
+
+def save_cache():
+    """Write the glyph tables of every registered font to the cache directory
+    """
+    if _cache_dir is None:
+        return
+    with _lock:
+        fonts = list(_fonts.items())
+    for key, font in fonts:
+        try:
+            _save_glyph_tables(key, font)
+        except OSError as e:
+            print(f'glyph cache write failed for {key[0]}: {e}')
+
+
+def prewarm(fonts, chars: str = PREWARM_CHARS) -> threading.Thread:
+    """Extract the glyph tables of `chars` for every font on a background thread
+    (only the PIL rasterization; atlas packing stays on the drawing thread)
+    """
+    def run():
+        for font in fonts:
+            for char in chars:
+                font.glyph_table(char)
+        save_cache()
+
+    thread = threading.Thread(target=run, name='glyph-prewarm', daemon=True)
+    thread.start()
+    return thread
@@ -1,12 +1,17 @@
-from PIL import Image, ImageFont, ImageDraw
+import threading
+import numpy as np
 import pyxel
 
+ATLAS_SIZE = 256  # width and height of one glyph atlas image
+GLYPH_COLOR = 1  # palette index lit glyph pixels are stored with; swapped for the text color on draw
+
 
 class PyxelUnicode(object):
     '''a unicode pixel font builder for pyxel
     '''
 
-    def __init__(self, font_path: str, original_size: int, multipler: int = 8, mode: str = '1'):
+    def __init__(self, font_path: str, original_size: int, multipler: int = 8, mode: str = '1',
+                 glyph_tables: dict = None):
         """initialize the class
         takes 4 parameter to initialize
         Args:
@@ -20,6 +25,8 @@ class PyxelUnicode(object):
             mode: (default='1')
                 '1' means bilevel
                 'L' means grayscale (not recommanded)
+            glyph_tables: (default=None)
+                already extracted glyph tables (char -> 2 dim array), e.g. from a disk cache
         """
         self.font_path = font_path
         self.original_size = original_size
@@ -32,20 +39,34 @@ class PyxelUnicode(object):
                 'mode support "1"(bilevel) and "L"(grayscale) only, using defualt("1") setting')
             mode = '1'
         self.mode = mode
-        self.font_height = len(self._extract_pixel('|'))
-        self.__char_info = {}
+        self.__font = None  # truetype font, loaded once on first extraction
+        self.__lock = threading.Lock()  # glyph tables may be filled by a prewarm thread
+        self.__char_info = dict(glyph_tables or {})
+        if '|' not in self.__char_info:
+            self.__char_info['|'] = self._extract_pixel('|')
+        self.font_height = max(len(c) for c in self.__char_info.values())
+        # glyph atlas: every rasterized glyph is packed once into an image and drawn with blt
+        self.__atlases = []
+        self.__glyphs = {}  # char -> (atlas image, u, v, width, height)
+        self.__atlas_x = 0
+        self.__atlas_y = 0
+        self.__atlas_row_height = 0
 
-    def _extract_pixel(self, char: str) -> list:
+    def _extract_pixel(self, char: str) -> np.ndarray:
         """Extract pixel information of the unicode charactor
         Args:
             char: 
                 charactor you want to extract, length shoud be 1
         Returns:
-            2 dim list of grayscale value
+            2 dim uint8 array of grayscale value
         """
+        # PIL is only needed for glyphs missing from the cache, so import it on demand
+        from PIL import Image, ImageFont, ImageDraw
         # get fontsize
-        font = ImageFont.truetype(
-            self.font_path, self.original_size*self.multipler)
+        if self.__font is None:
+            self.__font = ImageFont.truetype(
+                self.font_path, self.original_size*self.multipler)
+        font = self.__font
         # dummy image for get text_size
         tmp = Image.new('RGB', (1, 1), (0, 0, 0))
         tmp_d = ImageDraw.Draw(tmp)
@@ -56,22 +77,77 @@ class PyxelUnicode(object):
         img_d = ImageDraw.Draw(img)
         img_d.text((0, 0), char, font=font)
         # convert it to bilevel or grayscale image
-        img = img.convert(self.mode)
-        data = list(img.getdata())
+        pixels = np.asarray(img.convert(self.mode))
+        if pixels.dtype == np.bool_:
+            # bilevel images come back as booleans; keep the 0/255 values of getdata()
+            pixels = pixels.astype(np.uint8) * 255
         output_width = width//self.multipler
         output_height = height//self.multipler
-        result = [[0]*(output_width) for _ in range(output_height)]
         p_offset = self.multipler >> 1  # color picker offset
-        for i in range(output_height):
-            for j in range(output_width):
-                y = i*self.multipler
-                x = j*self.multipler
-                # calculate one dimension index in image data
-                one_dim_idx = (y+p_offset)*width + x+p_offset
-                result[i][j] = data[one_dim_idx]
-        return result
+        # downsample with one strided view: the center pixel of every multipler x multipler cell
+        sampled = pixels[p_offset::self.multipler, p_offset::self.multipler]
+        return np.ascontiguousarray(sampled[:output_height, :output_width], dtype=np.uint8)
+
+    @staticmethod
+    def _spans(c) -> list:
+        """Horizontal runs of lit pixels in a glyph table as (row, start, length)
+        """
+        lit = np.asarray(c, dtype=bool)
+        if not lit.size:
+            return []
+        # a run starts where a row goes from unlit to lit and ends where it goes back
+        edges = np.diff(np.pad(lit, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+        return list(zip(rows.tolist(), starts.tolist(), (ends - starts).tolist()))
+
+    def glyph_table(self, char: str) -> np.ndarray:
+        """Return the pixel table of a charactor, extracting it on first use
+        """
+        c = self.__char_info.get(char)
+        if c is None:
+            with self.__lock:
+                c = self.__char_info.get(char)
+                if c is None:
+                    # update the character table
+                    c = self.__char_info[char] = self._extract_pixel(char)
+                    # update the font_height
+                    self.font_height = max(len(c), self.font_height)
+        return c
+
+    def glyph_tables(self) -> dict:
+        """Snapshot of every extracted glyph table (char -> 2 dim array)
+        """
+        with self.__lock:
+            return dict(self.__char_info)
+
+    def _pack_glyph(self, char: str) -> tuple:
+        """Rasterize a glyph into the atlas (shelf packing) and return its atlas entry
+        """
+        c = self.glyph_table(char)
+        height = len(c)
+        width = len(c[0]) if height else 0
+        if width > ATLAS_SIZE or height > ATLAS_SIZE:
+            raise ValueError(f'glyph {char!r} does not fit in a {ATLAS_SIZE}px atlas')
+        if self.__atlas_x + width > ATLAS_SIZE:
+            # start a new shelf
+            self.__atlas_x = 0
+            self.__atlas_y += self.__atlas_row_height
+            self.__atlas_row_height = 0
+        if not self.__atlases or self.__atlas_y + height > ATLAS_SIZE:
+            self.__atlases.append(pyxel.Image(ATLAS_SIZE, ATLAS_SIZE))
+            self.__atlas_x = self.__atlas_y = self.__atlas_row_height = 0
+        atlas = self.__atlases[-1]
+        u, v = self.__atlas_x, self.__atlas_y
+        for row, start, length in self._spans(c):
+            atlas.rect(u+start, v+row, length, 1, GLYPH_COLOR)
+        self.__atlas_x += width
+        self.__atlas_row_height = max(self.__atlas_row_height, height)
+        glyph = (atlas, u, v, width, height)
+        self.__glyphs[char] = glyph
+        return glyph
 
-    def text(self, x: int, y: int, s, color: int = 7, bg_color: int = None):
+    def text(self, x: int, y: int, s, color: int = 7, bg_color: int = None, image=None):
         """unicode text painter (just like pyxel.text())
         Args:
             x, y:
@@ -83,27 +159,29 @@ class PyxelUnicode(object):
                 Foreground color of the string
             bg_color: (default=None)
                 Background color of the string
+            image: (default=None)
+                pyxel.Image to draw into instead of the screen
         """
+        target = pyxel if image is None else image
         cur_x, cur_y = x, y  # current coordination
         origin_x = x
-        for char in s:
-            if char == '\n':
-                cur_y += self.font_height
-                cur_x = origin_x
-                continue
-            if char not in self.__char_info:
-                # update the character table
-                self.__char_info[char] = self._extract_pixel(char)
-                # update the font_height
-                self.font_height = max(
-                    len(self.__char_info[char]), self.font_height)
-            c = self.__char_info[char]
-            for row in range(len(c)):
-                for col in range(len(c[0])):
-                    if c[row][col]:
-                        pyxel.pset(cur_x+col, cur_y+row, color)
+        glyphs = self.__glyphs
+        # palette swap: glyphs are stored in GLYPH_COLOR and drawn in the requested color
+        target.pal(GLYPH_COLOR, color)
+        try:
+            for char in s:
+                if char == '\n':
+                    cur_y += self.font_height
+                    cur_x = origin_x
+                    continue
+                glyph = glyphs.get(char) or self._pack_glyph(char)
+                atlas, u, v, width, height = glyph
+                if width and height:
                     if bg_color is not None:
-                        pyxel.pset(cur_x+col, cur_y+row, bg_color)
-            cur_x += len(c[0])
+                        target.rect(cur_x, cur_y, width, height, bg_color)
+                    target.blt(cur_x, cur_y, atlas, u, v, width, height, 0)
+                cur_x += width
+        finally:
+            target.pal(GLYPH_COLOR, GLYPH_COLOR)
 
 
@@ -1,3 +1,4 @@
 from .PyxelUnicode import PyxelUnicode as PyxelUnicode
+from .FontRegistry import get_font as get_font, prewarm as prewarm, save_cache as save_cache, set_cache_dir as set_cache_dir
 
-__all__ = ['PyxelUnicode']
+__all__ = ['PyxelUnicode', 'get_font', 'prewarm', 'save_cache', 'set_cache_dir']
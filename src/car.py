@@ -2,7 +2,6 @@ import random
 import pyxel
 import math
 import threading
-import time
 import copy
 import concurrent.futures
 from constants import (
@@ -12,25 +11,26 @@ from constants import (
     SLIPSTREAM_BASE_FRAMES, SLIPSTREAM_SPEED_BOOST,
     MISTAKE_CHANCE
 )
-from track import (
-    get_desired_speed_at_distance, get_position_along_track, DISTANCES_ARRAY, SPEEDS_ARRAY,
-    PIT_LANE_POINTS, PIT_LANE_CUMULATIVE_DISTANCES, TRACK_POINTS, PITLANE_ENTRANCE_DISTANCE,
-    PITLANE_EXIT_DISTANCE, TOTAL_TRACK_LENGTH, DESIRED_SPEEDS_LIST,
-    PIT_STOP_POINT, PIT_LANE_TOTAL_LENGTH, CUMULATIVE_DISTANCES,
-    START_FINISH_INDEX_SMOOTHED,
-)
+import track
+from track import get_desired_speed_at_distance, get_position_along_track
 from announcements import Announcements
+from driver_model import NEUTRAL_MODIFIERS
 
 # Global process pool used by all cars for prediction tasks
 PREDICTION_PROCESS_POOL = concurrent.futures.ProcessPoolExecutor(max_workers=6)
+# Simulation frames between two background predictions of the same car (15 s at 30 fps)
+PREDICTION_INTERVAL_FRAMES = 15 * 30
 
 
-def prediction_worker(car, target_laps, frame_delay):
+def prediction_worker(car, target_laps, frame_delay, track_file):
+    # Pool workers start out on the default track; follow the session's track
+    if track_file is not None and track.current.track_file != track_file:
+        track.use_track(track.load_compiled_track(track_file))
     return car.simulate_prediction(target_laps, frame_delay)
 class Car:
     def __init__(self, color_index, car_number, driver_name, grid_position,
-                 announcements, pitbox_coords=PITLANE_ENTRANCE_DISTANCE,
-                 pitbox_distance=PITLANE_EXIT_DISTANCE, game=None, mode='race', start_delay_frames=0):
+                 announcements, pitbox_coords=None, pitbox_distance=None, game=None, mode='race', start_delay_frames=0,
+                 modifiers=NEUTRAL_MODIFIERS):
         # Starting tire is set initially (will not be overwritten by a strategy plan)
         if grid_position < 10:
             self.tire_type = "soft"
@@ -53,11 +53,17 @@ class Car:
         self.grid_position = grid_position
         self.announcements = announcements
         self.game = game
+        self.session = None  # the Qualifying session driving this car, set by the session
         self.driver_name = driver_name
         self.mode = mode
         self.crashed = False
         self.speed = 0.0
         self.previous_distance = 0.0
+        # Default pitbox at the pit lane entry/exit of the track active when the car is created
+        if pitbox_coords is None:
+            pitbox_coords = track.current.pitlane_entrance_distance
+        if pitbox_distance is None:
+            pitbox_distance = track.current.pitlane_exit_distance
         self.pitbox_coords = pitbox_coords
         self.pitlane_distance = pitbox_distance
         self.pitbox_distance = pitbox_distance
@@ -92,6 +98,14 @@ class Car:
         self.fuel_consumption_coefficient = 0.01
         self.fuel_consumption_multiplier = 1.0
 
+        # Driver skill (driver_model.DriverModifiers), kept as plain floats for the update loop
+        self.modifiers = modifiers
+        self.tire_wear_multiplier = modifiers.tire_wear
+        self.fuel_consumption_multiplier *= modifiers.fuel
+        self.mistake_multiplier = modifiers.mistake_rate
+        self.overtake_multiplier = modifiers.overtake
+        self.pace_multiplier = modifiers.qualifying_pace if mode == 'qualifying' else 1.0
+
         # Slipstream
         self.slipstream_timer = 0
         self.slipstream_target = None
@@ -113,15 +127,21 @@ class Car:
 
         # Instance attributes for asynchronous prediction
         self.prediction_future = None
-        self.prediction_timestamp = 0
+        self.prediction_frame = None  # simulation frame of the last scheduled prediction
         self.prediction_result = None
         self.prediction_printed = False
+        # Headless batch races switch this off so workers never spawn their own prediction pools.
+        self.predictions_enabled = True
+        # Latest simulation frame seen by this car; predictions are scheduled on simulation time
+        # rather than wall-clock time so a seeded race always plays out the same.
+        self.current_frame = 0
 
     def __getstate__(self):
         state = self.__dict__.copy()
         # Exclude unpicklable attributes (e.g. objects with thread locks)
         state['announcements'] = None
         state['game'] = None
+        state['session'] = None
         state['prediction_future'] = None
         return state
     def __setstate__(self, state):
@@ -136,8 +156,9 @@ class Car:
         """
         # Submit the prediction work to the process pool
 
-        self.prediction_future = PREDICTION_PROCESS_POOL.submit(prediction_worker, self, target_laps, 0)
-        self.prediction_timestamp = time.time()
+        self.prediction_future = PREDICTION_PROCESS_POOL.submit(prediction_worker, self, target_laps, 0,
+                                                              track.current.track_file)
+        self.prediction_frame = self.current_frame
         self.prediction_result = None
         self.prediction_printed = False  # Reset the flag for the new prediction
 
@@ -166,10 +187,14 @@ class Car:
         if safety_car_active and self.speed != SAFETY_CAR_SPEED:
             base_desire += 0.9
 
+        if not self.predictions_enabled:
+            return base_desire
+
         # Check and schedule background prediction for this car individually.
-        current_time = time.time()
-        # Schedule new prediction only if 15 seconds have elapsed since the last update.
-        if self.prediction_future is None and (current_time - self.prediction_timestamp) > 15:
+        # Schedule new prediction only if 15 seconds of race time have elapsed since the last one.
+        if self.prediction_future is None and (
+                self.prediction_frame is None
+                or self.current_frame - self.prediction_frame > PREDICTION_INTERVAL_FRAMES):
             self.schedule_async_prediction(target_laps=20)
         else:
             self.check_async_prediction_done()
@@ -282,7 +307,7 @@ class Car:
             )
         # Mistake event: reduce speed for this update (simulate lost time)
         if self.get_corner_type() != 'none':
-            if random.random() < mistake_chance:
+            if random.random() < mistake_chance * self.mistake_multiplier:
                 slowdown_factor = random.uniform(0.2, 0.5)
                 self.speed *= slowdown_factor
                 self.announcements.add_message(
@@ -302,14 +327,15 @@ class Car:
         self.start_delay_frames = 0
         self.warmup_started = False
         spacing_factor = 2.0
-        start_distance = CUMULATIVE_DISTANCES[START_FINISH_INDEX_SMOOTHED]
-        self.grid_distance = (start_distance - (0.5 + self.grid_position * spacing_factor)) % TOTAL_TRACK_LENGTH
+        start_distance = track.current.cumulative_distances[track.current.start_finish_index_smoothed]
+        self.grid_distance = (start_distance - (0.5 + self.grid_position * spacing_factor)) % track.current.total_track_length
         self.distance = self.grid_distance
         self.previous_distance = self.distance
         self.on_pitlane = False
         self.pitting = False
         self.pit_stop_done = False
         self.pit_stop_timer = 0
+        self.pit_stops = 0
         self.just_entered_pit = False
         self.just_changed_tires = False
         self.target_speed = self.base_max_speed
@@ -346,7 +372,7 @@ class Car:
         for other_car in cars:
             if (other_car is not self and other_car.is_active and
                     not other_car.is_under_safety_car and not other_car.crashed):
-                distance_diff = (other_car.distance - self.distance) % TOTAL_TRACK_LENGTH
+                distance_diff = (other_car.distance - self.distance) % track.current.total_track_length
                 if 0 < distance_diff < best_distance:
                     best_distance = distance_diff
                     best_car = other_car
@@ -391,8 +417,8 @@ class Car:
                 return
         if not self.warmup_completed:
             self.distance += self.speed
-            self.distance %= TOTAL_TRACK_LENGTH
-            distance_to_grid = (self.grid_distance - self.distance) % TOTAL_TRACK_LENGTH
+            self.distance %= track.current.total_track_length
+            distance_to_grid = (self.grid_distance - self.distance) % track.current.total_track_length
             if distance_to_grid <= self.speed:
                 self.distance = self.grid_distance
                 self.speed = 0.0
@@ -411,7 +437,7 @@ class Car:
             self.is_active = False
             return
     def update_tires(self):
-        wear_rate = TIRE_TYPES[self.tire_type]["wear_rate"] / self.suspension_quality
+        wear_rate = TIRE_TYPES[self.tire_type]["wear_rate"] / self.suspension_quality * self.tire_wear_multiplier
         if self.tire_percentage < TIRE_TYPES[self.tire_type]["threshold"]:
             wear_rate *= 2
         self.tire_percentage = max(1, self.tire_percentage - wear_rate)
@@ -419,11 +445,12 @@ class Car:
 
         self.update_tire_temperature()
     def update_speed(self):
+        current = track.current
         base_target_speed = get_desired_speed_at_distance(
-            self.distance % TOTAL_TRACK_LENGTH,
-            DISTANCES_ARRAY,
-            SPEEDS_ARRAY,
-            TOTAL_TRACK_LENGTH,
+            self.distance % current.total_track_length,
+            current.distances_array,
+            current.speeds_array,
+            current.total_track_length,
             self
         )
         # --- Advanced Tire Grip Effect ---
@@ -441,7 +468,7 @@ class Car:
             tire_wear_factor = 0.50 + (self.tire_percentage / (tire_threshold - 5)) * (0.95 - 0.50)
         # Combine wear and temperature effects.
         final_tire_factor = tire_wear_factor * temp_factor * TIRE_TYPES[self.tire_type]["grip"]
-        self.target_speed = base_target_speed * final_tire_factor
+        self.target_speed = base_target_speed * final_tire_factor * self.pace_multiplier
         self.target_speed = max(self.target_speed, self.min_speed)
 
         # ----- Weight-Adjusted Acceleration and Speed Adjustments -----
@@ -491,6 +518,7 @@ class Car:
         if not race_started or self.crashed:
             return
 
+        self.current_frame = current_frame
         self.previous_distance = self.distance
         self.previous_pitlane_distance = self.pitlane_distance
         if self.slipstream_cooldown > 0:
@@ -519,9 +547,9 @@ class Car:
         # ----- Update Position and Lap Count -----
         if not self.on_pitlane:
             self.distance += self.speed
-            current_lap_distance = self.distance % TOTAL_TRACK_LENGTH
-            previous_lap_distance = self.previous_distance % TOTAL_TRACK_LENGTH
-            start_finish_distance = CUMULATIVE_DISTANCES[START_FINISH_INDEX_SMOOTHED]
+            current_lap_distance = self.distance % track.current.total_track_length
+            previous_lap_distance = self.previous_distance % track.current.total_track_length
+            start_finish_distance = track.current.cumulative_distances[track.current.start_finish_index_smoothed]
             crossed_line = False
             if previous_lap_distance <= start_finish_distance < current_lap_distance:
                 crossed_line = True
@@ -559,8 +587,8 @@ class Car:
             #  )
 
     def to_pitlane(self, current_frame):
-        current_lap_distance = self.distance % TOTAL_TRACK_LENGTH
-        distance_to_entrance = (PITLANE_ENTRANCE_DISTANCE - current_lap_distance) % TOTAL_TRACK_LENGTH
+        current_lap_distance = self.distance % track.current.total_track_length
+        distance_to_entrance = (track.current.pitlane_entrance_distance - current_lap_distance) % track.current.total_track_length
         if self.speed > 0:
             time_to_entrance = distance_to_entrance / self.speed
         else:
@@ -573,7 +601,7 @@ class Car:
             self.just_entered_pit = True
             self.pitlane_distance = 0.0
             self.speed = min(self.speed, PITLANE_SPEED_LIMIT)
-            self.distance = PITLANE_ENTRANCE_DISTANCE
+            self.distance = track.current.pitlane_entrance_distance
 
     def in_pitlane(self, current_frame):
         if not self.pit_stop_done:
@@ -590,6 +618,7 @@ class Car:
                 if self.pit_stop_timer >= PIT_STOP_DURATION:
                     self.pit_stop_done = True
                     self.pit_stop_timer = 0
+                    self.pit_stops += 1
                     # ----- Refuel During Pit Stop -----
                     self.fuel_level = self.fuel_capacity
                     self.announcements.add_message(f"Car {self.car_number} refueled!")
@@ -607,13 +636,13 @@ class Car:
             self.previous_pitlane_distance = self.pitlane_distance
             self.speed = min(self.speed + self.base_acceleration, PITLANE_SPEED_LIMIT)
             self.pitlane_distance += self.speed
-            if self.pitlane_distance >= PIT_LANE_TOTAL_LENGTH:
+            if self.pitlane_distance >= track.current.pit_lane_total_length:
                 self.on_pitlane = False
                 self.pitting = False
                 self.pit_stop_done = False
                 self.pitlane_distance = 0.0
                 self.speed = PITLANE_SPEED_LIMIT
-                self.distance = PITLANE_EXIT_DISTANCE
+                self.distance = track.current.pitlane_exit_distance
                 self.laps_completed += 1
 
     def update_safety_car_behavior(self):
@@ -623,16 +652,17 @@ class Car:
             self.speed += self.base_acceleration * 0.5
             self.speed = min(self.speed, SAFETY_CAR_SPEED * 2)
             self.distance += self.speed
-            self.distance %= TOTAL_TRACK_LENGTH
-            if (self.distance >= PITLANE_ENTRANCE_DISTANCE and self.previous_distance < PITLANE_ENTRANCE_DISTANCE):
+            self.distance %= track.current.total_track_length
+            if (self.distance >= track.current.pitlane_entrance_distance and self.previous_distance < track.current.pitlane_entrance_distance):
                 self.is_active = False
         else:
             self.distance += self.speed
-            self.distance %= TOTAL_TRACK_LENGTH
+            self.distance %= track.current.total_track_length
 
     def update_under_safety_car(self, current_frame, safety_car, cars, car_ahead=None):
         if self.crashed or not self.is_active:
             return
+        self.current_frame = current_frame
         pit_desire = self.calculate_pit_desire(True)
         if pit_desire >= 1.0:
             self.pitting = True
@@ -648,7 +678,7 @@ class Car:
         if self.is_safety_car_ending and not self.is_safety_car:
             self.speed = SAFETY_CAR_SPEED * 1.2
         if car_ahead and car_ahead.is_active and car_ahead != safety_car:
-            distance_to_car_ahead = (car_ahead.distance - self.distance) % TOTAL_TRACK_LENGTH
+            distance_to_car_ahead = (car_ahead.distance - self.distance) % track.current.total_track_length
             gap_error = distance_to_car_ahead - desired_gap
             if gap_error > 1.0:
                 acceleration = min(self.base_acceleration * gap_error * 0.1, self.base_acceleration)
@@ -659,7 +689,7 @@ class Car:
             else:
                 self.speed = car_ahead.speed
         else:
-            distance_to_safety_car = (safety_car.distance - self.distance) % TOTAL_TRACK_LENGTH
+            distance_to_safety_car = (safety_car.distance - self.distance) % track.current.total_track_length
             print(distance_to_safety_car)
             if distance_to_safety_car > SAFETY_CAR_GAP_DISTANCE * 10 and not safety_car.is_exiting:
                 safety_car.speed = SAFETY_CAR_SPEED * 0.1
@@ -675,11 +705,11 @@ class Car:
                 self.speed = max(self.speed - braking * 0.1, 0)
             else:
                 self.speed = safety_car.speed
-        self.distance = (self.distance + self.speed) % TOTAL_TRACK_LENGTH
+        self.distance = (self.distance + self.speed) % track.current.total_track_length
         self.update_adjusted_distance()
         if self.crossed_start_finish_line():
             self.laps_completed += 1
-        wear_rate = TIRE_TYPES[self.tire_type]["wear_rate"] / self.suspension_quality * 0.5
+        wear_rate = TIRE_TYPES[self.tire_type]["wear_rate"] / self.suspension_quality * 0.5 * self.tire_wear_multiplier
         self.tire_percentage = max(1, self.tire_percentage - wear_rate)
 
     def attempt_overtake(self, cars, safety_car_active):
@@ -691,23 +721,23 @@ class Car:
             if safety_car_active and not other_car.on_pitlane:
                 continue
 
-            distance_diff = (other_car.distance - self.distance) % TOTAL_TRACK_LENGTH
+            distance_diff = (other_car.distance - self.distance) % track.current.total_track_length
             if 0 < distance_diff < 5:
                 # If the car ahead is in the pitlane, increase the chance to overtake.
                 if other_car.on_pitlane and self.calculate_pit_desire(safety_car_active) < 1:
-                    self.distance = (self.distance + 1) % TOTAL_TRACK_LENGTH
+                    self.distance = (self.distance + 1) % track.current.total_track_length
                 else:
-                    if random.random() < OVERTAKE_CHANCE:
-                        self.distance = (other_car.distance + 1) % TOTAL_TRACK_LENGTH
+                    if random.random() < OVERTAKE_CHANCE * self.overtake_multiplier:
+                        self.distance = (other_car.distance + 1) % track.current.total_track_length
                         other_car.slipstream_cooldown = 60
                     else:
-                        if random.random() < CRASH_CHANCE:
+                        if random.random() < CRASH_CHANCE * self.mistake_multiplier:
                             self.crashed = True
                             self.speed = 0.0
                             self.is_active = False
                             self.announcements.add_message(f"Car {self.car_number} has crashed!")
                             break
-                        if random.random() < MISTAKE_CHANCE:
+                        if random.random() < MISTAKE_CHANCE * self.mistake_multiplier:
                             self.speed *= 0.9
                             self.announcements.add_message(
                                 f"Car {self.car_number} made a mistake and lost speed!"
@@ -724,8 +754,8 @@ class Car:
         self.qualifying_exit_delay = random.randint(0, 60 * 30 * 3)
         self.last_exit_time = 0
         self.on_pitlane = True
-        # self.pitlane_distance = PIT_STOP_POINT
-        self.distance = PITLANE_ENTRANCE_DISTANCE
+        # self.pitlane_distance = track.current.pit_stop_point
+        self.distance = track.current.pitlane_entrance_distance
         self.previous_distance = self.distance
         self.laps_completed = 0
         self.tire_type = "soft"
@@ -736,7 +766,7 @@ class Car:
             return
         if self.in_pit:
             if self.has_time_for_another_run:
-                if self.game.qualifying.elapsed_time >= self.qualifying_exit_delay:
+                if self.session.elapsed_time >= self.qualifying_exit_delay:
                     self.in_pit = False
                     self.on_pitlane = True
                     self.on_out_lap = True
@@ -751,12 +781,12 @@ class Car:
                 if self.crossed_start_finish_line():
                     self.on_out_lap = False
                     self.on_fast_lap = True
-                    self.current_lap_start_frame = self.game.qualifying.elapsed_time
+                    self.current_lap_start_frame = self.session.elapsed_time
         elif self.on_fast_lap:
             self.previous_distance = self.distance
             self.update_movement(cars)
             if self.crossed_start_finish_line():
-                lap_time = (self.game.qualifying.elapsed_time - self.current_lap_start_frame) / 30.0
+                lap_time = (self.session.elapsed_time - self.current_lap_start_frame) / 30.0
                 self.lap_times.append(lap_time)
                 if self.best_lap_time is None or lap_time < self.best_lap_time:
                     self.best_lap_time = lap_time
@@ -765,7 +795,7 @@ class Car:
         elif self.on_in_lap:
             self.previous_distance = self.distance
             self.update_movement(cars)
-            if (self.distance >= PITLANE_ENTRANCE_DISTANCE and self.previous_distance < PITLANE_ENTRANCE_DISTANCE):
+            if (self.distance >= track.current.pitlane_entrance_distance and self.previous_distance < track.current.pitlane_entrance_distance):
                 self.on_pitlane = True
             if self.on_pitlane:
                 self.update_pitlane_entry()
@@ -781,10 +811,10 @@ class Car:
             self.speed = 0.0
             self.in_pit = True
             self.on_in_lap = False
-            remaining_time = self.game.qualifying.session_time - self.game.qualifying.elapsed_time
+            remaining_time = self.session.session_time - self.session.elapsed_time
             estimated_time_for_run = (self.best_lap_time or 60 * 30) * 2
             if remaining_time > estimated_time_for_run:
-                self.qualifying_exit_delay = self.game.qualifying.elapsed_time + random.randint(60 * 5, 60 * 15)
+                self.qualifying_exit_delay = self.session.elapsed_time + random.randint(60 * 5, 60 * 15)
                 self.has_time_for_another_run = True
             else:
                 self.has_time_for_another_run = False
@@ -793,9 +823,9 @@ class Car:
         self.previous_pitlane_distance = self.pitlane_distance
         self.speed = min(self.speed + self.base_acceleration, PITLANE_SPEED_LIMIT)
         self.pitlane_distance += self.speed
-        if self.pitlane_distance >= PIT_LANE_TOTAL_LENGTH:
+        if self.pitlane_distance >= track.current.pit_lane_total_length:
             self.on_pitlane = False
-            self.distance = PITLANE_EXIT_DISTANCE
+            self.distance = track.current.pitlane_exit_distance
             self.pitlane_distance = 0.0
             self.speed = self.min_speed
 
@@ -816,15 +846,16 @@ class Car:
         self.apply_slipstream(cars)
         if self.on_out_lap or self.on_in_lap:
             self.speed = self.speed * 0.98
-        self.distance %= TOTAL_TRACK_LENGTH
+        self.distance %= track.current.total_track_length
         self.update_adjusted_distance()
 
     # -------------------- Common Functions --------------------
 
     def crossed_start_finish_line(self):
-        start_finish_distance = CUMULATIVE_DISTANCES[START_FINISH_INDEX_SMOOTHED]
-        current_lap_distance = self.distance % TOTAL_TRACK_LENGTH
-        previous_lap_distance = self.previous_distance % TOTAL_TRACK_LENGTH
+        current = track.current
+        start_finish_distance = current.cumulative_distances[current.start_finish_index_smoothed]
+        current_lap_distance = self.distance % current.total_track_length
+        previous_lap_distance = self.previous_distance % current.total_track_length
         if previous_lap_distance <= start_finish_distance < current_lap_distance:
             return True
         elif current_lap_distance < previous_lap_distance:
@@ -833,20 +864,21 @@ class Car:
         return False
 
     def update_adjusted_distance(self):
-        start_finish_distance = CUMULATIVE_DISTANCES[START_FINISH_INDEX_SMOOTHED]
+        current = track.current
+        start_finish_distance = current.cumulative_distances[current.start_finish_index_smoothed]
         if self.on_pitlane:
-            pitlane_fraction = self.pitlane_distance / PIT_LANE_TOTAL_LENGTH
+            pitlane_fraction = self.pitlane_distance / current.pit_lane_total_length
             position = (
-                               PITLANE_ENTRANCE_DISTANCE
-                               + pitlane_fraction * (PITLANE_EXIT_DISTANCE - PITLANE_ENTRANCE_DISTANCE)
-                       ) % TOTAL_TRACK_LENGTH
+                               current.pitlane_entrance_distance
+                               + pitlane_fraction * (current.pitlane_exit_distance - current.pitlane_entrance_distance)
+                       ) % current.total_track_length
         else:
-            position = self.distance % TOTAL_TRACK_LENGTH
+            position = self.distance % current.total_track_length
 
         self.adjusted_distance = (
-                                         position - start_finish_distance + TOTAL_TRACK_LENGTH
-                                 ) % TOTAL_TRACK_LENGTH
-        self.adjusted_total_distance = self.laps_completed * TOTAL_TRACK_LENGTH + self.adjusted_distance
+                                         position - start_finish_distance + current.total_track_length
+                                 ) % current.total_track_length
+        self.adjusted_total_distance = self.laps_completed * current.total_track_length + self.adjusted_distance
         # if DEBUG_MODE:
         # print(
         #    f"DEBUG: Car {self.car_number} - Laps: {self.laps_completed}, raw distance: {self.distance:.2f}, adjusted distance: {self.adjusted_distance:.2f}, total adjusted: {self.adjusted_total_distance:.2f}")
@@ -860,9 +892,10 @@ class Car:
           - "medium" for moderate curves (mix of braking and aero),
           - "slow" for sharp turns (heavily influenced by braking and suspension).
         """
-        current_pos = get_position_along_track(self.distance, TRACK_POINTS, CUMULATIVE_DISTANCES)
-        prev_pos = get_position_along_track(self.distance - offset, TRACK_POINTS, CUMULATIVE_DISTANCES)
-        next_pos = get_position_along_track(self.distance + offset, TRACK_POINTS, CUMULATIVE_DISTANCES)
+        current = track.current
+        current_pos = get_position_along_track(self.distance, current.track_points, current.cumulative_distances)
+        prev_pos = get_position_along_track(self.distance - offset, current.track_points, current.cumulative_distances)
+        next_pos = get_position_along_track(self.distance + offset, current.track_points, current.cumulative_distances)
 
         # Compute vectors from the previous to current, and current to next.
         vec1 = (current_pos[0] - prev_pos[0], current_pos[1] - prev_pos[1])
@@ -903,7 +936,7 @@ class Car:
 
         # Instead of counting laps, count the actual distance traveled.
         total_distance_traveled = 0.0
-        target_distance = target_laps * TOTAL_TRACK_LENGTH
+        target_distance = target_laps * track.current.total_track_length
 
         current_frame = 0
         while total_distance_traveled < target_distance and sim_car.is_active:
@@ -913,7 +946,7 @@ class Car:
 
             sim_car.previous_distance = sim_car.distance
             sim_car.distance += sim_car.speed
-            sim_car.distance %= TOTAL_TRACK_LENGTH
+            sim_car.distance %= track.current.total_track_length
 
             # Add the distance traveled in this frame to the total.
             total_distance_traveled += sim_car.speed
@@ -928,21 +961,22 @@ class Car:
         self.is_safety_car_ending = False
 
     def get_current_position(self):
+        current = track.current
         if self.on_pitlane:
-            pitlane_fraction = self.pitlane_distance / PIT_LANE_TOTAL_LENGTH
-            position = (PITLANE_ENTRANCE_DISTANCE + pitlane_fraction *
-                        (PITLANE_EXIT_DISTANCE - PITLANE_ENTRANCE_DISTANCE)) % TOTAL_TRACK_LENGTH
+            pitlane_fraction = self.pitlane_distance / current.pit_lane_total_length
+            position = (current.pitlane_entrance_distance + pitlane_fraction *
+                        (current.pitlane_exit_distance - current.pitlane_entrance_distance)) % current.total_track_length
         else:
-            position = self.distance % TOTAL_TRACK_LENGTH
+            position = self.distance % current.total_track_length
         return position
 
     def draw(self):
         if not self.is_active:
             return
         if self.on_pitlane:
-            x, y = get_position_along_track(self.pitlane_distance, PIT_LANE_POINTS, PIT_LANE_CUMULATIVE_DISTANCES)
+            x, y = get_position_along_track(self.pitlane_distance, track.current.pit_lane_points, track.current.pit_lane_cumulative_distances)
         else:
-            x, y = get_position_along_track(self.distance, TRACK_POINTS, CUMULATIVE_DISTANCES)
+            x, y = get_position_along_track(self.distance, track.current.track_points, track.current.cumulative_distances)
         if self.mode == 'qualifying':
             pyxel.circ(x, y, 3, self.color)
         elif self.mode == 'race':
@@ -0,0 +1,191 @@
+# car_builds.py
+"""
+Material selection for car components. Every (supplier, material) offer of the parts catalogue
+is loaded into NumPy arrays per component, scored for a set of objective weights in one pass,
+and combined into the Pareto-optimal builds (one offer per component) for a budget: no other
+build is both cheaper and better scoring.
+
+Usage (from the src directory):
+    python car_builds.py --budget 2000000
+    python car_builds.py --budget 1500000 --weights performance=1 durability=1 weight=0.2
+"""
+
+import argparse
+from dataclasses import dataclass
+import numpy as np
+from database import get_database
+
+# Volume of material in each component, in cm3; turns per-cm3 prices and weights into totals.
+COMPONENT_VOLUMES = {
+    "bodywork": 20000,
+    "aero_elements": 8000,
+    "suspension": 6000,
+    "engine": 15000,
+    "gearbox": 6000,
+    "brakes": 2000,
+    "wheels": 10000,
+    "electrical_system": 1500,
+}
+# Higher is better for these; weight and cost are minimised.
+OBJECTIVES = ("performance", "durability", "elasticity", "weight", "cost")
+MINIMISED = ("weight", "cost")
+DEFAULT_WEIGHTS = {"performance": 1.0, "durability": 0.5, "elasticity": 0.2, "weight": 0.5, "cost": 0.0}
+
+
+@dataclass
+class ComponentOffers:
+    """All offers for one component, one array entry per (supplier, material) pair."""
+    supplier_ids: np.ndarray
+    material_ids: np.ndarray
+    stats: np.ndarray  # (offers, len(OBJECTIVES)) in OBJECTIVES order; cost and weight are totals
+
+    def __len__(self):
+        return len(self.supplier_ids)
+
+    def normalised(self):
+        """Stats scaled to 0..1 over this component's offers, flipped so that 1 is always best."""
+        low, high = self.stats.min(axis=0), self.stats.max(axis=0)
+        span = np.where(high > low, high - low, 1.0)
+        scaled = (self.stats - low) / span
+        for name in MINIMISED:
+            column = OBJECTIVES.index(name)
+            scaled[:, column] = 1.0 - scaled[:, column]
+        return scaled
+
+
+@dataclass
+class Build:
+    cost: float
+    score: float
+    weight: float  # kg
+    parts: dict  # component -> (supplier id, material id)
+
+
+class MaterialCatalogue:
+    def __init__(self, components):
+        self.components = components  # component -> ComponentOffers
+
+    @classmethod
+    def from_database(cls, database=None, volumes=COMPONENT_VOLUMES):
+        """Every parts supplier's offers, with its pricemult and stat_changes applied."""
+        database = database or get_database()
+        rows = {component: [] for component in volumes}
+        # The query layer's offers already carry the supplier's price and stat changes
+        for component, volume in volumes.items():
+            for offer in database.query.offers(component=component):
+                rows[component].append((
+                    offer.supplier["id"], offer.material["id"],
+                    offer.performance,
+                    offer.durability,
+                    offer.material["elasticity"],
+                    offer.material["weight_per_cm3"] * volume / 1000.0,
+                    offer.cost * volume,
+                ))
+        components = {}
+        for component, offers in rows.items():
+            if not offers:
+                continue
+            supplier_ids, material_ids, *stats = zip(*offers)
+            components[component] = ComponentOffers(
+                np.array(supplier_ids), np.array(material_ids), np.column_stack(stats).astype(np.float64))
+        return cls(components)
+
+    def scores(self, weights=None):
+        """Weighted score of every offer, per component."""
+        weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        vector = np.array([weights[name] for name in OBJECTIVES], dtype=np.float64)
+        return {component: offers.normalised() @ vector for component, offers in self.components.items()}
+
+    def pareto_builds(self, budget, weights=None):
+        """
+        Builds on the cost/score Pareto front within the budget, cheapest first.
+        Components are merged one at a time: every partial build on the front is paired with
+        every offer of the next component, over-budget pairs are dropped and the result is
+        pruned back to its Pareto front, all as array operations.
+        """
+        scores = self.scores(weights)
+        names = list(self.components)
+        front_cost = np.zeros(1)
+        front_score = np.zeros(1)
+        choices = np.zeros((1, 0), dtype=np.int64)
+        for component in names:
+            offers = self.components[component]
+            cost = offers.stats[:, OBJECTIVES.index("cost")]
+            total_cost = (front_cost[:, None] + cost[None, :]).ravel()
+            total_score = (front_score[:, None] + scores[component][None, :]).ravel()
+            within = np.nonzero(total_cost <= budget)[0]
+            if not len(within):
+                return []
+            keep = within[pareto_front(total_cost[within], total_score[within])]
+            parent, offer = np.divmod(keep, len(offers))
+            front_cost, front_score = total_cost[keep], total_score[keep]
+            choices = np.column_stack((choices[parent], offer))
+
+        weight_column = OBJECTIVES.index("weight")
+        builds = []
+        for cost, score, picked in zip(front_cost, front_score, choices):
+            parts, weight = {}, 0.0
+            for component, index in zip(names, picked):
+                offers = self.components[component]
+                parts[component] = (str(offers.supplier_ids[index]), str(offers.material_ids[index]))
+                weight += offers.stats[index, weight_column]
+            builds.append(Build(float(cost), float(score), weight, parts))
+        return builds
+
+    def best_build(self, budget, weights=None):
+        """Highest scoring build within the budget, or None if no build fits."""
+        builds = self.pareto_builds(budget, weights)
+        return builds[-1] if builds else None
+
+    def best_builds(self, budgets, weights=None):
+        """
+        Best build for each of several budgets (e.g. every AI team's off-season budget) with
+        shared weights. The front for the largest budget contains the front of every smaller
+        one, so it is computed once and each budget is a binary search on it.
+        """
+        builds = self.pareto_builds(max(budgets), weights)
+        costs = np.array([build.cost for build in builds])
+        picks = np.searchsorted(costs, budgets, side="right") - 1
+        return [builds[pick] if pick >= 0 else None for pick in picks]
+
+
+def pareto_front(cost, score):
+    """Indices of the points no other point beats on both lower cost and higher score, by cost."""
+    # Cheapest first; for equal cost the best score first, so only it can survive
+    order = np.lexsort((-score, cost))
+    sorted_score = score[order]
+    best_before = np.maximum.accumulate(np.concatenate(([-np.inf], sorted_score[:-1])))
+    return order[sorted_score > best_before]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find Pareto-optimal car builds for a budget")
+    parser.add_argument("--budget", type=float, required=True)
+    parser.add_argument("--weights", nargs="*", default=[], metavar="OBJECTIVE=WEIGHT",
+                        help=f"objective weights ({', '.join(OBJECTIVES)})")
+    parser.add_argument("--show", type=int, default=5, help="number of builds to list from the top of the front")
+    args = parser.parse_args()
+
+    weights = {}
+    for item in args.weights:
+        name, _, value = item.partition("=")
+        if name not in OBJECTIVES:
+            parser.error(f"unknown objective {name!r}")
+        weights[name] = float(value)
+
+    catalogue = MaterialCatalogue.from_database()
+    builds = catalogue.pareto_builds(args.budget, weights)
+    if not builds:
+        print("No build fits the budget.")
+        return
+    print(f"{len(builds)} Pareto-optimal builds within {args.budget:,.0f}")
+    database = get_database()
+    for build in reversed(builds[-args.show:]):
+        print(f"\nCost {build.cost:,.0f}  score {build.score:.3f}  weight {build.weight:.1f} kg")
+        for component, (supplier_id, material_id) in build.parts.items():
+            print(f"  {component:<18} {database.material(material_id)['name']:<40} "
+                  f"from {database.supplier(supplier_id)['name']}")
+
+
+if __name__ == "__main__":
+    main()
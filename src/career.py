@@ -0,0 +1,333 @@
+# career.py
+"""
+Career persistence. Everything that changes a career (race results, contracts, sponsors, money)
+is an event: it is applied to the in-memory state and appended to a journal. Every
+SNAPSHOT_INTERVAL events, and on request, the full state is written as a compressed snapshot
+together with the journal position it covers, so loading restores the newest snapshot and
+replays only the events after it.
+
+The state is never modified in place: applying an event builds a new top-level dict and copies
+only the containers the event touches. A snapshot therefore only has to keep a reference to the
+current state; the writer thread serialises it while the game goes on. All disk I/O (journal
+appends and snapshots) happens on that thread, in order.
+
+Files, in careerdir:
+    journal.orj             append-only event records
+    snapshot_<seq>.orc      compressed state after event <seq> (the newest few are kept)
+"""
+
+import atexit
+import json
+import os
+import pickle
+import queue
+import struct
+import threading
+import zlib
+from constants import careerdir, POINTS_SYSTEM, CAREER_STARTING_MONEY, CAREER_SEASON_ROUNDS
+from database import get_database
+from sponsors import best_portfolio
+
+JOURNAL_FILE = "journal.orj"
+JOURNAL_MAGIC = b"ORMJ"
+JOURNAL_VERSION = 1
+JOURNAL_HEADER_FORMAT = "<4sH"
+RECORD_FORMAT = "<IIQ"  # payload length, crc32 of the payload, event sequence number
+SNAPSHOT_MAGIC = b"ORMC"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER_FORMAT = "<4sHQQI"  # magic, version, last event seq, journal offset after it, payload length
+SNAPSHOT_INTERVAL = 50  # events between automatic snapshots
+KEEP_SNAPSHOTS = 2
+
+
+# -------------------- State --------------------
+
+def new_state():
+    return {
+        "team_id": None,
+        "team_name": None,
+        "season": 1,
+        "round": 0,
+        "money": 0.0,
+        "driver_points": {},  # car number -> points this season
+        "team_points": {},  # team name -> points this season
+        "results": (),  # one dict per race, oldest first
+        "champions": (),  # (season, car number, team name) per finished season
+        "contracts": {},  # driver id -> contract dict
+        "sponsors": (),  # ids of the sponsors signed with the team
+    }
+
+
+def apply_event(state, kind, data):
+    """Return the state after an event; `state` itself is left untouched."""
+    state = dict(state)
+    if kind == "career_started":
+        state.update(new_state())
+        state.update(team_id=data["team_id"], team_name=data["team_name"], money=data["money"])
+    elif kind == "race_result":
+        state["round"] = data["round"]
+        state["results"] = state["results"] + (data,)
+        driver_points = dict(state["driver_points"])
+        team_points = dict(state["team_points"])
+        for position, (number, team_name) in enumerate(data["classification"]):
+            points = POINTS_SYSTEM[position] if position < len(POINTS_SYSTEM) else 0
+            driver_points[number] = driver_points.get(number, 0) + points
+            team_points[team_name] = team_points.get(team_name, 0) + points
+        state["driver_points"], state["team_points"] = driver_points, team_points
+    elif kind == "money":
+        state["money"] = state["money"] + data["amount"]
+    elif kind == "contract":
+        contracts = dict(state["contracts"])
+        contracts[data["driver_id"]] = data
+        state["contracts"] = contracts
+    elif kind == "contract_ended":
+        contracts = dict(state["contracts"])
+        contracts.pop(data["driver_id"], None)
+        state["contracts"] = contracts
+    elif kind == "sponsor_signed":
+        state["sponsors"] = state["sponsors"] + (data["sponsor_id"],)
+    elif kind == "sponsor_ended":
+        state["sponsors"] = tuple(sponsor for sponsor in state["sponsors"] if sponsor != data["sponsor_id"])
+    elif kind == "season_ended":
+        champion = max(state["driver_points"].items(), key=lambda item: (item[1], -item[0]), default=(None, 0))[0]
+        team = max(state["team_points"].items(), key=lambda item: (item[1], item[0]), default=(None, 0))[0]
+        state["champions"] = state["champions"] + ((state["season"], champion, team),)
+        state.update(season=state["season"] + 1, round=0, driver_points={}, team_points={})
+    else:
+        raise ValueError(f"Unknown career event {kind!r}")
+    return state
+
+
+# -------------------- Files --------------------
+
+def encode_record(seq, kind, data):
+    payload = json.dumps({"kind": kind, "data": data}, separators=(",", ":")).encode()
+    return struct.pack(RECORD_FORMAT, len(payload), zlib.crc32(payload), seq) + payload
+
+
+def read_journal(path, offset=None):
+    """
+    Yield (seq, kind, data, end offset) for every intact record from `offset` on (default: the
+    first record). Reading stops at the first truncated or corrupt record, e.g. a write cut short.
+    """
+    header_size = struct.calcsize(JOURNAL_HEADER_FORMAT)
+    record_size = struct.calcsize(RECORD_FORMAT)
+    with open(path, "rb") as file:
+        magic, version = struct.unpack(JOURNAL_HEADER_FORMAT, file.read(header_size))
+        if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION:
+            raise ValueError(f"{path} is not a career journal")
+        file.seek(offset if offset is not None else header_size)
+        while True:
+            header = file.read(record_size)
+            if len(header) < record_size:
+                return
+            length, crc, seq = struct.unpack(RECORD_FORMAT, header)
+            payload = file.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            record = json.loads(payload)
+            yield seq, record["kind"], record["data"], file.tell()
+
+
+def encode_snapshot(seq, journal_offset, state):
+    payload = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 6)
+    return struct.pack(SNAPSHOT_HEADER_FORMAT, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, seq, journal_offset,
+                       len(payload)) + payload
+
+
+def read_snapshot_file(path):
+    """(seq, journal offset, state) of a snapshot file."""
+    with open(path, "rb") as file:
+        blob = file.read()
+    magic, version, seq, journal_offset, length = struct.unpack_from(SNAPSHOT_HEADER_FORMAT, blob, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} is not a career snapshot")
+    offset = struct.calcsize(SNAPSHOT_HEADER_FORMAT)
+    return seq, journal_offset, pickle.loads(zlib.decompress(blob[offset:offset + length]))
+
+
+def snapshot_files(directory):
+    """Snapshot paths, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    names = [name for name in os.listdir(directory) if name.startswith("snapshot_") and name.endswith(".orc")]
+    return [os.path.join(directory, name) for name in sorted(names, reverse=True)]
+
+
+class CareerWriter:
+    """
+    Background thread that appends journal records and writes snapshots, in queue order.
+    A write that fails is reported on `failures` and the thread goes on with the next item.
+    """
+
+    def __init__(self, directory, journal_size):
+        self.directory = directory
+        self.pending = queue.SimpleQueue()
+        self.failures = queue.SimpleQueue()  # messages for the game, see Career.save_failures
+        self.journal = open(os.path.join(directory, JOURNAL_FILE), "r+b")
+        self.journal.truncate(journal_size)  # drop a partly written record left by a crash
+        self.journal.seek(journal_size)
+        self.thread = threading.Thread(target=self.writer_loop, name="career-writer", daemon=True)
+        self.thread.start()
+
+    def append(self, seq, kind, data):
+        self.pending.put(("event", seq, (kind, data)))
+
+    def snapshot(self, seq, state):
+        self.pending.put(("snapshot", seq, state))
+
+    def writer_loop(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            action, seq, value = item
+            try:
+                if action == "event":
+                    self.write_event(seq, *value)
+                else:
+                    self.write_snapshot(seq, value)
+            except Exception as e:
+                # Anything can fail here (disk errors, unencodable event data, unpicklable state);
+                # losing the writer thread would silently stop every later save.
+                message = f"Career save failed ({action} {seq}): {type(e).__name__}: {e}"
+                print(message)
+                self.failures.put(message)
+
+    def write_event(self, seq, kind, data):
+        record = encode_record(seq, kind, data)
+        position = self.journal.tell()
+        try:
+            self.journal.write(record)
+            self.journal.flush()
+        except OSError:
+            # Cut off a partly written record so later records still follow an intact one
+            self.journal.seek(position)
+            self.journal.truncate()
+            raise
+
+    def write_snapshot(self, seq, state):
+        # Every event up to seq was queued before this snapshot, so the journal now ends at seq.
+        blob = encode_snapshot(seq, self.journal.tell(), state)
+        path = os.path.join(self.directory, f"snapshot_{seq:010d}.orc")
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as file:
+            file.write(blob)
+        os.replace(temp_path, path)
+        for old in snapshot_files(self.directory)[KEEP_SNAPSHOTS:]:
+            os.remove(old)
+
+    def close(self):
+        self.pending.put(None)
+        self.thread.join()
+        self.journal.close()
+
+
+# -------------------- Career --------------------
+
+class Career:
+    def __init__(self, directory, state, seq, journal_size):
+        self.directory = directory
+        self.state = state
+        self.seq = seq  # sequence number of the last applied event
+        self.events_since_snapshot = 0
+        self.writer = CareerWriter(directory, journal_size)
+        self.closed = False
+        atexit.register(self.close)
+
+    @classmethod
+    def create(cls, team, directory=careerdir, money=CAREER_STARTING_MONEY):
+        """Start a new career with the given team record, replacing any career in the directory."""
+        os.makedirs(directory, exist_ok=True)
+        for path in snapshot_files(directory):
+            os.remove(path)
+        with open(os.path.join(directory, JOURNAL_FILE), "wb") as file:
+            file.write(struct.pack(JOURNAL_HEADER_FORMAT, JOURNAL_MAGIC, JOURNAL_VERSION))
+        career = cls(directory, new_state(), 0, struct.calcsize(JOURNAL_HEADER_FORMAT))
+        career.record("career_started", team_id=team["id"], team_name=team["team_name"], money=money)
+        for contract in team["drivers"]:
+            career.record("contract", **dict(contract, team_id=team["id"]))
+        portfolio = best_portfolio(races=CAREER_SEASON_ROUNDS)
+        for sponsor in portfolio.sponsors if portfolio else ():
+            career.record("sponsor_signed", sponsor_id=sponsor["id"])
+            career.record("money", amount=sponsor["upfront_payment"], reason=f"{sponsor['name']} signing")
+        career.autosave()
+        return career
+
+    @classmethod
+    def load(cls, directory=careerdir):
+        """Restore the newest snapshot and replay the journal after it. None if there is no career."""
+        journal_path = os.path.join(directory, JOURNAL_FILE)
+        if not os.path.exists(journal_path):
+            return None
+        state, seq, offset = new_state(), 0, None
+        for path in snapshot_files(directory):
+            try:
+                seq, offset, state = read_snapshot_file(path)
+                break
+            except (OSError, ValueError, struct.error, zlib.error, pickle.UnpicklingError) as e:
+                print(f"Ignoring career snapshot {path}: {e}")
+        journal_size = offset if offset is not None else struct.calcsize(JOURNAL_HEADER_FORMAT)
+        replayed = 0
+        for record_seq, kind, data, end in read_journal(journal_path, offset):
+            if record_seq != seq + 1:
+                break
+            state = apply_event(state, kind, data)
+            seq, journal_size = record_seq, end
+            replayed += 1
+        if state["team_id"] is None:
+            return None
+        print(f"Career loaded: season {state['season']}, round {state['round']} ({replayed} events replayed)")
+        return cls(directory, state, seq, journal_size)
+
+    def record(self, kind, **data):
+        """Apply an event and queue it for the journal."""
+        self.state = apply_event(self.state, kind, data)
+        self.seq += 1
+        self.writer.append(self.seq, kind, data)
+        self.events_since_snapshot += 1
+        if self.events_since_snapshot >= SNAPSHOT_INTERVAL:
+            self.autosave()
+
+    def autosave(self):
+        """Queue a full snapshot of the current state; returns immediately."""
+        self.writer.snapshot(self.seq, self.state)
+        self.events_since_snapshot = 0
+
+    def save_failures(self):
+        """
+        Messages for the writes that failed since the last call. The in-memory career is still
+        complete; a later snapshot that succeeds covers the events whose records were lost.
+        """
+        messages = []
+        while True:
+            try:
+                messages.append(self.writer.failures.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def record_race_result(self, race, track_file=None):
+        """Record a finished race: classification, points, sponsor payments and season rollover."""
+        database = get_database()
+        teams = {driver["number"]: database.query.team_of_driver(driver["id"]) for driver in database.drivers}
+        team_of_car = {number: team["team_name"] for number, team in teams.items() if team is not None}
+        classified = [car for car in race.cars if car.is_active and not car.crashed]
+        self.record("race_result",
+                    season=self.state["season"], round=self.state["round"] + 1, track=track_file,
+                    classification=[[car.car_number, team_of_car.get(car.car_number)] for car in classified],
+                    dnfs=[car.car_number for car in race.cars if car.crashed or not car.is_active])
+        per_race = sum(database.sponsor(sponsor_id)["payment_per_race"] for sponsor_id in self.state["sponsors"])
+        if per_race:
+            self.record("money", amount=per_race, reason="sponsor payments")
+        if self.state["round"] >= CAREER_SEASON_ROUNDS:
+            self.record("season_ended")
+        self.autosave()
+
+    def close(self):
+        """Write a final snapshot and wait until everything is on disk."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.events_since_snapshot:
+            self.autosave()
+        self.writer.close()
@@ -1,14 +1,14 @@
 import pyxel
-import json
 import math
-from pyxelunicode import PyxelUnicode
+from pyxelunicode import get_font
+from database import get_database
 
 class ChooseTeam:
     def __init__(self, game):
         self.game = game
         self.font_path = r"../fonts/PublicPixel.ttf"
         self.font_size = 16
-        self.pyuni = PyxelUnicode(self.font_path, self.font_size)
+        self.pyuni = get_font(self.font_path, self.font_size)
         self.sprite_x = 0
         self.sprite_y = 0
         self.sprite_width = 200
@@ -40,16 +40,12 @@ class ChooseTeam:
         self.flash_duration = 80  # Total time to flash
 
     def load_teams(self):
-        """Load team data from JSON file."""
-        with open("../database/teams/teams.json", "r") as f:
-            return json.load(f)
+        """Team records (read-only, shared with the other screens)."""
+        return get_database().teams
 
     def load_drivers(self):
-        """Load driver data from JSON file and create a mapping from driver_id to driver data."""
-        with open("../database/drivers/drivers.json", "r") as f:
-            drivers = json.load(f)
-        drivers_map = {driver["id"]: driver for driver in drivers}
-        return drivers_map
+        """Mapping from driver_id to driver record."""
+        return get_database().drivers_by_id
 
     def toggle_colors(self):
         """Toggle the colors between white and base color for flashing effect."""
@@ -274,3 +270,4 @@ class ChooseTeam:
         """Confirm the selected team and initiate flashing animation before transition."""
         self.flash_counter = 0  # Reset the flash counter
         self.animation_phase = "flashing"  # Start flashing phase
+        self.game.start_career(self.teams[self.current_team_index])
@@ -0,0 +1,202 @@
+# compile_tracks.py
+"""
+Compile and validate every track in the tracks directory in parallel. Valid tracks get a
+compiled bundle (.npz next to the .json) and the results are summarised in tracks/index.json.
+
+Usage (from the src directory):
+    python compile_tracks.py            # all tracks in ../tracks
+    python compile_tracks.py track3     # only the named tracks
+"""
+
+import argparse
+import concurrent.futures
+import json
+import math
+import sys
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+import numpy as np
+from track import compile_track_data, save_track_bundle
+
+TRACKS_DIR = Path(__file__).resolve().parent.parent / "tracks"
+INDEX_FILE = "index.json"
+CORNER_ANGLE_DEGREES = 5.0  # a run of smoothed points turning more than this per point is one corner
+# The compiler always closes the loop with a periodic spline. A closing edge (last to first control
+# point) this many times longer than every other edge usually means the layout was saved unfinished.
+CLOSING_EDGE_RATIO = 3.0
+PIT_JOIN_TOLERANCE = 5.0  # pit lane ends must lie this close to the track
+MIN_SEGMENT_LENGTH = 1e-6
+
+
+@dataclass
+class TrackReport:
+    file: str
+    bundle: str = None
+    length: float = None
+    corners: int = None
+    max_laps: int = None
+    control_points: int = None
+    pit_lane_length: float = None
+    errors: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+
+
+def count_corners(angle_diffs):
+    turning = np.degrees(np.asarray(angle_diffs)) > CORNER_ANGLE_DEGREES
+    if not turning.any():
+        return 0
+    starts = np.count_nonzero(turning[1:] & ~turning[:-1]) + int(turning[0])
+    # A corner running through the end of the point list is the same corner as at the start
+    if turning.all():
+        return 1
+    if turning[0] and turning[-1]:
+        starts -= 1
+    return int(starts)
+
+
+def distance_to_polyline(point, points):
+    """Shortest distance from a point to a polyline given as an (n, 2) array."""
+    starts, ends = points[:-1], points[1:]
+    segments = ends - starts
+    lengths_squared = np.einsum("ij,ij->i", segments, segments)
+    t = np.einsum("ij,ij->i", np.asarray(point, dtype=np.float64) - starts, segments)
+    t = np.clip(np.divide(t, lengths_squared, out=np.zeros_like(t), where=lengths_squared > 0), 0.0, 1.0)
+    projected = starts + segments * t[:, None]
+    return float(np.min(np.hypot(*(projected - point).T)))
+
+
+def validate(compiled, report):
+    original_points = compiled["ORIGINAL_TRACK_POINTS"]
+    track_points = np.asarray(compiled["TRACK_POINTS"], dtype=np.float64)
+
+    # Closing edge of the control points; the smoothed track is closed by construction
+    edges = [math.dist(a, b) for a, b in zip(original_points, original_points[1:])]
+    closing_edge = math.dist(original_points[-1], original_points[0])
+    if edges and closing_edge > CLOSING_EDGE_RATIO * max(edges):
+        report.warnings.append(f"the loop is closed by a {closing_edge:.1f} long edge from the last control point "
+                               f"to the first, the longest other edge is {max(edges):.1f}")
+
+    # The race also reads the point after the start/finish line on the smoothed track
+    if compiled["START_FINISH_INDEX_SMOOTHED"] + 1 >= len(track_points):
+        report.errors.append("start/finish line falls on the last smoothed point")
+
+    # Degenerate segments
+    segment_lengths = np.diff(np.asarray(compiled["CUMULATIVE_DISTANCES"]))
+    degenerate = np.count_nonzero(segment_lengths < MIN_SEGMENT_LENGTH)
+    if degenerate:
+        report.errors.append(f"{degenerate} degenerate segments on the smoothed track")
+    duplicates = sum(1 for a, b in zip(original_points, original_points[1:]) if list(a) == list(b))
+    if duplicates:
+        report.warnings.append(f"{duplicates} repeated control points")
+
+    # Pit lane
+    pit_points = compiled["ORIGINAL_PIT_LANE_POINTS"]
+    if not pit_points:
+        report.warnings.append("no pit lane")
+        return
+    for name, point in (("entry", pit_points[0]), ("exit", pit_points[-1])):
+        distance = distance_to_polyline(point, track_points)
+        if distance > PIT_JOIN_TOLERANCE:
+            report.errors.append(f"pit {name} is {distance:.1f} away from the track")
+    if compiled["PIT_LANE_TOTAL_LENGTH"] <= 0:
+        report.errors.append("pit lane has no length")
+    if compiled["PITLANE_ENTRANCE_DISTANCE"] == compiled["PITLANE_EXIT_DISTANCE"]:
+        report.errors.append("pit entry and exit join the track at the same point")
+
+
+def compile_and_validate(path, write_bundle=True):
+    """Compile one track, validate it and write its bundle. Executed inside a worker process."""
+    path = Path(path)
+    report = TrackReport(file=path.name)
+    try:
+        with open(path, "r") as f:
+            track_data = json.load(f)
+        points = track_data["points"]
+    except (OSError, ValueError, KeyError) as e:
+        report.errors.append(f"cannot read track: {e}")
+        return report
+    # Checks the compiler itself would trip over
+    if len(points) < 3:
+        report.errors.append(f"only {len(points)} control points")
+        return report
+    start_finish_index = track_data.get("start_finish_index", 0)
+    if not isinstance(start_finish_index, int) or not -len(points) <= start_finish_index < len(points):
+        report.errors.append(f"start_finish_index {start_finish_index} is out of range")
+        return report
+
+    try:
+        compiled = compile_track_data(track_data, path)
+    except (ValueError, IndexError, TypeError) as e:
+        report.errors.append(f"cannot compile: {e}")
+        return report
+
+    report.length = round(compiled["TOTAL_TRACK_LENGTH"], 3)
+    report.corners = count_corners(compiled["ANGLE_DIFFS"])
+    report.max_laps = compiled["TRACK_MAX_LAPS"]
+    report.control_points = len(compiled["ORIGINAL_TRACK_POINTS"])
+    report.pit_lane_length = round(compiled["PIT_LANE_TOTAL_LENGTH"], 3)
+    validate(compiled, report)
+    if write_bundle and not report.errors:
+        report.bundle = save_track_bundle(compiled, path).name
+    return report
+
+
+def find_tracks(directory=TRACKS_DIR, names=None):
+    paths = sorted(path for path in Path(directory).glob("*.json") if path.name != INDEX_FILE)
+    if names:
+        wanted = {Path(name).stem for name in names}
+        paths = [path for path in paths if path.stem in wanted]
+    return paths
+
+
+def compile_tracks(paths, workers=None, write_bundles=True):
+    """Compile the tracks in a process pool and return their reports in the order given."""
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(compile_and_validate, paths, [write_bundles] * len(paths)))
+
+
+def write_index(reports, directory=TRACKS_DIR):
+    """Merge the reports into the tracks index (tracks not compiled this run keep their entry)."""
+    path = Path(directory) / INDEX_FILE
+    index = {}
+    if path.exists():
+        with open(path, "r") as f:
+            index = {entry["file"]: entry for entry in json.load(f).get("tracks", [])}
+    for report in reports:
+        index[report.file] = asdict(report)
+    # Drop entries of tracks that no longer exist
+    index = {name: entry for name, entry in index.items() if (Path(directory) / name).exists()}
+    with open(path, "w") as f:
+        json.dump({"tracks": [index[name] for name in sorted(index)]}, f, indent=4)
+        f.write("\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile and validate track files")
+    parser.add_argument("tracks", nargs="*", help="track names or files (default: every track)")
+    parser.add_argument("--dir", default=str(TRACKS_DIR), help="tracks directory")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--check", action="store_true", help="validate only; write no bundles or index")
+    args = parser.parse_args()
+
+    paths = find_tracks(args.dir, args.tracks)
+    if not paths:
+        print("No track files found.")
+        sys.exit(1)
+
+    reports = compile_tracks(paths, workers=args.workers, write_bundles=not args.check)
+    for report in reports:
+        status = "FAIL" if report.errors else "ok"
+        print(f"{report.file:<20} {status:<5} length {report.length or 0:8.1f}  corners {report.corners or 0:3d}")
+        for error in report.errors:
+            print(f"    error: {error}")
+        for warning in report.warnings:
+            print(f"    warning: {warning}")
+    if not args.check:
+        print(f"Index written to {write_index(reports, args.dir)}")
+    sys.exit(1 if any(report.errors for report in reports) else 0)
+
+
+if __name__ == "__main__":
+    main()
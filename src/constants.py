@@ -24,9 +24,24 @@ CURRENT_VER = "Pre-alpha 0.0.10"
 PIT_STOP_THRESHOLD = 50.0
 PITLANE_SPEED_LIMIT = 0.25
 PIT_STOP_DURATION = 60
+databasedir = r"../database"
 teamsfile = r"../database/teams/teams.json"
 SLIPSTREAM_DISTANCE = 5.0
 SLIPSTREAM_BASE_FRAMES = 20
 SLIPSTREAM_OVERTAKE_FRAMES = 30
 SLIPSTREAM_SPEED_BOOST = 1.10
+TIMING_LINES_PER_LAP = 24
+RECORD_REPLAY = True
+replaysdir = r"../replays"
+savesdir = r"../saves"
+careerdir = r"../saves/career"
+REWIND_SECONDS = 5
+ENABLE_TELEMETRY = False
+TELEMETRY_PER_TICK = True
+telemetrydir = r"../telemetry"
+fontcachedir = r"../cache/fonts"
+databasecachefile = r"../cache/database.sqlite"
 
+POINTS_SYSTEM = [10, 6, 4, 3, 2, 1]
+CAREER_STARTING_MONEY = 5000000.0
+CAREER_SEASON_ROUNDS = 10
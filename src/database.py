@@ -0,0 +1,193 @@
+# database.py
+"""
+One read-only view of the game database (drivers, teams, sponsors, suppliers and materials).
+Every JSON file is parsed once per process, on first use, and indexed by id. Records are
+immutable (mappings become MappingProxyType, lists become tuples) so every screen can share
+them; a screen that annotates records (e.g. pitbox positions on teams) works on copies.
+Queries across tables go through Database.query, backed by a SQLite index (database_sql.py).
+"""
+
+import json
+import os
+import threading
+from types import MappingProxyType
+from constants import databasedir
+
+# table -> (file inside the database directory, key of the record list in that file)
+TABLES = {
+    "drivers": ("drivers/drivers.json", None),
+    "teams": ("teams/teams.json", None),
+    "sponsors": ("sponsors/sponsors.json", "sponsors"),
+    "suppliers": ("suppliers/suppliers.json", "suppliers"),
+    "fuel_suppliers": ("suppliers/fuel_suppliers.json", "fuel_suppliers"),
+    "materials": ("suppliers/materials.json", "materials_by_component"),
+    "fuel_materials": ("suppliers/fuel_materials.json", "materials_by_component"),
+}
+
+
+def freeze(value):
+    """Deep read-only copy of parsed JSON."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Deep mutable copy of a frozen record, in the shapes json.load produces."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+class Table:
+    def __init__(self, records, key="id"):
+        self.records = records
+        self.by_id = MappingProxyType({record[key]: record for record in records})
+
+
+class Database:
+    def __init__(self, directory=databasedir):
+        self.directory = directory
+        self.tables = {}
+        self.queries = None
+        # Reentrant: building the query index reads tables while holding it
+        self.lock = threading.RLock()
+
+    def table(self, name):
+        table = self.tables.get(name)
+        if table is None:
+            # Screens and worker threads may ask for the same table at once; parse it only once.
+            with self.lock:
+                table = self.tables.get(name)
+                if table is None:
+                    table = self.tables[name] = Table(self.read(name))
+        return table
+
+    def read(self, name):
+        file_name, list_key = TABLES[name]
+        with open(os.path.join(self.directory, file_name), "r") as f:
+            data = json.load(f)
+        if list_key is not None:
+            data = data[list_key]
+        if isinstance(data, dict):
+            # Materials are grouped by car component; flatten them and keep the component.
+            data = [dict(record, component=component) for component, records in data.items() for record in records]
+        return freeze(data)
+
+    def reload(self):
+        """Forget every parsed table, e.g. after the files were edited."""
+        with self.lock:
+            self.tables = {}
+            if self.queries is not None:
+                self.queries.close()
+                self.queries = None
+
+    @property
+    def query(self):
+        """Indexed queries over the same records (database_sql.DatabaseQueries), built on first use."""
+        if self.queries is None:
+            from database_sql import DatabaseQueries
+            with self.lock:
+                if self.queries is None:
+                    self.queries = DatabaseQueries(self)
+        return self.queries
+
+    # Record lists, in file order
+
+    @property
+    def drivers(self):
+        return self.table("drivers").records
+
+    @property
+    def teams(self):
+        return self.table("teams").records
+
+    @property
+    def sponsors(self):
+        return self.table("sponsors").records
+
+    @property
+    def suppliers(self):
+        return self.table("suppliers").records
+
+    @property
+    def fuel_suppliers(self):
+        return self.table("fuel_suppliers").records
+
+    @property
+    def materials(self):
+        return self.table("materials").records
+
+    @property
+    def fuel_materials(self):
+        return self.table("fuel_materials").records
+
+    # Indexes
+
+    @property
+    def drivers_by_id(self):
+        return self.table("drivers").by_id
+
+    @property
+    def drivers_by_number(self):
+        table = self.table("drivers")
+        if not hasattr(table, "by_number"):
+            table.by_number = MappingProxyType({driver["number"]: driver for driver in table.records})
+        return table.by_number
+
+    @property
+    def teams_by_id(self):
+        return self.table("teams").by_id
+
+    def driver(self, driver_id):
+        return self.table("drivers").by_id.get(driver_id)
+
+    def team(self, team_id):
+        return self.table("teams").by_id.get(team_id)
+
+    def sponsor(self, sponsor_id):
+        return self.table("sponsors").by_id.get(sponsor_id)
+
+    def supplier(self, supplier_id):
+        """Parts (sup_*) or fuel (fs_*) supplier."""
+        table = "fuel_suppliers" if supplier_id.startswith("fs_") else "suppliers"
+        return self.table(table).by_id.get(supplier_id)
+
+    def material(self, material_id):
+        """Parts (bw_*, ...) or fuel (fuel_*) material."""
+        table = "fuel_materials" if material_id.startswith("fuel_") else "materials"
+        return self.table(table).by_id.get(material_id)
+
+    def materials_for(self, component):
+        return tuple(material for material in self.materials + self.fuel_materials
+                     if material["component"] == component)
+
+    def team_drivers(self, team):
+        """Driver records of a team's contracted drivers, skipping unknown ids."""
+        drivers = self.table("drivers").by_id
+        return [drivers[entry["driver_id"]] for entry in team["drivers"] if entry["driver_id"] in drivers]
+
+    def session_teams(self):
+        """
+        Teams for a qualifying or race session. Sessions add pitbox and palette data to the team
+        dicts, so they get shallow copies (drivers and contracts stay shared and read-only).
+        """
+        return [dict(team) for team in self.teams]
+
+
+database = None
+database_lock = threading.Lock()
+
+
+def get_database():
+    """The process-wide Database."""
+    global database
+    if database is None:
+        with database_lock:
+            if database is None:
+                database = Database()
+    return database
@@ -0,0 +1,290 @@
+# database_sql.py
+"""
+SQLite index of the JSON database for queries that would otherwise mean scanning every record,
+e.g. "suppliers offering bodywork under 1.0 per cm3 with durability >= 8" or "sponsors with
+reputation > 4 that pay per race".
+
+The index is built from the JSON sources into ../cache/database.sqlite and rebuilt automatically
+when a source file changes. Queries return the same shared records as database.Database (the
+SQL only selects ids), so the game never deals with raw rows.
+
+Usage (from the src directory):
+    python database_sql.py            # (re)build the index and print table sizes
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from constants import databasedir, databasecachefile
+from database import TABLES
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE drivers (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL, number INTEGER, dob TEXT, country_of_birth TEXT
+);
+CREATE TABLE driver_stats (
+    driver_id INTEGER NOT NULL, stat TEXT NOT NULL, value REAL NOT NULL, PRIMARY KEY (driver_id, stat)
+);
+CREATE TABLE teams (id INTEGER PRIMARY KEY, team_name TEXT NOT NULL, color TEXT);
+CREATE TABLE team_drivers (
+    team_id INTEGER NOT NULL, driver_id INTEGER NOT NULL, contract_start TEXT, contract_end TEXT,
+    salary_per_race REAL
+);
+CREATE TABLE sponsors (
+    id TEXT PRIMARY KEY, type TEXT, name TEXT NOT NULL, upfront_payment REAL, payment_per_race REAL,
+    is_added_to_team_name INTEGER, is_replacing_team_name INTEGER, reputation REAL
+);
+CREATE TABLE materials (
+    id TEXT PRIMARY KEY, component TEXT NOT NULL, name TEXT NOT NULL, type TEXT, performance REAL,
+    durability REAL, elasticity REAL, weight_per_cm3 REAL, cost_per_cm3 REAL, cost_per_race REAL,
+    engine_damage REAL
+);
+CREATE TABLE suppliers (
+    id TEXT PRIMARY KEY, kind TEXT NOT NULL, name TEXT NOT NULL, country TEXT, pricemult REAL
+);
+-- One row per material a supplier sells, with the supplier's stat changes already applied
+CREATE TABLE offers (
+    supplier_id TEXT NOT NULL, material_id TEXT NOT NULL, component TEXT NOT NULL, cost REAL,
+    performance REAL, durability REAL, engine_damage REAL, PRIMARY KEY (supplier_id, material_id)
+);
+CREATE INDEX driver_stats_by_stat ON driver_stats (stat, value);
+CREATE INDEX team_drivers_by_driver ON team_drivers (driver_id);
+CREATE INDEX sponsors_by_reputation ON sponsors (reputation);
+CREATE INDEX sponsors_by_payment ON sponsors (payment_per_race);
+CREATE INDEX materials_by_component ON materials (component, cost_per_cm3);
+CREATE INDEX offers_by_component_cost ON offers (component, cost);
+CREATE INDEX offers_by_cost ON offers (cost);
+CREATE INDEX offers_by_durability ON offers (durability);
+CREATE INDEX offers_by_material ON offers (material_id);
+"""
+
+# Sort keys callers may ask for; anything else would be pasted into SQL.
+OFFER_ORDER = {"cost": "cost", "-performance": "performance DESC", "-durability": "durability DESC"}
+SPONSOR_ORDER = {"-payment_per_race": "payment_per_race DESC", "-upfront_payment": "upfront_payment DESC",
+                 "-reputation": "reputation DESC", "name": "name"}
+
+
+@dataclass(frozen=True)
+class Offer:
+    """A material as sold by one supplier: cost and stats include the supplier's changes."""
+    supplier: MappingProxyType
+    material: MappingProxyType
+    cost: float  # per cm3 for parts, per race for fuel
+    performance: float
+    durability: float  # None for fuel
+    engine_damage: float  # None for parts
+
+
+def source_fingerprint(directory):
+    """Hash of the size and modification time of every source file."""
+    digest = hashlib.sha256(str(SCHEMA_VERSION).encode())
+    for file_name, _ in TABLES.values():
+        stat = os.stat(os.path.join(directory, file_name))
+        digest.update(f"{file_name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+def build_index(database, path):
+    """Write the SQLite index of a database.Database to path (replaced atomically)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path)
+    try:
+        with connection:
+            connection.executescript(SCHEMA)
+            connection.execute("INSERT INTO meta VALUES ('fingerprint', ?)", (source_fingerprint(database.directory),))
+            connection.executemany("INSERT INTO drivers VALUES (?, ?, ?, ?, ?)", [
+                (d["id"], d["name"], d.get("number"), d.get("dob"), d.get("country_of_birth"))
+                for d in database.drivers])
+            connection.executemany("INSERT INTO driver_stats VALUES (?, ?, ?)", [
+                (d["id"], stat, value) for d in database.drivers for stat, value in d.get("stats", {}).items()])
+            connection.executemany("INSERT INTO teams VALUES (?, ?, ?)", [
+                (t["id"], t["team_name"], t.get("color")) for t in database.teams])
+            connection.executemany("INSERT INTO team_drivers VALUES (?, ?, ?, ?, ?)", [
+                (t["id"], c["driver_id"], c.get("contract_start"), c.get("contract_end"), c.get("salary_per_race"))
+                for t in database.teams for c in t["drivers"]])
+            connection.executemany("INSERT INTO sponsors VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+                (s["id"], s.get("type"), s["name"], s.get("upfront_payment"), s.get("payment_per_race"),
+                 s.get("is_added_to_team_name"), s.get("is_replacing_team_name"), s.get("reputation"))
+                for s in database.sponsors])
+            connection.executemany("INSERT INTO materials VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+                (m["id"], m["component"], m["name"], m.get("type"), m.get("performance"), m.get("durability"),
+                 m.get("elasticity"), m.get("weight_per_cm3"), m.get("cost_per_cm3"), m.get("cost_per_race"),
+                 m.get("engine_damage"))
+                for m in database.materials + database.fuel_materials])
+            connection.executemany("INSERT INTO suppliers VALUES (?, ?, ?, ?, ?)", [
+                (s["id"], kind, s["name"], s.get("country"), s.get("pricemult", 1))
+                for kind, suppliers in (("parts", database.suppliers), ("fuel", database.fuel_suppliers))
+                for s in suppliers])
+            connection.executemany("INSERT OR IGNORE INTO offers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   list(iter_offers(database)))
+            connection.execute("ANALYZE")
+    finally:
+        connection.close()
+    os.replace(temp_path, path)
+
+
+def iter_offers(database):
+    """(supplier id, material id, component, cost, performance, durability, engine damage) rows."""
+    # Parts suppliers scale material stats (stat_changes are multipliers) and prices (pricemult)
+    for supplier in database.suppliers:
+        changes = supplier.get("stat_changes", {})
+        for material_id in supplier["materials"]:
+            material = database.material(material_id)
+            if material is None:
+                continue
+            yield (supplier["id"], material_id, material["component"],
+                   material["cost_per_cm3"] * supplier.get("pricemult", 1),
+                   material["performance"] * changes.get("performance", 1.0),
+                   material["durability"] * changes.get("durability", 1.0),
+                   None)
+    # Fuel suppliers add their stat_changes to the fuel's stats
+    for supplier in database.fuel_suppliers:
+        changes = supplier.get("stat_changes", {})
+        for material_id in supplier["materials"]:
+            material = database.material(material_id)
+            if material is None:
+                continue
+            yield (supplier["id"], material_id, material["component"],
+                   material["cost_per_race"] + changes.get("cost_per_race", 0.0),
+                   material["performance"] + changes.get("performance", 0.0),
+                   None,
+                   material["engine_damage"] + changes.get("engine_damage", 0.0))
+
+
+class DatabaseQueries:
+    """Query layer over the SQLite index. Results are records from the Database it was made for."""
+
+    def __init__(self, database, path=databasecachefile):
+        self.database = database
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = self.open()
+
+    def open(self):
+        fingerprint = source_fingerprint(self.database.directory)
+        if not self.is_current(fingerprint):
+            print(f"Building database index {self.path}")
+            build_index(self.database, self.path)
+        # Read-only; one connection shared by all threads behind a lock
+        return sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro", uri=True, check_same_thread=False)
+
+    def is_current(self, fingerprint):
+        if not os.path.exists(self.path):
+            return False
+        try:
+            connection = sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro", uri=True)
+            try:
+                row = connection.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+            finally:
+                connection.close()
+        except sqlite3.DatabaseError:
+            return False
+        return row is not None and row[0] == fingerprint
+
+    def close(self):
+        self.connection.close()
+
+    def rows(self, sql, parameters=()):
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    @staticmethod
+    def where(conditions):
+        """Build a WHERE clause from (sql, value) pairs, skipping those whose value is None."""
+        used = [(sql, value) for sql, value in conditions if value is not None]
+        clause = " AND ".join(sql for sql, _ in used)
+        return (f" WHERE {clause}" if clause else ""), [value for _, value in used]
+
+    def offers(self, component=None, max_cost=None, min_durability=None, min_performance=None,
+               max_engine_damage=None, order_by="cost", limit=None):
+        """Materials on sale, with the supplier's price and stat changes applied."""
+        where, parameters = self.where([
+            ("component = ?", component), ("cost <= ?", max_cost), ("durability >= ?", min_durability),
+            ("performance >= ?", min_performance), ("engine_damage <= ?", max_engine_damage),
+        ])
+        sql = (f"SELECT supplier_id, material_id, cost, performance, durability, engine_damage FROM offers{where}"
+               f" ORDER BY {OFFER_ORDER[order_by]}, supplier_id, material_id")
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return [
+            Offer(self.database.supplier(supplier_id), self.database.material(material_id),
+                  cost, performance, durability, engine_damage)
+            for supplier_id, material_id, cost, performance, durability, engine_damage in self.rows(sql, parameters)
+        ]
+
+    def suppliers_offering(self, component=None, max_cost=None, min_durability=None, min_performance=None):
+        """Suppliers selling at least one material that matches, e.g. under cost X with durability >= Y."""
+        where, parameters = self.where([
+            ("component = ?", component), ("cost <= ?", max_cost), ("durability >= ?", min_durability),
+            ("performance >= ?", min_performance),
+        ])
+        rows = self.rows(f"SELECT supplier_id, MIN(cost) FROM offers{where} GROUP BY supplier_id"
+                         f" ORDER BY MIN(cost), supplier_id", parameters)
+        return [self.database.supplier(supplier_id) for supplier_id, _ in rows]
+
+    def materials(self, component=None, max_cost_per_cm3=None, min_durability=None, min_performance=None):
+        """Catalogue materials (list prices, before any supplier changes)."""
+        where, parameters = self.where([
+            ("component = ?", component), ("cost_per_cm3 <= ?", max_cost_per_cm3),
+            ("durability >= ?", min_durability), ("performance >= ?", min_performance),
+        ])
+        rows = self.rows(f"SELECT id FROM materials{where} ORDER BY component, id", parameters)
+        return [self.database.material(material_id) for material_id, in rows]
+
+    def sponsors(self, min_reputation=None, min_payment_per_race=None, max_upfront_payment=None,
+                 pays_per_race=False, order_by="-payment_per_race"):
+        """Sponsors matching every given condition, e.g. reputation > 4 paying per race."""
+        where, parameters = self.where([
+            ("reputation > ?", min_reputation), ("payment_per_race >= ?", min_payment_per_race),
+            ("upfront_payment <= ?", max_upfront_payment),
+            ("payment_per_race > ?", 0 if pays_per_race else None),
+        ])
+        rows = self.rows(f"SELECT id FROM sponsors{where} ORDER BY {SPONSOR_ORDER[order_by]}, id", parameters)
+        return [self.database.sponsor(sponsor_id) for sponsor_id, in rows]
+
+    def drivers_by_stat(self, stat, minimum=None, limit=None):
+        """(driver, value) pairs for one driver stat, best first."""
+        where, parameters = self.where([("stat = ?", stat), ("value >= ?", minimum)])
+        sql = f"SELECT driver_id, value FROM driver_stats{where} ORDER BY value DESC, driver_id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return [(self.database.driver(driver_id), value) for driver_id, value in self.rows(sql, parameters)]
+
+    def team_of_driver(self, driver_id):
+        row = self.rows("SELECT team_id FROM team_drivers WHERE driver_id = ? LIMIT 1", (driver_id,))
+        return self.database.team(row[0][0]) if row else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the SQLite index of the game database")
+    parser.add_argument("--database", default=databasedir, help="database directory")
+    parser.add_argument("--output", default=databasecachefile)
+    args = parser.parse_args()
+
+    from database import Database
+    database = Database(args.database)
+    build_index(database, args.output)
+    connection = sqlite3.connect(args.output)
+    try:
+        for table in ("drivers", "teams", "sponsors", "materials", "suppliers", "offers"):
+            count, = connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+            print(f"{table:<10} {count:6d}")
+    finally:
+        connection.close()
+    print(f"Index written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# driver_model.py
+"""
+Turns the driver stats of drivers.json into a fixed set of numeric modifiers per car, compiled
+once when a session creates its cars. Car applies them as plain multiplications in its update
+loop, so driver skill costs nothing per frame.
+
+Each modifier is a weighted sum of stats, each measured in STAT_SPREAD points from that stat's mean
+over the drivers in the database, scaled linearly (around 1.0) or exponentially (for rates that
+should stay positive) and clamped. The modifiers average 1.0 over the grid, so driver skill
+separates the drivers without shifting the race balance. Drivers without stats get the neutral
+modifiers.
+"""
+
+import math
+import threading
+from typing import NamedTuple
+from database import get_database
+
+STAT_SPREAD = 10.0
+
+
+class DriverModifiers(NamedTuple):
+    tire_wear: float  # multiplies tire wear per frame
+    fuel: float  # multiplies fuel consumption
+    mistake_rate: float  # multiplies the chance of mistakes and crashes
+    overtake: float  # multiplies the chance an overtaking attempt succeeds
+    qualifying_pace: float  # multiplies the target speed in qualifying
+
+
+NEUTRAL_MODIFIERS = DriverModifiers(1.0, 1.0, 1.0, 1.0, 1.0)
+
+# modifier -> (curve, scale, stat weights, lower clamp, upper clamp)
+MODIFIER_FORMULAS = {
+    "tire_wear": ("linear", -0.04, {"Tire Management": 0.7, "Mechanical Sympathy": 0.3}, 0.85, 1.15),
+    "fuel": ("linear", -0.03, {"Fuel Management": 1.0}, 0.9, 1.1),
+    "mistake_rate": ("exp", -0.35, {"Consistency": 0.4, "Focus": 0.3, "Calmness": 0.3, "Aggression": -0.4},
+                     0.4, 2.5),
+    "overtake": ("exp", 0.25, {"Racecraft": 0.6, "Aggression": 0.4}, 0.5, 2.0),
+    "qualifying_pace": ("linear", 0.008, {"Qualifying Pace": 1.0}, 0.97, 1.03),
+}
+
+
+class GridCalibration(NamedTuple):
+    means: dict  # stat -> mean over the grid, the centre of each stat's scale
+    exp_norms: dict  # exponential modifier -> its unclamped mean over the grid
+
+
+grid_calibration = None
+grid_calibration_lock = threading.Lock()
+
+
+def skill_level(stats, weights, means):
+    """Weighted distance of a driver's stats from the grid means, in STAT_SPREAD units."""
+    return sum(weight * (stats.get(stat, means.get(stat, 0.0)) - means.get(stat, 0.0)) / STAT_SPREAD
+               for stat, weight in weights.items())
+
+
+def calibrate(drivers):
+    """
+    Centre every stat on its mean over the drivers, and scale the exponential modifiers so their
+    mean over the drivers is 1.0 (an exponential of centred stats averages above 1.0).
+    """
+    rated = [driver["stats"] for driver in drivers if driver.get("stats")]
+    totals, counts = {}, {}
+    for stats in rated:
+        for stat, value in stats.items():
+            totals[stat] = totals.get(stat, 0.0) + value
+            counts[stat] = counts.get(stat, 0) + 1
+    means = {stat: totals[stat] / counts[stat] for stat in totals}
+    exp_norms = {}
+    for name, (curve, scale, weights, _, _) in MODIFIER_FORMULAS.items():
+        if curve == "exp" and rated:
+            exp_norms[name] = sum(math.exp(scale * skill_level(stats, weights, means)) for stats in rated) / len(rated)
+    return GridCalibration(means, exp_norms)
+
+
+def get_grid_calibration():
+    """Calibration over every driver in the database, computed once per process."""
+    global grid_calibration
+    if grid_calibration is None:
+        with grid_calibration_lock:
+            if grid_calibration is None:
+                grid_calibration = calibrate(get_database().drivers)
+    return grid_calibration
+
+
+def compile_driver(stats, calibration=None):
+    """
+    DriverModifiers for a driver's stats mapping (stat name -> 0..100).
+    calibration: GridCalibration to score the stats against (default: the database's drivers)
+    """
+    if not stats:
+        return NEUTRAL_MODIFIERS
+    if calibration is None:
+        calibration = get_grid_calibration()
+    values = []
+    for name in DriverModifiers._fields:
+        curve, scale, weights, low, high = MODIFIER_FORMULAS[name]
+        skill = skill_level(stats, weights, calibration.means)
+        if curve == "linear":
+            value = 1.0 + scale * skill
+        else:
+            value = math.exp(scale * skill) / calibration.exp_norms.get(name, 1.0)
+        values.append(min(max(value, low), high))
+    return DriverModifiers(*values)
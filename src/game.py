@@ -1,12 +1,16 @@
+import atexit
 import pyxel
-from pyxelunicode import PyxelUnicode
-from constants import CURRENT_VER
+from pyxelunicode import get_font, prewarm, set_cache_dir
+from constants import CURRENT_VER, savesdir, fontcachedir
 from title_screen import TitleScreen
 from menu import MainMenu
 from race import Race
 from qualifying import Qualifying
 from choose_team import ChooseTeam
+from snapshot import read_snapshot, restore_race
+from career import Career
 from pathlib import Path
+import os
 
 class Game:
     def __init__(self):
@@ -14,17 +18,26 @@ class Game:
         self.state = 'title_screen'
         self.font_path = Path(__file__).resolve().parent.parent / "fonts" / "PublicPixel.ttf"
         self.font_size = 8
-        self.pyuni = PyxelUnicode(str(self.font_path), self.font_size)
+        # Fonts are shared process-wide and their glyph tables are cached on disk between launches.
+        set_cache_dir(fontcachedir)
+        self.pyuni = get_font(str(self.font_path), self.font_size)
         self.title_screen = TitleScreen(self)
         self.main_menu = MainMenu(self)
         self.qualifying = None
         self.race = None
+        self.career = None
         self.choose_team_screen = ChooseTeam(self)  # This is now a ChooseTeam instance
+        prewarm([self.pyuni, self.title_screen.pyunititle])
         pyxel.mouse(visible=True)
         pyxel.images[0].load(0, 0, r"../assets/car.png")
+        # Closing the window exits without going through quit()
+        atexit.register(self.close_sessions)
         pyxel.run(self.update, self.draw)
 
     def update(self):
+        # The writer thread has printed the details; tell the player in the race, where careers are saved
+        if self.career and self.career.save_failures() and self.race:
+            self.race.announcements.add_message("Career save failed!", duration=90)
         if self.state == 'title_screen':
             self.title_screen.update()
         elif self.state == 'main_menu':
@@ -52,13 +65,72 @@ class Game:
         for n in range(16):
             pyxel.rect(6 * n, pyxel.height - 10, 6, 6, n)
 
+    def close_sessions(self):
+        """Close the running qualifying and race sessions before they are replaced or the game exits."""
+        for session in (self.qualifying, self.race):
+            if session:
+                session.close()
+
     def start_qualifying(self):
+        self.close_sessions()
         self.qualifying = Qualifying(self)
         self.state = 'qualifying'
 
     def start_race(self, starting_grid=None):
+        self.close_sessions()
+        self.race = Race(self, starting_grid)
+        self.state = 'race'
+
+    def load_race(self, path=None):
+        """Resume a race saved mid-race with S. Returns False if there is no save for the active track."""
+        path = path or os.path.join(savesdir, "race.sav")
+        if not os.path.exists(path):
+            print(f"No saved race found at {path}")
+            return False
+        with open(path, "rb") as file:
+            blob = file.read()
+        try:
+            starting_grid = read_snapshot(blob)["race"]["starting_grid"]
+        except ValueError as e:
+            print(f"Cannot load {path}: {e}")
+            return False
+        self.close_sessions()
         self.race = Race(self, starting_grid)
+        restore_race(self.race, blob)
         self.state = 'race'
+        return True
+
+    def start_career(self, team):
+        """Start a new career with the chosen team record."""
+        if self.career:
+            self.career.close()
+        self.career = Career.create(team)
+
+    def load_career(self):
+        """
+        Continue the saved career, resuming the race saved mid-race if there is one.
+        Without a career this only tries the race save. Returns False if there is nothing to load.
+        """
+        # Flush the running career first so the load sees all of its events and the new writer
+        # does not reopen the journal while the old one is still appending to it
+        if self.career:
+            self.career.close()
+            self.career = None
+        career = Career.load()
+        if career is None:
+            print("No saved career found.")
+            return self.load_race()
+        self.career = career
+        if not self.load_race():
+            self.start_qualifying()
+        return True
+
+    def quit(self):
+        self.close_sessions()
+        if self.career:
+            self.career.close()
+        pyxel.quit()
 
     def start_choose_team(self):  # This is the method to call for choosing a team
+        self.close_sessions()
         self.state = "choose_team"
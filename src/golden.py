@@ -0,0 +1,105 @@
+# golden.py
+"""
+Golden-result regression check for the race engine. Runs a fixed set of seeded headless
+scenarios and compares the per-lap state hashes with the stored golden hashes, so engine
+optimizations can be checked for unintended behaviour changes.
+
+Usage (from the src directory):
+    python golden.py            # check against golden_hashes.json
+    python golden.py --update   # accept the current behaviour as the new golden hashes
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import random
+import sys
+from pathlib import Path
+from qualifying import Qualifying
+from race import Race
+from monte_carlo import init_worker, load_car_numbers
+from season import activate_track
+
+GOLDEN_FILE = Path(__file__).resolve().parent / "golden_hashes.json"
+
+# Reference scenarios. Changing one invalidates its golden hash; run with --update afterwards.
+SCENARIOS = [
+    {"name": "track_sprint", "track": "../tracks/track.json", "laps": 3, "seed": 1},
+    {"name": "track3_sprint", "track": "../tracks/track3.json", "laps": 3, "seed": 2},
+    {"name": "track_qualifying", "track": "../tracks/track.json", "laps": 2, "seed": 3, "qualifying_minutes": 2},
+    {"name": "track_full_distance", "track": "../tracks/track.json", "laps": 10, "seed": 4},
+]
+
+
+def run_scenario(scenario):
+    """Run one scenario headless and return its hashes. Executed inside a worker process."""
+    activate_track(scenario["track"])
+    starting_grid = load_car_numbers()
+    qualifying_minutes = scenario.get("qualifying_minutes")
+    if qualifying_minutes:
+        random.seed(scenario["seed"])
+        starting_grid = Qualifying(None, headless=True, session_minutes=qualifying_minutes).run_headless()
+    race = Race(None, starting_grid, headless=True, laps=scenario["laps"], seed=scenario["seed"])
+    frames = race.run_headless()
+    return {
+        "hash": race.state_hash(),
+        "frames": frames,
+        "laps": race.lap_hasher.lap_digests,
+    }
+
+
+def run_scenarios(scenarios, workers=None):
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        return dict(zip((scenario["name"] for scenario in scenarios), pool.map(run_scenario, scenarios)))
+
+
+def load_golden(path=GOLDEN_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_golden(results, path=GOLDEN_FILE):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+
+def compare(name, result, expected):
+    """Return a description of the difference, or None if the result matches."""
+    if expected is None:
+        return "no golden hash stored"
+    if result["hash"] == expected["hash"]:
+        return None
+    for lap, (digest, expected_digest) in enumerate(zip(result["laps"], expected["laps"]), start=1):
+        if digest != expected_digest:
+            return f"diverges on lap {lap}"
+    return f"{len(result['laps'])} laps hashed, expected {len(expected['laps'])} (frames {result['frames']} vs {expected['frames']})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden-result regression check for the race engine")
+    parser.add_argument("--update", action="store_true", help="store the current results as the golden hashes")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    results = run_scenarios(SCENARIOS, workers=args.workers)
+    if args.update:
+        save_golden(results)
+        print(f"Stored {len(results)} golden hashes in {GOLDEN_FILE.name}")
+        return
+
+    golden = load_golden()
+    failures = 0
+    for name, result in results.items():
+        problem = compare(name, result, golden.get(name))
+        if problem:
+            failures += 1
+        print(f"{name:<22} {result['hash'][:16]} {'FAIL: ' + problem if problem else 'ok'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# leaderboard.py
+
+import pyxel
+
+ROW_HEIGHT = 20  # two 10 pixel lines per racer
+
+
+class Leaderboard:
+    """
+    Retained-mode leaderboard. Every visible row keeps its rendered text in its own off-screen
+    image and is only re-rasterized when its text or colour changes, so drawing the leaderboard
+    is one blt per row.
+
+    Row texts are rebuilt when the car in a row changes and otherwise at most every
+    `refresh_frames` frames, which throttles the fast-changing numeric fields.
+    """
+
+    def __init__(self, pyuni, x=20, y=20, rows=8, width=480, refresh_frames=10, title="Leaderboard:"):
+        self.pyuni = pyuni
+        self.x = x
+        self.y = y
+        self.width = width
+        self.refresh_frames = refresh_frames
+        self.title = pyxel.Image(width, 10)
+        self.pyuni.text(0, 0, title, 1, image=self.title)
+        self.images = [pyxel.Image(width, ROW_HEIGHT) for _ in range(rows)]
+        self.keys = [None] * rows  # (line1, line2, color) currently rendered in each row image
+        self.cars = [None] * rows  # car number shown in each row
+        self.refresh_frame = [0] * rows
+
+    def draw(self, entries, format_row):
+        """
+        Draw the leaderboard rows.
+        entries: (position index, car) for each visible row, top first
+        format_row: callable(position index, car) -> (line1, line2), only called when the row is refreshed
+        """
+        pyxel.blt(self.x, self.y, self.title, 0, 0, self.width, 10, 0)
+        frame = pyxel.frame_count
+        for row, (index, car) in enumerate(entries[:len(self.images)]):
+            if self.cars[row] != car.car_number or frame - self.refresh_frame[row] >= self.refresh_frames:
+                self.cars[row] = car.car_number
+                self.refresh_frame[row] = frame
+                line1, line2 = format_row(index, car)
+                key = (line1, line2, car.color)
+                if key != self.keys[row]:
+                    self.render_row(row, key)
+            pyxel.blt(self.x, self.y + 20 + row * ROW_HEIGHT, self.images[row], 0, 0, self.width, ROW_HEIGHT, 0)
+
+    def render_row(self, row, key):
+        line1, line2, color = key
+        image = self.images[row]
+        image.cls(0)
+        self.pyuni.text(0, 0, line1, color, image=image)
+        self.pyuni.text(0, 10, line2, color, image=image)
+        self.keys[row] = key
@@ -1,6 +1,12 @@
 import json
 from constants import teamsfile
+from database import get_database, thaw
+
+
 def load_teams(filename=teamsfile):
+    """Mutable team data. The default teams file comes from the shared database, parsed only once."""
+    if filename == teamsfile:
+        return thaw(get_database().teams)
     with open(filename, 'r') as file:
         teams_data = json.load(file)
-    return teams_data
\ No newline at end of file
+    return teams_data
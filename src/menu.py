@@ -24,13 +24,13 @@ class MainMenu:
         if selected_item == "Start Career":
             self.game.start_choose_team()
         elif selected_item == "Load Career":
-            # Implement load functionality if desired
-            pass
+            # Continue the saved career (and the race saved mid-session, if there is one)
+            self.game.load_career()
         elif selected_item == "About":
             # Show about information
             pass
         elif selected_item == "Exit":
-            pyxel.quit()
+            self.game.quit()
 
     def draw(self):
         pyxel.cls(0)
@@ -0,0 +1,192 @@
+# monte_carlo.py
+"""
+Batch engine that runs many headless races from the same starting grid with different seeds
+and aggregates win, podium and DNF probabilities.
+
+Usage (from the src directory):
+    python monte_carlo.py --runs 1000 --laps 50
+"""
+
+import argparse
+import concurrent.futures
+import os
+import sys
+from dataclasses import dataclass, field
+import numpy as np
+from constants import MAX_LAPS
+from database import get_database
+# Importing race pulls in track.py, which compiles the track once per process.
+# Worker processes keep that module state for every job they run.
+from race import Race
+
+
+@dataclass
+class RaceOutcome:
+    """Result of one headless race, small enough to stream back from a worker."""
+    seed: int
+    finishing_order: list  # car numbers of the classified cars, winner first
+    dnfs: list  # car numbers of cars that crashed or ran out of fuel
+    pit_stops: dict  # car number -> number of pit stops
+    safety_car_deployments: int
+    frames: int
+    finished: bool = True  # False when the race hit the frame cap before any car took the flag
+
+
+@dataclass
+class MonteCarloSummary:
+    """Running aggregate over all received race outcomes."""
+    car_numbers: list
+    races: int = 0
+    no_finish_races: int = 0  # races stopped at the frame cap; they count towards no position
+    position_counts: np.ndarray = field(init=False)  # [car, finishing position]
+    dnf_counts: np.ndarray = field(init=False)
+    pit_stop_totals: np.ndarray = field(init=False)
+    safety_car_histogram: dict = field(default_factory=dict)  # deployments per race -> races
+
+    def __post_init__(self):
+        num_cars = len(self.car_numbers)
+        self.rows = {number: row for row, number in enumerate(self.car_numbers)}
+        self.position_counts = np.zeros((num_cars, num_cars), dtype=np.int64)
+        self.dnf_counts = np.zeros(num_cars, dtype=np.int64)
+        self.pit_stop_totals = np.zeros(num_cars, dtype=np.int64)
+
+    def add(self, outcome):
+        self.races += 1
+        if not outcome.finished:
+            self.no_finish_races += 1
+        for position, number in enumerate(outcome.finishing_order):
+            self.position_counts[self.rows[number], position] += 1
+        for number in outcome.dnfs:
+            self.dnf_counts[self.rows[number]] += 1
+        for number, stops in outcome.pit_stops.items():
+            self.pit_stop_totals[self.rows[number]] += stops
+        deployments = outcome.safety_car_deployments
+        self.safety_car_histogram[deployments] = self.safety_car_histogram.get(deployments, 0) + 1
+
+    def win_probability(self):
+        return self.position_counts[:, 0] / max(self.races, 1)
+
+    def podium_probability(self):
+        return self.position_counts[:, :3].sum(axis=1) / max(self.races, 1)
+
+    def dnf_probability(self):
+        return self.dnf_counts / max(self.races, 1)
+
+    def average_pit_stops(self):
+        return self.pit_stop_totals / max(self.races, 1)
+
+    def position_distribution(self):
+        """Probability of each car finishing in each position."""
+        return self.position_counts / max(self.races, 1)
+
+    def no_finish_probability(self):
+        """Share of races that were stopped at the frame cap without a winner."""
+        return self.no_finish_races / max(self.races, 1)
+
+    def safety_car_frequency(self):
+        """Share of races with at least one safety car."""
+        without = self.safety_car_histogram.get(0, 0)
+        return (self.races - without) / max(self.races, 1)
+
+
+def init_worker():
+    # The race engine prints a lot of debug output; keep the workers quiet.
+    sys.stdout = open(os.devnull, "w")
+
+
+def run_race(starting_grid, seed, laps):
+    """Run one headless race with the given seed. Executed inside a worker process."""
+    race = Race(None, starting_grid, headless=True, laps=laps, seed=seed)
+    frames = race.run_headless(max_frames=race.headless_frame_limit())
+    # A race stopped at the cap has no classification; every car still running simply did not finish
+    classified = [car for car in race.cars if car.is_active and not car.crashed] if race.race_finished else []
+    return RaceOutcome(
+        seed=seed,
+        finishing_order=[car.car_number for car in classified],
+        dnfs=[car.car_number for car in race.cars if car.crashed or not car.is_active],
+        pit_stops={car.car_number: car.pit_stops for car in race.cars},
+        safety_car_deployments=race.safety_car_deployments,
+        frames=frames,
+        finished=race.race_finished,
+    )
+
+
+class MonteCarloEngine:
+    def __init__(self, starting_grid, runs=1000, laps=MAX_LAPS, workers=None, base_seed=0):
+        self.starting_grid = list(starting_grid)
+        self.runs = runs
+        self.laps = laps
+        self.workers = workers or os.cpu_count()
+        self.base_seed = base_seed
+
+    def iter_outcomes(self):
+        """Yield race outcomes as soon as the workers finish them (in completion order)."""
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker) as pool:
+            futures = [
+                pool.submit(run_race, self.starting_grid, self.base_seed + run, self.laps)
+                for run in range(self.runs)
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+
+    def run(self, on_outcome=None):
+        """Run every race and return the aggregated MonteCarloSummary."""
+        # Cars missing from the grid still race (from the back), so they get a row too.
+        car_numbers = self.starting_grid + [number for number in load_car_numbers() if number not in self.starting_grid]
+        summary = MonteCarloSummary(car_numbers)
+        for outcome in self.iter_outcomes():
+            summary.add(outcome)
+            if on_outcome:
+                on_outcome(outcome, summary)
+        return summary
+
+
+def load_driver_names():
+    """Map car number to driver name."""
+    return {driver["number"]: driver["name"] for driver in get_database().drivers}
+
+
+def load_car_numbers():
+    """Car numbers of every contracted driver, in team order."""
+    database = get_database()
+    return [driver["number"] for team in database.teams for driver in database.team_drivers(team)]
+
+
+def print_summary(summary, driver_names):
+    print(f"{'Car':>4} {'Driver':<22} {'Win%':>6} {'Podium%':>8} {'DNF%':>6} {'Pits':>5}")
+    win = summary.win_probability()
+    podium = summary.podium_probability()
+    dnf = summary.dnf_probability()
+    pits = summary.average_pit_stops()
+    for row in np.argsort(-win, kind="stable"):
+        number = summary.car_numbers[row]
+        print(f"{number:>4} {driver_names.get(number, '?'):<22} {win[row] * 100:6.1f} "
+              f"{podium[row] * 100:8.1f} {dnf[row] * 100:6.1f} {pits[row]:5.2f}")
+    print(f"Safety car in {summary.safety_car_frequency() * 100:.1f}% of {summary.races} races")
+    if summary.no_finish_races:
+        print(f"No finisher in {summary.no_finish_probability() * 100:.1f}% of races (stopped at the frame cap)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo race outcome engine")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--laps", type=int, default=MAX_LAPS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first race; race n uses seed + n")
+    parser.add_argument("--grid", type=int, nargs="*", help="starting grid as car numbers, pole first")
+    args = parser.parse_args()
+
+    grid = args.grid or load_car_numbers()
+    engine = MonteCarloEngine(grid, runs=args.runs, laps=args.laps, workers=args.workers, base_seed=args.seed)
+
+    def progress(outcome, summary):
+        if summary.races % 10 == 0 or summary.races == engine.runs:
+            print(f"{summary.races}/{engine.runs} races", end="\r", flush=True)
+
+    summary = engine.run(on_outcome=progress)
+    print()
+    print_summary(summary, load_driver_names())
+
+
+if __name__ == "__main__":
+    main()
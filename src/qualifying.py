@@ -2,32 +2,27 @@ import pyxel
 import json
 import random
 from car import Car
-from track import (
-    PIT_LANE_TOTAL_LENGTH,
-    PITLANE_ENTRANCE_DISTANCE,
-    TOTAL_TRACK_LENGTH,
-    TRACK_POINTS,
-    START_FINISH_INDEX_SMOOTHED,
-    PIT_LANE_POINTS,
-    CUMULATIVE_DISTANCES,
-    PIT_LANE_CUMULATIVE_DISTANCES,
-    PIT_STOP_POINT,
-    get_position_along_track
-)
-from constants import CURRENT_VER, QUALIFYING_TIME, TIRE_TYPES
-from load_teams import load_teams  # Ensure this function is correctly imported
+import track
+from track import get_position_along_track
+from constants import CURRENT_VER, QUALIFYING_TIME, TIRE_TYPES, ENABLE_TELEMETRY, TELEMETRY_PER_TICK, telemetrydir
+from database import get_database
+from driver_model import compile_driver
 from announcements import Announcements
+from telemetry import TelemetryWriter, session_name
+from track_layer import TrackLayer
 
 
 class Qualifying:
-    def __init__(self, game):
+    def __init__(self, game, headless=False, session_minutes=QUALIFYING_TIME):
         self.game = game
-        self.pyuni = self.game.pyuni
-        self.session_time = QUALIFYING_TIME * 60 * 30  # Assuming QUALIFYING_TIME is in minutes
+        # Headless sessions (batch simulations) never touch pyxel palette or drawing.
+        self.headless = headless
+        self.pyuni = None if headless else self.game.pyuni
+        self.session_time = session_minutes * 60 * 30  # session_minutes is in minutes
         self.elapsed_time = 0
         self.cars = []
         self.drivers_map = self.load_drivers()
-        self.teams_data = load_teams()
+        self.teams_data = get_database().session_teams()
         self.announcements = Announcements(self.pyuni)
 
         self.assign_team_pitboxes()
@@ -35,18 +30,19 @@ class Qualifying:
         self.create_cars()
         self.session_over = False
         self.starting_grid = []
+        self.track_layer = None if headless else TrackLayer()
+        self.telemetry = TelemetryWriter(telemetrydir, session_name("qualifying"),
+                                         per_tick=TELEMETRY_PER_TICK) if ENABLE_TELEMETRY else None
 
-        # Set some default Pyxel colors
-        pyxel.colors[0] = 0x000000  # Black
-        pyxel.colors[1] = 0xFFFFFF  # White
+        if not headless:
+            # Set some default Pyxel colors
+            pyxel.colors[0] = 0x000000  # Black
+            pyxel.colors[1] = 0xFFFFFF  # White
 
     def load_drivers(self):
-        """Load driver data from JSON file and create a mapping from driver_id to driver data."""
+        """Mapping from driver_id to the shared, read-only driver record."""
         try:
-            with open("../database/drivers/drivers.json", "r") as f:
-                drivers = json.load(f)
-            drivers_map = {driver["id"]: driver for driver in drivers}
-            return drivers_map
+            return get_database().drivers_by_id
         except FileNotFoundError:
             print("Error: drivers.json file not found.")
             return {}
@@ -67,10 +63,10 @@ class Qualifying:
         # For each team, evenly space its pitbox along the pitlane.
         for i, team in enumerate(self.teams_data):
             # Calculate a distance along the pitlane for the pitbox.
-            pit_distance = PIT_LANE_TOTAL_LENGTH * (i + 1) / (num_teams + 1)
+            pit_distance = track.current.pit_lane_total_length * (i + 1) / (num_teams + 1)
             # Convert that distance to (x, y) coordinates on the pitlane.
             pit_x, pit_y = get_position_along_track(
-                pit_distance, PIT_LANE_POINTS, PIT_LANE_CUMULATIVE_DISTANCES
+                pit_distance, track.current.pit_lane_points, track.current.pit_lane_cumulative_distances
             )
             # Store the pitbox info with the team.
             team["pitbox_distance"] = pit_distance
@@ -80,6 +76,10 @@ class Qualifying:
         """Create Car objects based on teams and their drivers."""
         # Assign unique palette indices to each team starting from 2.
         for i, team in enumerate(self.teams_data, start=2):
+            # Also store the palette index for the team.
+            team["color_index"] = i
+            if self.headless:
+                continue
             try:
                 # Convert the hex color to an integer—but don't use this value directly for drawing.
                 # Instead, we update the Pyxel palette at index 'i'.
@@ -89,8 +89,6 @@ class Qualifying:
                 color_value = 0xFFFFFF  # Default to white if color parsing fails
 
             pyxel.colors[i] = color_value
-            # Also store the palette index for the team.
-            team["color_index"] = i
 
         # Create a car for each driver, passing the team’s pitbox coordinates along.
         for team_index, team in enumerate(self.teams_data):
@@ -113,9 +111,11 @@ class Qualifying:
                         game=self.game,
                         mode='qualifying',
                         pitbox_coords=team.get("pitbox_coords"),
-                        pitbox_distance=pit_dist
+                        pitbox_distance=pit_dist,
+                        modifiers=compile_driver(driver_data.get("stats"))
                     )
                     car.qualifying_exit_delay = random.randint(0, 60 * 30 * 3)
+                    car.session = self
                     self.cars.append(car)
                 else:
                     print(f"Warning: Driver ID {driver_id} not found in drivers.json")
@@ -125,15 +125,31 @@ class Qualifying:
             self.elapsed_time += 1
             if self.elapsed_time >= self.session_time:
                 self.session_over = True
+                if self.telemetry:
+                    self.telemetry.close()
                 self.calculate_starting_grid()
-                self.game.start_race(self.starting_grid)
+                if not self.headless:
+                    self.game.start_race(self.starting_grid)
             else:
                 for car in self.cars:
                     car.update_qualifying(self.cars)
+                if self.telemetry:
+                    self.telemetry.record(self.elapsed_time, self.cars)
             self.announcements.update()
         else:
             pass  # Session is over; no further updates needed
 
+    def close(self):
+        """Flush and stop the session's background writers. Called whenever the session is left."""
+        if self.telemetry:
+            self.telemetry.close()
+
+    def run_headless(self):
+        """Run the whole session without rendering and return the starting grid."""
+        while not self.session_over:
+            self.update()
+        return self.starting_grid
+
     def drawbox(self, x_box, y_box, width, height, radius, border_thickness):
         """Draws a rounded box with a white border and black inner box."""
         # Draw white border
@@ -164,51 +180,11 @@ class Qualifying:
         pyxel.circ(inner_x + inner_width - inner_radius - 1, inner_y + inner_height - inner_radius - 1,
                    inner_radius, 0)
 
-    def draw_pitboxes(self):
-        """
-        Draws a custom pitbox for each team at its assigned location.
-        The pitbox is drawn as a filled square using the team's palette index
-        (which refers to the proper color in Pyxel's palette) with the team name below.
-        """
-        pitbox_size = 10  # Adjust the size as needed
-        for team in self.teams_data:
-            pit_x, pit_y = team["pitbox_coords"]
-            # Center the pitbox on the (x, y) coordinate.
-            top_left_x = pit_x - pitbox_size // 2
-            top_left_y = pit_y - pitbox_size // 2
-
-            # Use the team's palette index for drawing.
-            team_color = team.get("color_index", 1)
-            pyxel.rect(top_left_x, top_left_y, pitbox_size//2, pitbox_size//2, team_color)
-            pyxel.rectb(top_left_x, top_left_y, pitbox_size//2, pitbox_size//2, 1)
-
-
     def draw(self):
         pyxel.cls(0)  # Clear screen with black background
 
-        # Draw the track.
-        for i in range(len(TRACK_POINTS) - 1):
-            x1, y1 = TRACK_POINTS[i]
-            x2, y2 = TRACK_POINTS[i + 1]
-            pyxel.line(x1, y1, x2, y2, 1)
-
-        # Draw start/finish line.
-        sx, sy = TRACK_POINTS[START_FINISH_INDEX_SMOOTHED]
-        sx_next, sy_next = TRACK_POINTS[(START_FINISH_INDEX_SMOOTHED + 1) % len(TRACK_POINTS)]
-        pyxel.line(sx, sy, sx_next, sy_next, 2)
-
-        # Draw pit lane.
-        if PIT_LANE_POINTS:
-            for i in range(len(PIT_LANE_POINTS) - 1):
-                x1, y1 = PIT_LANE_POINTS[i]
-                x2, y2 = PIT_LANE_POINTS[i + 1]
-                pyxel.line(x1, y1, x2, y2, 13)
-            pitstop_x, pitstop_y = get_position_along_track(
-                PIT_STOP_POINT, PIT_LANE_POINTS, PIT_LANE_CUMULATIVE_DISTANCES
-            )
-
-        # Draw custom pitboxes for each team.
-        self.draw_pitboxes()
+        # Draw the static track, pit lane and pitboxes in one blit.
+        self.track_layer.draw(self.teams_data)
 
         # Draw all cars.
         hover_info = None  # Only track one hovered car.
@@ -219,9 +195,9 @@ class Qualifying:
             # Get car position.
             if car.on_pitlane:
                 # Note: Ensure that car.pitlane_distance is maintained by the Car class.
-                x, y = get_position_along_track(car.pitlane_distance, PIT_LANE_POINTS, PIT_LANE_CUMULATIVE_DISTANCES)
+                x, y = get_position_along_track(car.pitlane_distance, track.current.pit_lane_points, track.current.pit_lane_cumulative_distances)
             else:
-                x, y = get_position_along_track(car.distance, TRACK_POINTS, CUMULATIVE_DISTANCES)
+                x, y = get_position_along_track(car.distance, track.current.track_points, track.current.cumulative_distances)
 
             # Draw the car.
             pyxel.circ(x, y, 3, car.color)
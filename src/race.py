@@ -3,21 +3,35 @@
 import pyxel
 import random
 from car import Car
-from track import (
-    TRACK_POINTS, START_FINISH_INDEX_SMOOTHED, PIT_LANE_POINTS,
-    TOTAL_TRACK_LENGTH, PIT_LANE_TOTAL_LENGTH, PITLANE_ENTRANCE_DISTANCE,
-    PITLANE_EXIT_DISTANCE, get_position_along_track, PIT_STOP_POINT, PIT_LANE_CUMULATIVE_DISTANCES, CUMULATIVE_DISTANCES
-)
+import track
+from track import get_position_along_track
 from constants import *
 from announcements import Announcements
-from load_teams import load_teams
+from database import get_database
+from driver_model import compile_driver
+from timing import TimingLines
+from replay import ReplayRecorder, ReplayPlayer, FLAG_ACTIVE
+from snapshot import RewindBuffer, snapshot_race
+from telemetry import TelemetryWriter, session_name
+from track_layer import TrackLayer
+from leaderboard import Leaderboard
+from state_hash import LapStateHasher
 import json
+import os
+import time
 
 class Race:
-    def __init__(self, game, starting_grid):
+    def __init__(self, game, starting_grid, headless=False, laps=MAX_LAPS, telemetry=ENABLE_TELEMETRY, seed=None):
+        # A seed makes the race deterministic: the RNG is reset before the cars are created and
+        # nothing in the simulation reads the wall clock.
+        if seed is not None:
+            random.seed(seed)
         self.starting_grid = starting_grid
         self.game = game
-        self.pyuni = self.game.pyuni
+        # Headless races (batch simulations) never touch pyxel input, palette or drawing.
+        self.headless = headless
+        self.max_laps = laps
+        self.pyuni = None if headless else self.game.pyuni
         self.frame_count = 0
         self.countdown = 90
         self.race_started = False
@@ -28,24 +42,34 @@ class Race:
         self.safety_car = None
         self.safety_car_laps_started = False
         self.safety_car_ending_announced = False
+        self.safety_car_deployments = 0
         self.leaderboard_scroll_index = 0
         self.announcements = Announcements(self.pyuni)
         self.cars = []
         self.state = 'warmup_lap' if ENABLE_WARMUP_LAP else 'countdown'
         self.drivers_map = self.load_drivers()  # Load drivers data
-        self.teams_data = load_teams()  # Load teams data
+        self.teams_data = get_database().session_teams()  # Copies, pitboxes are added to them
 
         self.assign_team_pitboxes()
 
         self.create_cars()
+        self.timing = TimingLines(self.cars, laps=self.max_laps)
+        self.recorder = ReplayRecorder(self.cars) if RECORD_REPLAY and not headless else None
+        self.replay = None
+        self.replay_tick = 0
+        self.replay_slots = {}
+        self.rewind_buffer = None if headless else RewindBuffer(interval=30, capacity=REWIND_SECONDS * 2)
+        self.telemetry_session = session_name("race")
+        self.telemetry_restarts = 0
+        self.telemetry = TelemetryWriter(telemetrydir, self.telemetry_session, per_tick=TELEMETRY_PER_TICK) if telemetry else None
+        self.lap_hasher = LapStateHasher() if headless else None
+        self.track_layer = None if headless else TrackLayer()
+        self.leaderboard = None  # created on first draw, once pyxel is initialised
 
     def load_drivers(self):
-        """Load driver data from JSON file and create a mapping from driver_id to driver data."""
+        """Mapping from driver_id to the shared, read-only driver record."""
         try:
-            with open("../database/drivers/drivers.json", "r") as f:
-                drivers = json.load(f)
-            drivers_map = {driver["id"]: driver for driver in drivers}
-            return drivers_map
+            return get_database().drivers_by_id
         except FileNotFoundError:
             print("Error: drivers.json file not found.")
             return {}
@@ -57,6 +81,10 @@ class Race:
         """Create Car objects based on teams and their drivers."""
         # Assign unique color indexes starting from 2 to avoid overriding existing Pyxel colors
         for i, team in enumerate(self.teams_data, start=2):
+            # Also store the palette index for the team.
+            team["color_index"] = i
+            if self.headless:
+                continue
             try:
                 # Set Pyxel colors based on team data
                 color_value = int(team["color"], 16)
@@ -65,8 +93,6 @@ class Race:
                 pyxel.colors[i] = 0xFFFFFF  # Default to white if color parsing fails
 
             pyxel.colors[i] = color_value
-            # Also store the palette index for the team.
-            team["color_index"] = i
 
         # Initialize cars using team data
         for team_index, team in enumerate(self.teams_data):
@@ -90,9 +116,11 @@ class Race:
                         game=self.game,
                         mode='race',
                         pitbox_coords=team.get("pitbox_coords"),
-                        pitbox_distance=pit_dist
+                        pitbox_distance=pit_dist,
+                        modifiers=compile_driver(driver_data.get("stats"))
                     )
                     car.qualifying_exit_delay = random.randint(0, 60 * 30 * 3)
+                    car.predictions_enabled = not self.headless
                     self.cars.append(car)
                 else:
                     print(f"Warning: Driver ID {driver_id} not found in drivers.json")
@@ -125,10 +153,10 @@ class Race:
         # For each team, evenly space its pitbox along the pitlane.
         for i, team in enumerate(self.teams_data):
             # Calculate a distance along the pitlane for the pitbox.
-            pit_distance = PIT_LANE_TOTAL_LENGTH * (i + 1) / (num_teams + 1)
+            pit_distance = track.current.pit_lane_total_length * (i + 1) / (num_teams + 1)
             # Convert that distance to (x, y) coordinates on the pitlane.
             pit_x, pit_y = get_position_along_track(
-                pit_distance, PIT_LANE_POINTS, PIT_LANE_CUMULATIVE_DISTANCES
+                pit_distance, track.current.pit_lane_points, track.current.pit_lane_cumulative_distances
             )
             # Store the pitbox info with the team.
             team["pitbox_distance"] = pit_distance
@@ -145,13 +173,14 @@ class Race:
             announcements=self.announcements,
             game=self.game,
             mode='race',
-            pitbox_coords=PIT_STOP_POINT,
-            pitbox_distance=PITLANE_EXIT_DISTANCE
+            pitbox_coords=track.current.pit_stop_point,
+            pitbox_distance=track.current.pitlane_exit_distance
         )
 
         self.safety_car.is_safety_car = True
+        self.safety_car.predictions_enabled = False
         self.safety_car.speed = SAFETY_CAR_SPEED
-        self.safety_car.distance = PITLANE_EXIT_DISTANCE
+        self.safety_car.distance = track.current.pitlane_exit_distance
 
     def update(self):
         self.frame_count += 1
@@ -161,6 +190,12 @@ class Race:
             self.update_countdown()
         elif self.state == 'race':
             self.update_race_logic()
+            if not self.headless:
+                self.update_save_points()
+            if self.race_finished and self.recorder and pyxel.btnp(pyxel.KEY_R):
+                self.start_replay()
+        elif self.state == 'replay':
+            self.update_replay()
         self.announcements.update()
 
     def update_warmup_lap(self):
@@ -184,7 +219,7 @@ class Race:
         leader_distance = self.cars[0].distance
         average_speed = sum(car.base_max_speed for car in self.cars) / len(self.cars)
         for car in self.cars:
-            distance_diff = (leader_distance - car.distance) % TOTAL_TRACK_LENGTH
+            distance_diff = (leader_distance - car.distance) % track.current.total_track_length
             car.initial_time_offset = distance_diff / average_speed
         self.announcements.add_message("Go!", duration=60)
 
@@ -195,25 +230,10 @@ class Race:
                 for car in self.cars:
                     if car.crashed:
                         if random.random() < SAFETY_CAR_DEPLOY_CHANCE:
-                            # Sort cars before safety car deployment
-                            self.cars.sort(
-                                key=lambda car: (-car.laps_completed, -car.adjusted_distance)
-                            )
-                            self.safety_car_active = True
-                            self.safety_car_triggered = True
-                            self.announcements.add_message(
-                                "Safety Car Deployed!", duration=90)
-                            self.create_safety_car()
+                            self.deploy_safety_car()
                             break
-                if pyxel.btnp(pyxel.KEY_P):
-                    # Sort cars before safety car deployment
-                    self.cars.sort(
-                        key=lambda car: (-car.laps_completed, -car.adjusted_distance)
-                    )
-                    self.safety_car_active = True
-                    self.safety_car_triggered = True
-                    self.announcements.add_message("Safety Car Deployed!", duration=90)
-                    self.create_safety_car()
+                if not self.headless and pyxel.btnp(pyxel.KEY_P):
+                    self.deploy_safety_car()
             if self.safety_car_active:
                 self.update_safety_car()
                 # Do not sort cars during safety car period to maintain positions
@@ -224,15 +244,8 @@ class Race:
                 )
                 for car in self.cars:
                     car.update(self.race_started, self.frame_count, self.cars, self.safety_car_active)
-                max_scroll_index = max(0, len(self.cars) - 3)
-                if pyxel.btnp(pyxel.KEY_UP):
-                    self.leaderboard_scroll_index = max(
-                        self.leaderboard_scroll_index - 1, 0
-                    )
-                elif pyxel.btnp(pyxel.KEY_DOWN):
-                    self.leaderboard_scroll_index = min(
-                        self.leaderboard_scroll_index + 1, max_scroll_index
-                    )
+                self.timing.record(self.frame_count, self.cars)
+                self.update_leaderboard_scroll()
             if self.safety_car and not self.safety_car.is_active:
                 self.safety_car = None
                 self.safety_car_active = False
@@ -242,9 +255,156 @@ class Race:
                 self.handle_crashed_cars()
                 for car in self.cars:
                     car.reset_after_safety_car()
-            if any(car.laps_completed >= MAX_LAPS for car in self.cars):
+            if self.recorder:
+                self.recorder.record(self.safety_car)
+            if self.telemetry:
+                self.telemetry.record(self.frame_count, self.cars)
+            if self.lap_hasher:
+                self.lap_hasher.update(self)
+            if any(car.laps_completed >= self.max_laps for car in self.cars):
                 self.race_finished = True
                 self.announcements.add_message("Race finished!", duration=180)
+                career = getattr(self.game, "career", None)
+                if career:
+                    career.record_race_result(self, os.path.basename(track.current.track_file))
+                if self.telemetry:
+                    self.telemetry.close()
+                if self.recorder:
+                    self.save_replay()
+                    self.announcements.add_message("Press R to watch the replay.", duration=180)
+
+    def headless_frame_limit(self):
+        """
+        Frame cap for run_headless. Every lap (plus one spare for the start) is allowed the time
+        it takes at safety car speed, so only a race where no car can finish ever hits it.
+        """
+        frames_per_lap = track.current.total_track_length / SAFETY_CAR_SPEED
+        return self.countdown + int((self.max_laps + 1 + ENABLE_WARMUP_LAP) * frames_per_lap)
+
+    def run_headless(self, max_frames=None):
+        """Run the whole race without rendering. Returns the number of frames simulated."""
+        while not self.race_finished:
+            if max_frames is not None and self.frame_count >= max_frames:
+                break
+            self.update()
+        return self.frame_count
+
+    def state_hash(self):
+        """Hash of the per-lap race state of a headless race, see state_hash.LapStateHasher."""
+        return self.lap_hasher.hexdigest() if self.lap_hasher else None
+
+    def update_save_points(self):
+        """Keep rewind snapshots and handle rewind (B) and mid-race save (S)."""
+        if self.race_finished:
+            return
+        self.rewind_buffer.update(self)
+        if pyxel.btnp(pyxel.KEY_B):
+            if self.rewind_buffer.rewind(self, REWIND_SECONDS * 30):
+                self.announcements.add_message(f"Rewound {REWIND_SECONDS} seconds.", duration=30)
+        elif pyxel.btnp(pyxel.KEY_S):
+            self.save_state()
+            self.announcements.add_message("Race saved.", duration=30)
+
+    def save_state(self, path=None):
+        """Write a snapshot of the running race to disk."""
+        os.makedirs(savesdir, exist_ok=True)
+        path = path or os.path.join(savesdir, "race.sav")
+        with open(path, "wb") as file:
+            file.write(snapshot_race(self))
+        print(f"Race saved to {path}")
+
+    def close(self):
+        """Flush and stop the session's background writers. Called whenever the race is left."""
+        if self.telemetry:
+            self.telemetry.close()
+
+    def restart_telemetry(self):
+        """Close the telemetry session and continue in a new one, e.g. after a rewind."""
+        self.telemetry.close()
+        self.telemetry_restarts += 1
+        self.telemetry = TelemetryWriter(telemetrydir, f"{self.telemetry_session}_{self.telemetry_restarts}",
+                                         per_tick=TELEMETRY_PER_TICK)
+
+    def deploy_safety_car(self):
+        """Freeze the running order and send out the safety car."""
+        # Sort cars before safety car deployment
+        self.cars.sort(
+            key=lambda car: (-car.laps_completed, -car.adjusted_distance)
+        )
+        self.safety_car_active = True
+        self.safety_car_triggered = True
+        self.safety_car_deployments += 1
+        self.announcements.add_message("Safety Car Deployed!", duration=90)
+        self.create_safety_car()
+
+    def update_leaderboard_scroll(self):
+        """Scroll the leaderboard with the up and down arrow keys."""
+        if self.headless:
+            return
+        max_scroll_index = max(0, len(self.cars) - 3)
+        if pyxel.btnp(pyxel.KEY_UP):
+            self.leaderboard_scroll_index = max(
+                self.leaderboard_scroll_index - 1, 0
+            )
+        elif pyxel.btnp(pyxel.KEY_DOWN):
+            self.leaderboard_scroll_index = min(
+                self.leaderboard_scroll_index + 1, max_scroll_index
+            )
+
+    def save_replay(self):
+        """Write the recorded race to the replays directory."""
+        os.makedirs(replaysdir, exist_ok=True)
+        path = os.path.join(replaysdir, time.strftime("race_%Y%m%d_%H%M%S.ormr"))
+        self.recorder.save(path)
+        print(f"Replay saved to {path}")
+
+    def start_replay(self, player=None):
+        """Switch to playback mode, using the given ReplayPlayer or this race's own recording."""
+        if player is None:
+            player = ReplayPlayer(self.recorder.to_bytes())
+        self.replay = player
+        self.replay_slots = {number: slot for slot, number in enumerate(player.car_numbers)}
+        self.state = 'replay'
+        self.seek_replay(0)
+
+    def seek_replay(self, tick):
+        """Jump to any tick of the replay; the timing lines restart from there."""
+        self.replay_tick = max(0, min(tick, self.replay.total_ticks - 1))
+        self.timing = TimingLines(self.cars, laps=self.max_laps)
+
+    def update_replay(self):
+        """Render state comes straight from the recording, no physics is run in playback mode."""
+        if pyxel.btnp(pyxel.KEY_RIGHT):
+            self.seek_replay(self.replay_tick + 10 * 30)
+        elif pyxel.btnp(pyxel.KEY_LEFT):
+            self.seek_replay(self.replay_tick - 10 * 30)
+
+        frame = self.replay.frame(self.replay_tick)
+        for car in self.cars:
+            slot = self.replay_slots.get(car.car_number)
+            if slot is None:
+                continue
+            ReplayPlayer.apply(frame[slot], car)
+            car.update_adjusted_distance()
+
+        # The last slot belongs to the safety car
+        safety_car_state = frame[-1]
+        if safety_car_state["flags"] & FLAG_ACTIVE:
+            if self.safety_car is None:
+                self.create_safety_car()
+            ReplayPlayer.apply(safety_car_state, self.safety_car)
+            self.safety_car_active = True
+        else:
+            self.safety_car = None
+            self.safety_car_active = False
+
+        self.cars.sort(
+            key=lambda car: (-car.laps_completed, -car.adjusted_distance)
+        )
+        self.timing.record(self.replay_tick, self.cars)
+        self.update_leaderboard_scroll()
+        if self.replay_tick < self.replay.total_ticks - 1:
+            self.replay_tick += 1
 
     def update_safety_car(self):
         """Update the safety car and the cars under its effect."""
@@ -262,19 +422,12 @@ class Race:
             else:
                 car_ahead = self.cars[idx - 1]
             car.update_under_safety_car(self.frame_count, self.safety_car, self.cars, car_ahead)
+        self.timing.record(self.frame_count, self.cars)
         # Do not sort cars during safety car period to maintain positions
         self.cars.sort(
             key=lambda car: (-car.laps_completed, -car.adjusted_distance)
         )
-        max_scroll_index = max(0, len(self.cars) - 3)
-        if pyxel.btnp(pyxel.KEY_UP):
-            self.leaderboard_scroll_index = max(
-                self.leaderboard_scroll_index - 1, 0
-            )
-        elif pyxel.btnp(pyxel.KEY_DOWN):
-            self.leaderboard_scroll_index = min(
-                self.leaderboard_scroll_index + 1, max_scroll_index
-            )
+        self.update_leaderboard_scroll()
 
         all_cars_caught_up = all(car.speed == SAFETY_CAR_SPEED for car in self.cars if car.is_active)
         if all_cars_caught_up and not self.safety_car_laps_started:
@@ -333,52 +486,13 @@ class Race:
         pyxel.circ(inner_x + inner_width - inner_radius - 1, inner_y + inner_height - inner_radius - 1,
                    inner_radius, 0)  # Black color (0)
 
-    def draw_pitboxes(self):
-        """
-        Draws a custom pitbox for each team at its assigned location.
-        The pitbox is drawn as a filled square using the team's palette index
-        (which refers to the proper color in Pyxel's palette) with the team name below.
-        """
-        pitbox_size = 10  # Adjust the size as needed
-        for team in self.teams_data:
-            pit_x, pit_y = team["pitbox_coords"]
-            # Center the pitbox on the (x, y) coordinate.
-            top_left_x = pit_x - pitbox_size // 2
-            top_left_y = pit_y - pitbox_size // 2
-
-            # Use the team's palette index for drawing.
-            team_color = team.get("color_index", 1)
-            pyxel.rect(top_left_x, top_left_y, pitbox_size//2, pitbox_size//2, team_color)
-            pyxel.rectb(top_left_x, top_left_y, pitbox_size//2, pitbox_size//2, 1)
-
     def draw(self):
         """Render the race scene."""
         pyxel.cls(0)
         self.pyuni.text(370, 480, CURRENT_VER, 1)  # Display version
 
-        # Draw the track
-        for i in range(len(TRACK_POINTS) - 1):
-            x1, y1 = TRACK_POINTS[i]
-            x2, y2 = TRACK_POINTS[i + 1]
-            pyxel.line(x1, y1, x2, y2, 1)  # Black color
-
-        # Draw start/finish line
-        sx, sy = TRACK_POINTS[START_FINISH_INDEX_SMOOTHED]
-        sx_next, sy_next = TRACK_POINTS[(START_FINISH_INDEX_SMOOTHED + 1)]
-        pyxel.line(sx, sy, sx_next, sy_next, 2)
-
-        # Draw pit lane
-        if PIT_LANE_POINTS:
-            for i in range(len(PIT_LANE_POINTS) - 1):
-                x1, y1 = PIT_LANE_POINTS[i]
-                x2, y2 = PIT_LANE_POINTS[i + 1]
-                pyxel.line(x1, y1, x2, y2, 13)
-            pitstop_x, pitstop_y = get_position_along_track(
-                PIT_STOP_POINT, PIT_LANE_POINTS, PIT_LANE_CUMULATIVE_DISTANCES
-            )
-
-
-        self.draw_pitboxes()
+        # Draw the static track, pit lane and pitboxes in one blit.
+        self.track_layer.draw(self.teams_data)
 
         # Draw all cars
         for car in self.cars:
@@ -387,16 +501,20 @@ class Race:
             self.safety_car.draw()
 
         # Draw race-specific UI elements
-        if self.state == 'race':
+        if self.state == 'replay':
+            self.draw_leaderboard()
+            seconds = self.replay_tick // 30
+            self.pyuni.text(20, 5, f"Replay {seconds // 60}:{seconds % 60:02d}  <- -> seek", 0)
+        elif self.state == 'race':
             self.draw_leaderboard()
             if self.race_finished:
                 self.pyuni.text(200, 300, "Race Finished!", 0)
             leader_lap = self.cars[0].laps_completed + 1
-            self.pyuni.text(20, 5, f"Lap: {leader_lap}/{MAX_LAPS}", 0)
+            self.pyuni.text(20, 5, f"Lap: {leader_lap}/{self.max_laps}", 0)
         elif self.state == 'warmup_lap':
             self.pyuni.text(20, 5, "Warm-up Lap", 0)
         else:
-            self.pyuni.text(20, 5, f"Lap: 1/{MAX_LAPS}", 0)
+            self.pyuni.text(20, 5, f"Lap: 1/{self.max_laps}", 0)
         if self.safety_car_active:
             self.pyuni.text(20, 20, "Safety Car Deployed", 8)
 
@@ -407,9 +525,9 @@ class Race:
 
             # Get car position
             if car.on_pitlane:
-                x, y = get_position_along_track(car.pitlane_distance, PIT_LANE_POINTS, PIT_LANE_CUMULATIVE_DISTANCES)
+                x, y = get_position_along_track(car.pitlane_distance, track.current.pit_lane_points, track.current.pit_lane_cumulative_distances)
             else:
-                x, y = get_position_along_track(car.distance, TRACK_POINTS, CUMULATIVE_DISTANCES)
+                x, y = get_position_along_track(car.distance, track.current.track_points, track.current.cumulative_distances)
             if not hover_info and abs(pyxel.mouse_x - x) <= 10 and abs(pyxel.mouse_y - y) <= 10:
                 # Determine lap status
                 lap_status = (
@@ -441,48 +559,38 @@ class Race:
 
     def draw_leaderboard(self):
         """Render the leaderboard on the screen in a compact two-line format per racer."""
-        x_offset = 20
-        y_offset = 20
-        self.pyuni.text(x_offset, y_offset, "Leaderboard:", 1)
+        if self.leaderboard is None:
+            self.leaderboard = Leaderboard(self.pyuni)
         racing_cars = [car for car in self.cars if not car.is_safety_car and car.is_active]
-        # Starting Y position for the first racer (just below the header)
-        racer_start_y = y_offset + 20
-        safety_car_active = self.safety_car_active
-
-        for idx, car in enumerate(
-                racing_cars[self.leaderboard_scroll_index:self.leaderboard_scroll_index + 8]
-        ):
-            global_idx = self.leaderboard_scroll_index + idx
-            gap_text = "Leader" if global_idx == 0 else self.get_gap_text(global_idx, racing_cars)
-            lap_text = f"Lap: {car.laps_completed}/{MAX_LAPS}"
-            best_lap_text = f"Best Lap: {car.best_lap_time:.2f}s" if car.best_lap_time else "Best Lap: N/A"
-            stats_text = f"Speed: {car.speed:.2f}"
-            car_stats = f"E:{car.engine_power:.2f} A:{car.aero_efficiency:.2f} G:{car.gearbox_quality:.2f}"
-            tire_text = f"T:{car.tire_type.capitalize()} {car.tire_percentage:.1f}% PD: {car.calculate_pit_desire(safety_car_active)}"
-
-            # Combine all info into two compact lines with no extra spacing between racers.
-            line1 = f"{global_idx + 1}.{car.driver_name} {gap_text} | {lap_text} | {best_lap_text} | {car.tire_temperature}"
-            line2 = f"{stats_text} | {car_stats} | {tire_text}"
-
-            # Each racer block is 20 pixels high (two lines of 10 pixels each)
-            current_y = racer_start_y + idx * 20
-            self.pyuni.text(x_offset, current_y, line1, car.color)
-            self.pyuni.text(x_offset, current_y + 10, line2, car.color)
+        entries = list(enumerate(racing_cars))[self.leaderboard_scroll_index:self.leaderboard_scroll_index + 8]
+        self.leaderboard.draw(entries, lambda global_idx, car: self.leaderboard_lines(global_idx, car, racing_cars))
+
+    def leaderboard_lines(self, global_idx, car, racing_cars):
+        """Return the two leaderboard lines of one racer."""
+        gap_text = "Leader" if global_idx == 0 else self.get_gap_text(global_idx, racing_cars)
+        lap_text = f"Lap: {car.laps_completed}/{self.max_laps}"
+        best_lap_text = f"Best Lap: {car.best_lap_time:.2f}s" if car.best_lap_time else "Best Lap: N/A"
+        stats_text = f"Speed: {car.speed:.2f}"
+        car_stats = f"E:{car.engine_power:.2f} A:{car.aero_efficiency:.2f} G:{car.gearbox_quality:.2f}"
+        tire_text = f"T:{car.tire_type.capitalize()} {car.tire_percentage:.1f}% PD: {car.calculate_pit_desire(self.safety_car_active)}"
+
+        # Combine all info into two compact lines with no extra spacing between racers.
+        line1 = f"{global_idx + 1}.{car.driver_name} {gap_text} | {lap_text} | {best_lap_text} | {car.tire_temperature}"
+        line2 = f"{stats_text} | {car_stats} | {tire_text}"
+        return line1, line2
 
     def get_gap_text(self, global_idx, racing_cars):
         """Calculate and return the gap text for the leaderboard."""
         car = racing_cars[global_idx]
         car_ahead = racing_cars[global_idx - 1]
         if self.race_started:
-            distance_gap = (
-                    car_ahead.adjusted_total_distance -
-                    car.adjusted_total_distance
-            )
-            if distance_gap < 0:
-                distance_gap += TOTAL_TRACK_LENGTH * MAX_LAPS
-            min_speed = 0.1
-            effective_speed = max(car.speed, min_speed)
-            gap = (distance_gap / effective_speed) / 20
+            # Interval at the last timing line both cars have crossed
+            interval = self.timing.interval(car, car_ahead)
+            if interval is None:
+                return "+-.--s"
+            laps_behind, gap = interval
+            if laps_behind > 0:
+                return f"+{laps_behind} Lap"
             return f"+{gap:.2f}s"
         else:
             gap = (car.initial_time_offset - car_ahead.initial_time_offset) / 5
@@ -0,0 +1,204 @@
+# replay.py
+
+import struct
+import zlib
+import numpy as np
+from constants import TIRE_TYPES
+
+# Fixed-point scales for the recorded fields. Integers delta-encode and compress far better than floats.
+DISTANCE_SCALE = 1000
+SPEED_SCALE = 10000
+TIRE_SCALE = 100
+
+FLAG_ACTIVE = 1
+FLAG_ON_PITLANE = 2
+FLAG_CRASHED = 4
+FLAG_PITTING = 8
+TIRE_SHIFT = 4  # tire compound index is stored in the upper bits of the flags
+
+REPLAY_DTYPE = np.dtype([
+    ("distance", "<i4"),
+    ("pitlane_distance", "<i4"),
+    ("speed", "<i2"),
+    ("tire_percentage", "<i2"),
+    ("laps_completed", "<i2"),
+    ("flags", "u1"),
+])
+
+REPLAY_MAGIC = b"ORMR"
+REPLAY_VERSION = 1
+HEADER_FORMAT = "<4sHHHI"
+CHUNK_ENTRY_FORMAT = "<QI"
+KEYFRAME_INTERVAL = 300  # ticks per chunk; every chunk starts with a keyframe (10 seconds at 30 FPS)
+
+TIRE_COMPOUNDS = list(TIRE_TYPES.keys())
+
+
+def encode_chunk(frames):
+    """Delta-encode a (ticks, slots) block field by field and compress it. Row 0 is the keyframe."""
+    parts = []
+    for name in REPLAY_DTYPE.names:
+        column = np.ascontiguousarray(frames[name])
+        delta = column.copy()
+        delta[1:] -= column[:-1]
+        parts.append(delta.tobytes())
+    return zlib.compress(b"".join(parts), 6)
+
+
+def decode_chunk(data, num_slots):
+    """Inverse of encode_chunk: rebuild the structured frames of one chunk."""
+    raw = zlib.decompress(data)
+    ticks = len(raw) // (REPLAY_DTYPE.itemsize * num_slots)
+    frames = np.empty((ticks, num_slots), dtype=REPLAY_DTYPE)
+    offset = 0
+    for name in REPLAY_DTYPE.names:
+        field_dtype = REPLAY_DTYPE[name]
+        size = ticks * num_slots * field_dtype.itemsize
+        delta = np.frombuffer(raw, dtype=field_dtype, count=ticks * num_slots, offset=offset)
+        # Wrapping integer arithmetic makes the cumulative sum an exact inverse of the deltas.
+        frames[name] = np.cumsum(delta.reshape(ticks, num_slots), axis=0, dtype=field_dtype)
+        offset += size
+    return frames
+
+
+class ReplayRecorder:
+    """
+    Records the per-tick state of every car into a preallocated ring buffer of KEYFRAME_INTERVAL
+    ticks. Each time the buffer fills it is delta-encoded and compressed into a chunk, so memory
+    stays flat no matter how long the race runs.
+    The last slot is reserved for the safety car.
+    """
+
+    def __init__(self, cars, keyframe_interval=KEYFRAME_INTERVAL):
+        self.cars = list(cars)  # stable slot order, independent of race position sorting
+        self.car_numbers = [car.car_number for car in self.cars]
+        self.num_slots = len(self.cars) + 1
+        self.keyframe_interval = keyframe_interval
+        self.buffer = np.zeros((keyframe_interval, self.num_slots), dtype=REPLAY_DTYPE)
+        self.cursor = 0
+        self.total_ticks = 0
+        self.chunks = []
+
+    @staticmethod
+    def car_state(car):
+        if car is None:
+            return 0, 0, 0, 0, 0, 0
+        # Retired and crashed cars keep their last position so playback can still draw them
+        flags = FLAG_ACTIVE if car.is_active else 0
+        if car.on_pitlane:
+            flags |= FLAG_ON_PITLANE
+        if car.crashed:
+            flags |= FLAG_CRASHED
+        if car.pitting:
+            flags |= FLAG_PITTING
+        flags |= TIRE_COMPOUNDS.index(car.tire_type) << TIRE_SHIFT
+        return (
+            int(car.distance * DISTANCE_SCALE),
+            int(car.pitlane_distance * DISTANCE_SCALE),
+            int(car.speed * SPEED_SCALE),
+            int(car.tire_percentage * TIRE_SCALE),
+            car.laps_completed,
+            flags,
+        )
+
+    def record(self, safety_car=None):
+        """Append one tick. Call once per race frame."""
+        row = [self.car_state(car) for car in self.cars]
+        row.append(self.car_state(safety_car))
+        self.buffer[self.cursor] = row
+        self.cursor += 1
+        self.total_ticks += 1
+        if self.cursor == self.keyframe_interval:
+            self.flush()
+
+    def flush(self):
+        """Compress whatever is in the ring buffer into a chunk and rewind the buffer."""
+        if self.cursor == 0:
+            return
+        self.chunks.append(encode_chunk(self.buffer[:self.cursor]))
+        self.cursor = 0
+
+    def truncate(self, ticks):
+        """Drop everything recorded after the first `ticks` ticks, e.g. when the race is rewound."""
+        if ticks >= self.total_ticks:
+            return
+        chunk_index, rows = divmod(max(ticks, 0), self.keyframe_interval)
+        self.flush()
+        # The kept part of the last chunk goes back into the ring buffer and is recorded over
+        if rows:
+            self.buffer[:rows] = decode_chunk(self.chunks[chunk_index], self.num_slots)[:rows]
+        del self.chunks[chunk_index:]
+        self.cursor = rows
+        self.total_ticks = chunk_index * self.keyframe_interval + rows
+
+    def to_bytes(self):
+        self.flush()
+        header = struct.pack(HEADER_FORMAT, REPLAY_MAGIC, REPLAY_VERSION, self.num_slots,
+                             self.keyframe_interval, self.total_ticks)
+        numbers = struct.pack(f"<{len(self.car_numbers)}h", *self.car_numbers)
+        table_size = 4 + len(self.chunks) * struct.calcsize(CHUNK_ENTRY_FORMAT)
+        offset = len(header) + len(numbers) + table_size
+        table = [struct.pack("<I", len(self.chunks))]
+        for chunk in self.chunks:
+            table.append(struct.pack(CHUNK_ENTRY_FORMAT, offset, len(chunk)))
+            offset += len(chunk)
+        return b"".join([header, numbers] + table + self.chunks)
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+
+class ReplayPlayer:
+    """Random access over a recorded replay. Seeking decodes a single chunk at most."""
+
+    def __init__(self, data):
+        magic, version, self.num_slots, self.keyframe_interval, self.total_ticks = struct.unpack_from(
+            HEADER_FORMAT, data, 0)
+        if magic != REPLAY_MAGIC:
+            raise ValueError("Not a replay file")
+        if version != REPLAY_VERSION:
+            raise ValueError(f"Unsupported replay version {version}")
+        offset = struct.calcsize(HEADER_FORMAT)
+        num_cars = self.num_slots - 1
+        self.car_numbers = list(struct.unpack_from(f"<{num_cars}h", data, offset))
+        offset += 2 * num_cars
+        (num_chunks,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        self.chunk_table = [
+            struct.unpack_from(CHUNK_ENTRY_FORMAT, data, offset + i * struct.calcsize(CHUNK_ENTRY_FORMAT))
+            for i in range(num_chunks)
+        ]
+        self.data = data
+        self.cached_chunk_index = None
+        self.cached_chunk = None
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            return cls(file.read())
+
+    def frame(self, tick):
+        """Return the structured state of all slots at the given tick."""
+        tick = max(0, min(tick, self.total_ticks - 1))
+        chunk_index, row = divmod(tick, self.keyframe_interval)
+        if chunk_index != self.cached_chunk_index:
+            offset, length = self.chunk_table[chunk_index]
+            self.cached_chunk = decode_chunk(self.data[offset:offset + length], self.num_slots)
+            self.cached_chunk_index = chunk_index
+        return self.cached_chunk[row]
+
+    @staticmethod
+    def apply(state, car):
+        """Copy a recorded slot back onto a Car so the normal drawing code can render it."""
+        flags = int(state["flags"])
+        car.is_active = bool(flags & FLAG_ACTIVE)
+        car.on_pitlane = bool(flags & FLAG_ON_PITLANE)
+        car.crashed = bool(flags & FLAG_CRASHED)
+        car.pitting = bool(flags & FLAG_PITTING)
+        car.tire_type = TIRE_COMPOUNDS[flags >> TIRE_SHIFT]
+        car.distance = state["distance"] / DISTANCE_SCALE
+        car.pitlane_distance = state["pitlane_distance"] / DISTANCE_SCALE
+        car.speed = state["speed"] / SPEED_SCALE
+        car.tire_percentage = state["tire_percentage"] / TIRE_SCALE
+        car.laps_completed = int(state["laps_completed"])
@@ -0,0 +1,183 @@
+# season.py
+"""
+Offline season simulator. Every race weekend (qualifying plus race) of a calendar of track
+files runs headless in a process pool; the results are folded into the championship
+standings in calendar order.
+
+Usage (from the src directory):
+    python season.py ../tracks/track.json ../tracks/track3.json --laps 10
+"""
+
+import argparse
+import concurrent.futures
+import os
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from constants import POINTS_SYSTEM, QUALIFYING_TIME
+from database import get_database
+import track
+from track import load_compiled_track, use_track
+from qualifying import Qualifying
+from race import Race
+from monte_carlo import init_worker, load_driver_names
+
+# Compiled tracks resident in this process, keyed by resolved path.
+# Each worker compiles a track the first time it runs a weekend there and reuses it afterwards.
+compiled_tracks = {}
+
+
+@dataclass
+class WeekendResult:
+    round: int
+    track_file: str
+    starting_grid: list  # car numbers, pole first
+    finishing_order: list  # car numbers of the classified cars, winner first
+    dnfs: list
+    pit_stops: dict  # car number -> number of pit stops
+    frames: int
+    finished: bool = True  # False when the race hit the frame cap before any car took the flag
+
+
+def activate_track(track_file):
+    """Make the given track the active one in this process, compiling it only once."""
+    path = str(Path(track_file).resolve())
+    compiled = compiled_tracks.get(path)
+    if compiled is None:
+        compiled = compiled_tracks[path] = load_compiled_track(path)
+    if track.current.track_file != compiled["TRACK_FILE"]:
+        use_track(compiled)
+
+
+def run_weekend(track_file, round_number, seed, laps=None, qualifying_minutes=QUALIFYING_TIME):
+    """Run qualifying and the race on one track. Executed inside a worker process."""
+    activate_track(track_file)
+    random.seed(seed)
+    starting_grid = Qualifying(None, headless=True, session_minutes=qualifying_minutes).run_headless()
+    race = Race(None, starting_grid, headless=True, laps=laps or track.current.track_max_laps)
+    frames = race.run_headless(max_frames=race.headless_frame_limit())
+    # A race stopped at the cap has no classification, so it awards no points
+    classified = [car for car in race.cars if car.is_active and not car.crashed] if race.race_finished else []
+    return WeekendResult(
+        round=round_number,
+        track_file=str(track_file),
+        starting_grid=list(starting_grid),
+        finishing_order=[car.car_number for car in classified],
+        dnfs=[car.car_number for car in race.cars if car.crashed or not car.is_active],
+        pit_stops={car.car_number: car.pit_stops for car in race.cars},
+        frames=frames,
+        finished=race.race_finished,
+    )
+
+
+@dataclass
+class Standings:
+    """Championship standings carried from one round to the next."""
+    car_teams: dict  # car number -> team name
+    points_system: list = field(default_factory=lambda: list(POINTS_SYSTEM))
+    driver_points: dict = field(default_factory=dict)
+    team_points: dict = field(default_factory=dict)
+    wins: dict = field(default_factory=dict)
+    rounds: list = field(default_factory=list)
+
+    def add(self, result):
+        self.rounds.append(result)
+        for position, number in enumerate(result.finishing_order):
+            points = self.points_system[position] if position < len(self.points_system) else 0
+            self.driver_points[number] = self.driver_points.get(number, 0) + points
+            team = self.car_teams.get(number)
+            if team is not None:
+                self.team_points[team] = self.team_points.get(team, 0) + points
+        if result.finishing_order:
+            winner = result.finishing_order[0]
+            self.wins[winner] = self.wins.get(winner, 0) + 1
+
+    def driver_table(self):
+        """(car number, points, wins) sorted by points, then wins."""
+        numbers = set(self.car_teams) | set(self.driver_points)
+        table = [(number, self.driver_points.get(number, 0), self.wins.get(number, 0)) for number in numbers]
+        return sorted(table, key=lambda row: (-row[1], -row[2], row[0]))
+
+    def team_table(self):
+        """(team name, points) sorted by points."""
+        teams = dict.fromkeys(self.car_teams.values(), 0)
+        teams.update(self.team_points)
+        return sorted(teams.items(), key=lambda row: (-row[1], row[0]))
+
+
+def load_car_teams():
+    """Map car number to team name for every contracted driver."""
+    database = get_database()
+    return {driver["number"]: team["team_name"] for team in database.teams for driver in database.team_drivers(team)}
+
+
+class SeasonRunner:
+    def __init__(self, calendar, laps=None, qualifying_minutes=QUALIFYING_TIME, workers=None, base_seed=0):
+        self.calendar = list(calendar)
+        self.laps = laps
+        self.qualifying_minutes = qualifying_minutes
+        self.workers = workers or min(os.cpu_count(), len(self.calendar)) or 1
+        self.base_seed = base_seed
+
+    def run(self, on_round=None):
+        """Run every weekend and return the final Standings."""
+        standings = Standings(load_car_teams())
+        rounds = range(1, len(self.calendar) + 1)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker) as pool:
+            # map() yields in calendar order, so standings are carried forward round by round
+            # while later weekends are still running.
+            results = pool.map(
+                run_weekend,
+                self.calendar,
+                rounds,
+                [self.base_seed + round_number for round_number in rounds],
+                [self.laps] * len(self.calendar),
+                [self.qualifying_minutes] * len(self.calendar),
+            )
+            for result in results:
+                standings.add(result)
+                if on_round:
+                    on_round(result, standings)
+        return standings
+
+
+def print_standings(standings, driver_names):
+    print(f"{'Pos':>3} {'Car':>4} {'Driver':<22} {'Team':<20} {'Pts':>4} {'Wins':>4}")
+    for position, (number, points, wins) in enumerate(standings.driver_table(), start=1):
+        print(f"{position:>3} {number:>4} {driver_names.get(number, '?'):<22} "
+              f"{standings.car_teams.get(number, '?'):<20} {points:>4} {wins:>4}")
+    print()
+    print(f"{'Pos':>3} {'Team':<20} {'Pts':>4}")
+    for position, (team, points) in enumerate(standings.team_table(), start=1):
+        print(f"{position:>3} {team:<20} {points:>4}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline season simulator")
+    parser.add_argument("calendar", nargs="+", help="track files in calendar order")
+    parser.add_argument("--laps", type=int, default=None, help="race laps (default: the track's max_laps)")
+    parser.add_argument("--qualifying", type=float, default=QUALIFYING_TIME, help="qualifying length in minutes")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0, help="round n uses seed + n")
+    args = parser.parse_args()
+
+    runner = SeasonRunner(args.calendar, laps=args.laps, qualifying_minutes=args.qualifying,
+                          workers=args.workers, base_seed=args.seed)
+    driver_names = load_driver_names()
+
+    def progress(result, standings):
+        if not result.finished:
+            print(f"Round {result.round}: {Path(result.track_file).stem} stopped without a finisher "
+                  f"({len(result.dnfs)} DNF)")
+            return
+        winner = result.finishing_order[0] if result.finishing_order else None
+        print(f"Round {result.round}: {Path(result.track_file).stem} won by "
+              f"{driver_names.get(winner, '?')} ({len(result.dnfs)} DNF)")
+
+    standings = runner.run(on_round=progress)
+    print()
+    print_standings(standings, driver_names)
+
+
+if __name__ == "__main__":
+    main()
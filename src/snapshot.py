@@ -0,0 +1,137 @@
+# snapshot.py
+
+import pickle
+import random
+import struct
+import zlib
+from collections import deque
+import track
+
+SNAPSHOT_MAGIC = b"ORMS"
+SNAPSHOT_VERSION = 2
+HEADER_FORMAT = "<4sH8sI"  # magic, version, track fingerprint, payload length
+
+# Plain Race attributes that make up the race state (cars, safety car, timing and announcements are handled separately)
+RACE_FIELDS = (
+    "starting_grid", "max_laps", "state", "frame_count", "countdown", "race_started", "race_finished",
+    "safety_car_active", "safety_car_lap_counter", "safety_car_triggered", "safety_car_laps_started",
+    "safety_car_ending_announced", "safety_car_start_lap", "safety_car_deployments", "leaderboard_scroll_index",
+)
+ANNOUNCEMENT_FIELDS = ("messages", "default_display_duration", "current_message", "message_timer")
+
+
+def car_state(car):
+    """Picklable copy of a car's attributes with object references replaced by car numbers."""
+    state = car.__getstate__()
+    target = state.get("slipstream_target")
+    state["slipstream_target"] = target.car_number if target is not None else None
+    state["prediction_result"] = None
+    return state
+
+
+def snapshot_race(race):
+    """Serialize the full race state, including the RNG state, into a compact versioned blob."""
+    state = {
+        "race": {name: getattr(race, name) for name in RACE_FIELDS if hasattr(race, name)},
+        "cars": [car_state(car) for car in race.cars],
+        "safety_car": car_state(race.safety_car) if race.safety_car else None,
+        "timing": race.timing.__dict__,
+        "announcements": {name: getattr(race.announcements, name) for name in ANNOUNCEMENT_FIELDS},
+        "random": random.getstate(),
+        # Ticks already in the replay and the lap hashes so far, so a restore can cut them back
+        "replay_ticks": race.recorder.total_ticks if race.recorder else None,
+        "lap_hasher": (race.lap_hasher.leader_laps, list(race.lap_hasher.lap_digests)) if race.lap_hasher else None,
+    }
+    payload = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    return struct.pack(HEADER_FORMAT, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, track.current.fingerprint,
+                       len(payload)) + payload
+
+
+def read_snapshot(blob):
+    """
+    Decode a blob produced by snapshot_race back into its state dictionary.
+    Raises ValueError if it is not a snapshot or was taken on another track than the active one.
+    """
+    magic, version, fingerprint, length = struct.unpack_from(HEADER_FORMAT, blob, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a race snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+    if fingerprint != track.current.fingerprint:
+        raise ValueError("The snapshot was taken on a different track")
+    offset = struct.calcsize(HEADER_FORMAT)
+    return pickle.loads(zlib.decompress(blob[offset:offset + length]))
+
+
+def restore_car(car, state, cars_by_number, race):
+    car.__setstate__(dict(state))
+    car.announcements = race.announcements
+    car.game = race.game
+    car.prediction_future = None
+    car.slipstream_target = cars_by_number.get(state["slipstream_target"])
+
+
+def restore_race(race, blob):
+    """
+    Restore a race to the exact state stored in the blob. The race must have been created
+    with the same teams and drivers; cars are matched by car number.
+    """
+    state = read_snapshot(blob)
+    for name, value in state["race"].items():
+        setattr(race, name, value)
+
+    for name, value in state["announcements"].items():
+        setattr(race.announcements, name, value)
+
+    cars_by_number = {car.car_number: car for car in race.cars}
+    restored_cars = []
+    for car_data in state["cars"]:
+        car = cars_by_number.get(car_data["car_number"])
+        if car is not None:
+            restored_cars.append(car)
+    race.cars = restored_cars
+    for car, car_data in zip(restored_cars, state["cars"]):
+        restore_car(car, car_data, cars_by_number, race)
+
+    if state["safety_car"] is None:
+        race.safety_car = None
+    else:
+        if race.safety_car is None:
+            race.create_safety_car()
+        restore_car(race.safety_car, state["safety_car"], cars_by_number, race)
+
+    race.timing.__dict__.update(state["timing"])
+    random.setstate(state["random"])
+
+    # The replay continues from the restored tick. A race loaded from disk has no earlier
+    # recording, so its replay starts at the restored moment.
+    if race.recorder:
+        race.recorder.truncate(state["replay_ticks"] or 0)
+    if race.lap_hasher and state["lap_hasher"] is not None:
+        race.lap_hasher.leader_laps, lap_digests = state["lap_hasher"]
+        race.lap_hasher.lap_digests = list(lap_digests)
+    # Telemetry already on disk cannot be taken back; the rest of the race goes to a new session
+    if race.telemetry and race.telemetry.frames_recorded:
+        race.restart_telemetry()
+
+
+class RewindBuffer:
+    """Keeps the most recent snapshots taken every `interval` frames so the race can be rewound."""
+
+    def __init__(self, interval=30, capacity=10):
+        self.interval = interval
+        self.snapshots = deque(maxlen=capacity)
+
+    def update(self, race):
+        if race.frame_count % self.interval == 0:
+            self.snapshots.append((race.frame_count, snapshot_race(race)))
+
+    def rewind(self, race, frames):
+        """Restore the newest snapshot at least `frames` old. Returns False if there is none."""
+        target_frame = race.frame_count - frames
+        while self.snapshots:
+            frame, blob = self.snapshots.pop()
+            if frame <= target_frame or not self.snapshots:
+                restore_race(race, blob)
+                return True
+        return False
@@ -0,0 +1,190 @@
+# sponsors.py
+"""
+Sponsor portfolio selection: the sponsor set that earns a team the most over a season, within
+its sponsor slots and naming rules. Every sponsor either adds its name to the team name or
+replaces it, and a team has only one name to give away, so at most one sponsor can replace it.
+
+Solved exactly by branch and bound: sponsors are tried from the highest season income down, and
+a branch is cut when even filling every free slot with the best remaining sponsors could not
+beat the best portfolio found so far, or could no longer reach the required average reputation.
+
+Usage (from the src directory):
+    python sponsors.py --races 12 --slots 4 --min-average-reputation 4.0
+"""
+
+import argparse
+from dataclasses import dataclass, field
+from database import get_database
+
+DEFAULT_SEASON_RACES = 10
+# Sponsor slots per team. The database has no such limit; this is a game design choice and, with
+# one renaming sponsor at most, the limit on everything else a team signs.
+DEFAULT_SLOTS = 5
+MAX_NAME_REPLACEMENTS = 1  # the team name can only be replaced by one sponsor
+REPUTATION_TOLERANCE = 1e-9  # float slack when checking the average reputation
+
+
+def season_income(sponsor, races):
+    return sponsor["upfront_payment"] + sponsor["payment_per_race"] * races
+
+
+@dataclass
+class SponsorPortfolio:
+    sponsors: list = field(default_factory=list)  # sponsor records, highest income first
+    income: float = 0.0  # over the season
+
+    @property
+    def average_reputation(self):
+        if not self.sponsors:
+            return 0.0
+        return sum(sponsor["reputation"] for sponsor in self.sponsors) / len(self.sponsors)
+
+    @property
+    def sponsor_ids(self):
+        return [sponsor["id"] for sponsor in self.sponsors]
+
+
+def naming_kind(sponsor):
+    """0 for sponsors replacing the team name, 1 for sponsors added to it, 2 for neither."""
+    if sponsor.get("is_replacing_team_name"):
+        return 0
+    if sponsor.get("is_added_to_team_name"):
+        return 1
+    return 2
+
+
+def best_portfolio(sponsors=None, races=DEFAULT_SEASON_RACES, slots=DEFAULT_SLOTS,
+                   min_average_reputation=None, max_replacements=MAX_NAME_REPLACEMENTS,
+                   max_additions=None, keep=(), exclude=()):
+    """
+    Income-maximising sponsor set.
+
+    sponsors: candidate records (default: every sponsor in the database)
+    min_average_reputation: the portfolio's average sponsor reputation must reach this
+    keep: ids of sponsors under contract, always part of the portfolio
+    exclude: ids of sponsors that are not available (e.g. signed by another team)
+    max_additions: limit on sponsors added to the team name (default: only the slots limit them)
+    Returns None if the kept sponsors already break a constraint.
+    """
+    if sponsors is None:
+        sponsors = get_database().query.sponsors()
+    keep, exclude = set(keep), set(exclude)
+    if max_additions is None:
+        max_additions = slots
+    caps = [max_replacements, max_additions, slots]
+    kept = [sponsor for sponsor in sponsors if sponsor["id"] in keep]
+    candidates = [
+        sponsor for sponsor in sponsors
+        if sponsor["id"] not in keep and sponsor["id"] not in exclude
+    ]
+    candidates.sort(key=lambda sponsor: (-season_income(sponsor, races), sponsor["id"]))
+    incomes = [season_income(sponsor, races) for sponsor in candidates]
+    kinds = [naming_kind(sponsor) for sponsor in candidates]
+    # Each sponsor moves the portfolio's reputation surplus (sum of reputation - minimum) up or down;
+    # the average constraint holds when the surplus is not negative (up to float rounding).
+    constrained = min_average_reputation is not None
+    surpluses = [sponsor["reputation"] - min_average_reputation for sponsor in candidates] if constrained else []
+
+    used = [0, 0, 0]
+    for sponsor in kept:
+        used[naming_kind(sponsor)] += 1
+    if len(kept) > slots or any(used[kind] > caps[kind] for kind in (0, 1)):
+        return None
+    start_surplus = sum(sponsor["reputation"] - min_average_reputation for sponsor in kept) if constrained else 0.0
+
+    count = len(candidates)
+    best = {"income": -1.0, "picked": None}
+
+    def income_bound(index, free, replacements, additions):
+        """Income of the best remaining sponsors that fit the free slots and naming caps."""
+        total = 0.0
+        left = [max_replacements - replacements, max_additions - additions, free]
+        for i in range(index, count):
+            if not free:
+                break
+            kind = kinds[i]
+            if kind < 2 and not left[kind]:
+                continue
+            if kind < 2:
+                left[kind] -= 1
+            free -= 1
+            total += incomes[i]
+        return total
+
+    def surplus_reachable(index, free, surplus):
+        """Whether adding up to `free` of the remaining sponsors can lift the surplus to zero."""
+        if surplus >= -REPUTATION_TOLERANCE:
+            return True
+        gains = sorted((value for value in surpluses[index:] if value > 0), reverse=True)[:free]
+        return surplus + sum(gains) >= -REPUTATION_TOLERANCE
+
+    def search(index, picked, income, replacements, additions, surplus):
+        free = slots - len(kept) - len(picked)
+        if surplus >= -REPUTATION_TOLERANCE and income > best["income"]:
+            best["income"], best["picked"] = income, list(picked)
+        if index >= count or free == 0:
+            return
+        if income + income_bound(index, free, replacements, additions) <= best["income"]:
+            return
+        if constrained and not surplus_reachable(index, free, surplus):
+            return
+        kind = kinds[index]
+        if (kind != 0 or replacements < max_replacements) and (kind != 1 or additions < max_additions):
+            picked.append(index)
+            search(index + 1, picked, income + incomes[index],
+                   replacements + (kind == 0), additions + (kind == 1),
+                   surplus + (surpluses[index] if constrained else 0.0))
+            picked.pop()
+        search(index + 1, picked, income, replacements, additions, surplus)
+
+    search(0, [], 0.0, used[0], used[1], start_surplus)
+    if best["picked"] is None:
+        return None
+    chosen = kept + [candidates[i] for i in best["picked"]]
+    chosen.sort(key=lambda sponsor: -season_income(sponsor, races))
+    return SponsorPortfolio(chosen, sum(season_income(sponsor, races) for sponsor in chosen))
+
+
+def sign_sponsors(teams, races=DEFAULT_SEASON_RACES, **constraints):
+    """
+    Season rollover for AI teams: each team, in the order given (e.g. by championship position),
+    picks its best portfolio from the sponsors still available.
+    teams: (team id, ids of sponsors under contract) tuples.
+    Returns team id -> SponsorPortfolio (or None).
+    """
+    taken = set()
+    for _, contracted in teams:
+        taken.update(contracted)
+    portfolios = {}
+    for team_id, contracted in teams:
+        portfolio = best_portfolio(races=races, keep=contracted, exclude=taken - set(contracted), **constraints)
+        portfolios[team_id] = portfolio
+        if portfolio is not None:
+            taken.update(portfolio.sponsor_ids)
+    return portfolios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the best sponsor portfolio for a team")
+    parser.add_argument("--races", type=int, default=DEFAULT_SEASON_RACES)
+    parser.add_argument("--slots", type=int, default=DEFAULT_SLOTS)
+    parser.add_argument("--min-average-reputation", type=float, default=None, help="0..5")
+    parser.add_argument("--max-additions", type=int, default=None, help="default: limited by the slots only")
+    parser.add_argument("--keep", nargs="*", default=[], help="ids of sponsors under contract")
+    args = parser.parse_args()
+
+    portfolio = best_portfolio(races=args.races, slots=args.slots,
+                               min_average_reputation=args.min_average_reputation,
+                               max_additions=args.max_additions, keep=args.keep)
+    if portfolio is None:
+        print("No portfolio satisfies the constraints.")
+        return
+    for sponsor in portfolio.sponsors:
+        naming = "replaces name" if naming_kind(sponsor) == 0 else "added to name" if naming_kind(sponsor) == 1 else ""
+        print(f"{sponsor['id']}  {sponsor['name']:<32} {season_income(sponsor, args.races):>12,.0f}"
+              f"  rep {sponsor['reputation']:.1f}  {naming}")
+    print(f"Season income {portfolio.income:,.0f}, average reputation {portfolio.average_reputation:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# state_hash.py
+
+import hashlib
+import struct
+
+# Per-car state that goes into the lap hash. Floats are packed bit-exact, so any change in
+# the simulation arithmetic shows up in the hash.
+CAR_STATE_FORMAT = "<hhh??????dddddd"
+
+
+def car_state_bytes(car):
+    return struct.pack(
+        CAR_STATE_FORMAT,
+        car.car_number,
+        car.laps_completed,
+        car.pit_stops,
+        car.is_active,
+        car.crashed,
+        car.on_pitlane,
+        car.pitting,
+        car.slipstream_timer > 0,
+        car.tire_type == "soft",
+        car.distance,
+        car.pitlane_distance,
+        car.speed,
+        car.tire_percentage,
+        car.tire_temperature,
+        car.fuel_level,
+    ) + car.tire_type.encode()
+
+
+class LapStateHasher:
+    """
+    Hashes the state of every car each time the race leader completes a lap.
+    The final digest pins down the whole race, so an engine change that alters behaviour
+    changes the digest, and the per-lap digests show on which lap it first diverged.
+    """
+
+    def __init__(self):
+        self.leader_laps = 0
+        self.lap_digests = []
+
+    def update(self, race):
+        leader_laps = max((car.laps_completed for car in race.cars), default=0)
+        if leader_laps > self.leader_laps:
+            self.leader_laps = leader_laps
+            self.record(race)
+
+    def record(self, race):
+        digest = hashlib.sha256()
+        digest.update(struct.pack("<ii?", race.frame_count, race.safety_car_deployments, race.safety_car_active))
+        for car in sorted(race.cars, key=lambda c: c.car_number):
+            digest.update(car_state_bytes(car))
+        self.lap_digests.append(digest.hexdigest())
+
+    def hexdigest(self):
+        digest = hashlib.sha256()
+        for lap_digest in self.lap_digests:
+            digest.update(bytes.fromhex(lap_digest))
+        return digest.hexdigest()
@@ -0,0 +1,193 @@
+# telemetry.py
+
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+# Column layout of the two telemetry streams. Every column is its own preallocated NumPy buffer.
+TICK_COLUMNS = {
+    "frame": np.int32,
+    "car_number": np.int16,
+    "laps_completed": np.int16,
+    "distance": np.float32,
+    "speed": np.float32,
+    "tire_percentage": np.float32,
+    "tire_temperature": np.float32,
+    "fuel_level": np.float32,
+    "slipstream_timer": np.int16,
+    "on_pitlane": np.bool_,
+}
+LAP_COLUMNS = {
+    "frame": np.int32,
+    "car_number": np.int16,
+    "lap": np.int16,
+    "lap_time": np.float32,
+    "tire_type": np.int8,
+    "tire_percentage": np.float32,
+    "tire_temperature": np.float32,
+    "fuel_level": np.float32,
+    "slipstream_frames": np.int32,
+    "pit_stops": np.int16,
+    "pit_frames": np.int32,
+}
+TIRE_TYPE_CODES = {"hard": 0, "medium": 1, "soft": 2}
+
+
+class ColumnBuffer:
+    """A fixed number of rows stored column by column."""
+
+    def __init__(self, columns, capacity):
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in columns.items()}
+        self.capacity = capacity
+        self.size = 0
+
+
+class TelemetryWriter:
+    """
+    Opt-in telemetry pipeline. The simulation appends rows to preallocated column buffers;
+    full buffers are handed to a background thread that writes them as compressed .npz column
+    files, so the race loop never waits on disk I/O.
+
+    Files are written per session as <directory>/<session>/<stream>_<part>.npz.
+    """
+
+    def __init__(self, directory, session, per_tick=True, capacity=8192, tick_interval=1):
+        self.path = os.path.join(directory, session)
+        self.per_tick = per_tick
+        self.capacity = capacity
+        self.tick_interval = tick_interval
+        self.parts = {"tick": 0, "lap": 0}
+        self.buffers = {
+            "tick": ColumnBuffer(TICK_COLUMNS, capacity),
+            "lap": ColumnBuffer(LAP_COLUMNS, max(capacity // 16, 64)),
+        }
+        # Spare buffers are recycled once the writer thread is done with them.
+        self.spare = {"tick": queue.SimpleQueue(), "lap": queue.SimpleQueue()}
+        self.pending = queue.SimpleQueue()
+        # Per-car accumulators for the per-lap stream
+        self.last_lap = {}
+        self.slipstream_frames = {}
+        self.pit_frames = {}
+        self.dropped_rows = 0
+        self.frames_recorded = 0
+        self.closed = False
+        os.makedirs(self.path, exist_ok=True)
+        self.thread = threading.Thread(target=self.writer_loop, name="telemetry-writer", daemon=True)
+        self.thread.start()
+
+    def record(self, current_frame, cars):
+        """Append this frame's rows. Call once per simulation frame."""
+        self.frames_recorded += 1
+        for car in cars:
+            number = car.car_number
+            if car.slipstream_timer > 0:
+                self.slipstream_frames[number] = self.slipstream_frames.get(number, 0) + 1
+            if car.on_pitlane:
+                self.pit_frames[number] = self.pit_frames.get(number, 0) + 1
+            if self.last_lap.get(number, car.laps_completed) != car.laps_completed:
+                self.record_lap(current_frame, car)
+            self.last_lap[number] = car.laps_completed
+
+        if self.per_tick and current_frame % self.tick_interval == 0:
+            active = [car for car in cars if car.is_active]
+            count = len(active)
+            if not count:
+                return
+            buffer = self.writable("tick", count)
+            start, end = buffer.size, buffer.size + count
+            columns = buffer.columns
+            # One slice assignment per column keeps the per-frame cost to a handful of NumPy calls.
+            columns["frame"][start:end] = current_frame
+            columns["car_number"][start:end] = [car.car_number for car in active]
+            columns["laps_completed"][start:end] = [car.laps_completed for car in active]
+            columns["distance"][start:end] = [car.distance for car in active]
+            columns["speed"][start:end] = [car.speed for car in active]
+            columns["tire_percentage"][start:end] = [car.tire_percentage for car in active]
+            columns["tire_temperature"][start:end] = [car.tire_temperature for car in active]
+            columns["fuel_level"][start:end] = [car.fuel_level for car in active]
+            columns["slipstream_timer"][start:end] = [car.slipstream_timer for car in active]
+            columns["on_pitlane"][start:end] = [car.on_pitlane for car in active]
+            buffer.size = end
+
+    def record_lap(self, current_frame, car):
+        number = car.car_number
+        buffer = self.writable("lap")
+        row = buffer.size
+        columns = buffer.columns
+        columns["frame"][row] = current_frame
+        columns["car_number"][row] = number
+        columns["lap"][row] = car.laps_completed
+        columns["lap_time"][row] = car.lap_times[-1] if car.lap_times else np.nan
+        columns["tire_type"][row] = TIRE_TYPE_CODES.get(car.tire_type, -1)
+        columns["tire_percentage"][row] = car.tire_percentage
+        columns["tire_temperature"][row] = car.tire_temperature
+        columns["fuel_level"][row] = car.fuel_level
+        columns["slipstream_frames"][row] = self.slipstream_frames.pop(number, 0)
+        columns["pit_stops"][row] = getattr(car, "pit_stops", 0)
+        columns["pit_frames"][row] = self.pit_frames.pop(number, 0)
+        buffer.size += 1
+
+    def writable(self, stream, rows=1):
+        """Return a buffer with room for `rows` more rows, swapping in a fresh one if it is full."""
+        buffer = self.buffers[stream]
+        if buffer.size + rows > buffer.capacity:
+            self.pending.put((stream, self.parts[stream], buffer))
+            self.parts[stream] += 1
+            try:
+                buffer = self.spare[stream].get_nowait()
+            except queue.Empty:
+                columns = TICK_COLUMNS if stream == "tick" else LAP_COLUMNS
+                buffer = ColumnBuffer(columns, buffer.capacity)
+            self.buffers[stream] = buffer
+        return buffer
+
+    def writer_loop(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            stream, part, buffer = item
+            filename = os.path.join(self.path, f"{stream}_{part:04d}.npz")
+            try:
+                np.savez_compressed(filename, **{name: column[:buffer.size]
+                                                 for name, column in buffer.columns.items()})
+            except Exception as e:
+                # Any failure must not end the thread: writable() keeps handing it full buffers
+                # and only gets them back through the spare queue below.
+                print(f"Telemetry write failed for {filename}: {type(e).__name__}: {e}")
+                self.dropped_rows += buffer.size
+            buffer.size = 0
+            self.spare[stream].put(buffer)
+
+    def close(self):
+        """Flush the partially filled buffers and wait for the writer thread to finish."""
+        if self.closed:
+            return
+        self.closed = True
+        for stream in ("tick", "lap"):
+            buffer = self.buffers[stream]
+            if buffer.size:
+                self.pending.put((stream, self.parts[stream], buffer))
+                self.parts[stream] += 1
+                columns = TICK_COLUMNS if stream == "tick" else LAP_COLUMNS
+                self.buffers[stream] = ColumnBuffer(columns, buffer.capacity)
+        self.pending.put(None)
+        self.thread.join()
+
+
+def load_session(directory, session, stream="tick"):
+    """Concatenate all column files of one stream back into a dict of arrays."""
+    path = os.path.join(directory, session)
+    parts = sorted(name for name in os.listdir(path) if name.startswith(stream + "_") and name.endswith(".npz"))
+    columns = {}
+    for name in parts:
+        with np.load(os.path.join(path, name)) as data:
+            for key in data.files:
+                columns.setdefault(key, []).append(data[key])
+    return {key: np.concatenate(values) for key, values in columns.items()}
+
+
+def session_name(prefix="race"):
+    return time.strftime(f"{prefix}_%Y%m%d_%H%M%S")
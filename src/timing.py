@@ -0,0 +1,83 @@
+# timing.py
+
+import numpy as np
+from constants import MAX_LAPS, TIMING_LINES_PER_LAP
+import track
+
+
+class TimingLines:
+    """
+    Mini-sector timing lines spread evenly along the track, measured from the start/finish line.
+
+    Every car gets a fixed-size row holding the frame at which it crossed each line of the race,
+    so the interval between two cars is just the time difference at the last line both of them
+    have crossed. The rows can also be read back afterwards to draw gap charts.
+    """
+
+    def __init__(self, cars, laps=MAX_LAPS, fps=30.0):
+        self.fps = fps
+        self.line_spacing = track.current.total_track_length / TIMING_LINES_PER_LAP
+        # Line lap k holds the lines cars cross with k laps completed: lap 0 is the grid behind the
+        # start/finish line, and the finish is the first line of lap `laps`, so laps + 1 in total.
+        self.num_lines = (laps + 1) * TIMING_LINES_PER_LAP
+        self.rows = {car.car_number: row for row, car in enumerate(cars)}
+        self.crossing_frames = np.full((len(cars), self.num_lines), np.nan)
+        self.last_line = np.full(len(cars), -1, dtype=np.int64)
+        self.previous_distance = np.zeros(len(cars))
+        self.started = np.zeros(len(cars), dtype=bool)
+
+    def record(self, current_frame, cars):
+        """Store the crossing frame of every timing line passed since the previous frame."""
+        for car in cars:
+            row = self.rows.get(car.car_number)
+            if row is None:
+                continue
+            distance = car.adjusted_total_distance
+            line = min(int(distance // self.line_spacing), self.num_lines - 1)
+            if not self.started[row]:
+                # The first sample only sets the reference; no line has been crossed yet.
+                self.started[row] = True
+                self.last_line[row] = line
+                self.previous_distance[row] = distance
+                continue
+
+            last_line = self.last_line[row]
+            if line > last_line:
+                previous_distance = self.previous_distance[row]
+                travelled = distance - previous_distance
+                for crossed in range(last_line + 1, line + 1):
+                    if travelled > 0:
+                        # Interpolate inside the frame so the gaps are not quantised to 1/30 s.
+                        fraction = (crossed * self.line_spacing - previous_distance) / travelled
+                        fraction = min(max(fraction, 0.0), 1.0)
+                    else:
+                        fraction = 1.0
+                    self.crossing_frames[row, crossed] = current_frame - 1 + fraction
+                self.last_line[row] = line
+            self.previous_distance[row] = distance
+
+    def interval(self, car, car_ahead):
+        """
+        Return (laps_behind, seconds) between a car and the car ahead of it, or None if they
+        have not crossed a common timing line yet.
+        """
+        row = self.rows.get(car.car_number)
+        row_ahead = self.rows.get(car_ahead.car_number)
+        if row is None or row_ahead is None:
+            return None
+        common_line = min(self.last_line[row], self.last_line[row_ahead])
+        if common_line < 0:
+            return None
+        frame = self.crossing_frames[row, common_line]
+        frame_ahead = self.crossing_frames[row_ahead, common_line]
+        if np.isnan(frame) or np.isnan(frame_ahead):
+            return None
+        laps_behind = int(self.last_line[row_ahead] - self.last_line[row]) // TIMING_LINES_PER_LAP
+        return laps_behind, (frame - frame_ahead) / self.fps
+
+    def gap_history(self, car, reference_car):
+        """Gap in seconds to the reference car at every timing line both cars have crossed."""
+        row = self.rows[car.car_number]
+        reference_row = self.rows[reference_car.car_number]
+        gaps = (self.crossing_frames[row] - self.crossing_frames[reference_row]) / self.fps
+        return gaps[~np.isnan(gaps)]
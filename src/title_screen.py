@@ -1,6 +1,7 @@
 import pyxel
+import numpy as np
 from constants import CURRENT_VER, GAME_TITLE
-from pyxelunicode import PyxelUnicode
+from pyxelunicode import get_font
 
 # Import necessary constants and functions
 WINDOW_WIDTH = 500
@@ -24,54 +25,9 @@ dark_grass = 8
 
 
 def drawQuad(color, x1, y1, w1, x2, y2, w2):
-    points = [(x1 - w1, y1), (x2 - w2, y2), (x2 + w2, y2), (x1 + w1, y1)]
-    draw_polygon(points, color)
-
-def draw_polygon(points, color):
-    # Triangulate the polygon using the ear clipping algorithm
-    triangles = []
-    remaining_points = points.copy()
-    while len(remaining_points) >= 3:
-        # Find an "ear" triangle
-        for i in range(len(remaining_points)):
-            prev = remaining_points[(i - 1) % len(remaining_points)]
-            curr = remaining_points[i]
-            next = remaining_points[(i + 1) % len(remaining_points)]
-            if is_ear(prev, curr, next, remaining_points):
-                triangles.append((prev, curr, next))
-                remaining_points.remove(curr)
-                break
-
-    # Draw each triangle with the specified color
-    for triangle in triangles:
-        x1, y1 = triangle[0]
-        x2, y2 = triangle[1]
-        x3, y3 = triangle[2]
-        pyxel.tri(x1, y1, x2, y2, x3, y3, col=color)
-
-def is_ear(p1, p2, p3, polygon):
-    # Check if the triangle formed by p1, p2, p3 is an "ear"
-    if not is_ccw(p1, p2, p3):
-        return False
-    for point in polygon:
-        if point in (p1, p2, p3):
-            continue
-        if is_inside_triangle(p1, p2, p3, point):
-            return False
-    return True
-
-def is_ccw(p1, p2, p3):
-    # Check if the points p1, p2, p3 are in counter-clockwise order
-    # using the cross product method
-    return (p2[0] - p1[0]) * (p3[1] - p1[1]) > (p2[1] - p1[1]) * (p3[0] - p1[0])
-
-def is_inside_triangle(p1, p2, p3, point):
-    # Check if the point is inside the triangle formed by p1, p2, p3
-    u = ((p2[0] - p1[0]) * (point[1] - p1[1]) - (p2[1] - p1[1]) * (point[0] - p1[0])) / (
-            (p2[1] - p1[1]) * (p3[0] - p2[0]) - (p2[0] - p1[0]) * (p3[1] - p2[1]))
-    v = ((p3[0] - p2[0]) * (point[1] - p2[1]) - (p3[1] - p2[1]) * (point[0] - p2[0])) / (
-            (p2[1] - p1[1]) * (p3[0] - p2[0]) - (p2[0] - p1[0]) * (p3[1] - p2[1]))
-    return 0 <= u <= 1 and 0 <= v <= 1 and u + v <= 1
+    # A road quad is a trapezoid with horizontal top and bottom edges, so two triangles fill it
+    pyxel.tri(x1 - w1, y1, x2 - w2, y2, x2 + w2, y2, color)
+    pyxel.tri(x1 - w1, y1, x2 + w2, y2, x1 + w1, y1, color)
 
 # Define necessary colors
 light_grass = 3
@@ -79,28 +35,6 @@ dark_grass = 11
 white_rumble = 7
 dark_road = 13
 
-class Line:
-    def __init__(self, i):
-        self.i = i
-        self.x = self.y = self.z = 0.0  # game position (3D space)
-        self.X = self.Y = self.W = 0.0  # screen position (2D projection)
-        self.scale = 0.0  # scale from camera position
-        self.curve = 0.0  # curve radius
-        self.spriteX = 0.0  # sprite position X
-        self.clip = 0.0  # correct sprite Y position
-        self.sprite = None
-
-        self.grass_color = 0
-        self.rumble_color = 0
-        self.road_color = 0
-        self.stripe_color = 0
-
-    def project(self, camX, camY, camZ):
-        self.scale = camD / (self.z - camZ)
-        self.X = (1 + self.scale * (self.x - camX)) * WINDOW_WIDTH / 2
-        self.Y = (1 - self.scale * (self.y - camY)) * WINDOW_HEIGHT / 2
-        self.W = self.scale * roadW * WINDOW_WIDTH / 2
-
 class RoadEffect:
     def __init__(self):
         self.pos = 0
@@ -109,103 +43,76 @@ class RoadEffect:
         self.speed = 800  # constant speed for title screen
         self.linespr = 0
 
-        # Create road lines for each segment
-        self.lines = []
+        # Road lines for each segment, stored as one array per attribute
         N = 1600
-        for i in range(N):
-            line = Line(i)
-            line.z = i * segL + 0.00001
-
-            # Change color every other 3 lines
-            grass_color = light_grass if (i // 40) % 2 else dark_grass
-            rumble_color = 8 if (i // 15) % 2 else 7
-            road_color = dark_road
-            stripe_color = dark_road
-
-            line.grass_color = grass_color
-            line.rumble_color = rumble_color
-            line.road_color = road_color
-            line.stripe_color = stripe_color
+        i = np.arange(N)
+        self.z = i * segL + 0.00001  # game position (3D space)
+        self.y = np.zeros(N)
+        self.curve = np.zeros(N)  # curve radius
 
-            # Right curve
-            if 300 < i < 400:
-                line.curve = 2.2
+        # Change color every other 3 lines
+        self.grass_color = np.where((i // 40) % 2, light_grass, dark_grass)
+        self.rumble_color = np.where((i // 15) % 2, 8, 7)
+        self.road_color = np.full(N, dark_road)
+        self.stripe_color = np.full(N, dark_road)
 
-            # Uphill and downhill
-            if 1600 > i > 750:
-                line.y = pyxel.sin((i / 30.0) * 180 / 3.14159265358979323846) * 1500
+        # Right curve
+        self.curve[(300 < i) & (i < 400)] = 2.2
 
-            # Left curve
-            if i > 1100:
-                line.curve = -0.7
+        # Uphill and downhill (pyxel.sin takes degrees)
+        hills = (1600 > i) & (i > 750)
+        self.y[hills] = np.sin(np.radians((i[hills] / 30.0) * 180 / 3.14159265358979323846)) * 1500
 
-            self.lines.append(line)
+        # Left curve
+        self.curve[i > 1100] = -0.7
 
     def update(self):
         # Update the road effect state
         self.pos += self.speed
-        N = len(self.lines)
+        N = len(self.z)
         while self.pos >= N * segL:
             self.pos -= N * segL
 
+    def project(self):
+        """Project the previous line and all visible lines at once.
+        Returns the line indices and their screen X, Y and half road width W."""
+        N = len(self.z)
+        startPos = int(self.pos // segL)
+        n = np.arange(startPos - 1, startPos + show_N_seg)
+        idx = n % N
+        camH = self.y[startPos] + self.playerY
+        camZ = self.pos - np.where(n >= N, N * segL, 0)
+
+        # Curve offset on the x axis: every line shifts by the accumulated curvature of the lines before it
+        curve = self.curve[idx[1:]]
+        dx = np.concatenate(([0.0], np.cumsum(curve[:-1])))
+        x = np.concatenate(([0.0, 0.0], np.cumsum(dx[:-1])))
+
+        scale = camD / (self.z[idx] - camZ)
+        X = (1 + scale * (x - self.playerX)) * WINDOW_WIDTH / 2
+        Y = (1 - scale * (self.y[idx] - camH)) * WINDOW_HEIGHT / 2
+        W = scale * roadW * WINDOW_WIDTH / 2
+        return idx, X, Y, W
+
     def draw(self):
         # Draw the road effect
         pyxel.cls(6)  # Sky color
 
-        lines = self.lines
-        N = len(lines)
-        startPos = int(self.pos // segL)
-        x = dx = 0.0  # Curve offset on x axis
-        camH = lines[startPos].y + self.playerY
-        maxy = WINDOW_HEIGHT
+        idx, X, Y, W = self.project()
+        # A line is drawn only if it is above every line in front of it (hidden surface clipping)
+        clip = np.minimum.accumulate(np.concatenate(([WINDOW_HEIGHT], Y[1:-1])))
+        visible = np.nonzero(Y[1:] < clip)[0] + 1
 
-        for n in range(startPos, startPos + show_N_seg):
-            current = lines[n % N]
-            current.project(self.playerX - x, camH, self.pos - (N * segL if n >= N else 0))
-            x += dx
-            dx += current.curve
-            current.clip = maxy
-            if current.Y >= maxy:
-                continue
-            maxy = current.Y
-            prev = lines[(n - 1) % N]
+        X, Y, W = X.tolist(), Y.tolist(), W.tolist()
+        for k in visible.tolist():
+            line = idx[k]
+            x1, y1, w1 = X[k - 1], Y[k - 1], W[k - 1]
+            x2, y2, w2 = X[k], Y[k], W[k]
             # Draw the road segments
-            drawQuad(
-                current.grass_color,
-                0,
-                prev.Y,
-                WINDOW_WIDTH,
-                0,
-                current.Y,
-                WINDOW_WIDTH,
-            )
-            drawQuad(
-                current.rumble_color,
-                prev.X,
-                prev.Y,
-                prev.W * 1.25,
-                current.X,
-                current.Y,
-                current.W * 1.25,
-            )
-            drawQuad(
-                current.road_color,
-                prev.X,
-                prev.Y,
-                prev.W,
-                current.X,
-                current.Y,
-                current.W,
-            )
-            drawQuad(
-                current.stripe_color,
-                prev.X,
-                prev.Y,
-                prev.W * 0.90,
-                current.X,
-                current.Y,
-                current.W * 0.90,
-            )
+            pyxel.rect(0, y2, WINDOW_WIDTH, y1 - y2 + 1, self.grass_color[line])
+            drawQuad(self.rumble_color[line], x1, y1, w1 * 1.25, x2, y2, w2 * 1.25)
+            drawQuad(self.road_color[line], x1, y1, w1, x2, y2, w2)
+            drawQuad(self.stripe_color[line], x1, y1, w1 * 0.90, x2, y2, w2 * 0.90)
 
 def reset_palette():
     default_colors = [
@@ -222,7 +129,7 @@ class TitleScreen:
         self.game = game
         self.font_path = str(self.game.font_path)
         self.font_size = 16
-        self.pyunititle = PyxelUnicode(self.font_path, self.font_size)
+        self.pyunititle = get_font(self.font_path, self.font_size)
         self.pyuni = self.game.pyuni
         self.title_text = GAME_TITLE
         self.subtitle_text = "Press any key to continue"
@@ -1,9 +1,22 @@
+import hashlib
 import json
 import math
+from bisect import bisect_right
 import numpy as np
-from scipy.interpolate import splprep, splev
 from pathlib import Path
 
+# Version of the compiled track bundle (.npz next to the track .json); bump when its layout changes
+BUNDLE_VERSION = 1
+# Bundle entries stored as arrays; every other compiled value is a scalar kept in the bundle's metadata
+BUNDLE_ARRAYS = (
+    "ORIGINAL_TRACK_POINTS", "ORIGINAL_PIT_LANE_POINTS", "TRACK_POINTS", "CUMULATIVE_DISTANCES",
+    "ANGLE_DIFFS", "DESIRED_SPEEDS", "PIT_LANE_POINTS", "PIT_LANE_CUMULATIVE_DISTANCES",
+)
+BUNDLE_SCALARS = (
+    "TRACK_MAX_LAPS", "START_FINISH_INDEX", "TOTAL_TRACK_LENGTH", "START_FINISH_INDEX_SMOOTHED",
+    "PIT_LANE_TOTAL_LENGTH", "PITLANE_ENTRANCE_DISTANCE", "PITLANE_EXIT_DISTANCE", "PIT_STOP_POINT",
+)
+
 def load_track(file_path):
     with open(file_path, 'r') as file:
         track_data = json.load(file)
@@ -66,8 +79,8 @@ def get_position_along_track(distance, points, cumulative_distances):
 
     distance %= total_length
 
-    # Find the segment using binary search
-    idx = np.searchsorted(cumulative_distances, distance, side='right') - 1
+    # Find the segment using binary search (bisect avoids converting the list to an array on every call)
+    idx = bisect_right(cumulative_distances, distance) - 1
 
     # Clamp
     idx = max(0, min(idx, len(points) - 2))
@@ -89,7 +102,7 @@ def get_position_along_track(distance, points, cumulative_distances):
 def get_desired_speed_at_distance(distance, distances_array, speeds_array, total_length, car):
     distance %= total_length
     # Find which segment we are in:
-    idx = np.searchsorted(distances_array, distance, side='right') - 1
+    idx = int(distances_array.searchsorted(distance, side='right')) - 1
 
     # Clamp idx to valid range
     idx = max(0, min(idx, len(distances_array) - 2))
@@ -111,6 +124,9 @@ def get_desired_speed_at_distance(distance, distances_array, speeds_array, total
     return base_speed * car.aero_efficiency * car.engine_power
 
 def smooth_track(points, num_points=200, per=False):
+    # scipy is only needed when a track is compiled from its control points, not for bundles
+    from scipy.interpolate import splprep, splev
+
     # Remove duplicate points
     unique_points = []
     seen = set()
@@ -154,18 +170,6 @@ def get_distance_along_track(x, y, points, cumulative_distances):
             closest_distance = cumulative_distances[i]
     return closest_distance
 
-# Load track and compute necessary data
-track_path = Path(__file__).resolve().parent.parent / "tracks" / "track.json"
-ORIGINAL_TRACK_POINTS, START_FINISH_INDEX, ORIGINAL_PIT_LANE_POINTS = load_track(track_path)
-
-# Extract the coordinates of the start-finish point
-start_finish_point = ORIGINAL_TRACK_POINTS[START_FINISH_INDEX]
-
-# Smooth the track
-TRACK_POINTS = smooth_track(ORIGINAL_TRACK_POINTS, per=True)
-CUMULATIVE_DISTANCES = compute_cumulative_distances(TRACK_POINTS)
-TOTAL_TRACK_LENGTH = CUMULATIVE_DISTANCES[-1]
-
 # Find the new index of the start-finish point in the smoothed track
 def find_closest_point_index(point, points):
     min_dist = float('inf')
@@ -178,38 +182,171 @@ def find_closest_point_index(point, points):
             closest_index = i
     return closest_index
 
-START_FINISH_INDEX_SMOOTHED = find_closest_point_index(start_finish_point, TRACK_POINTS)
-
-ANGLE_DIFFS = compute_angle_differences(TRACK_POINTS)
 MAX_SPEED = 0.7  # Adjust as needed
 MIN_SPEED = 0.0001  # Adjust as needed
-DESIRED_SPEEDS = compute_desired_speeds(ANGLE_DIFFS, MAX_SPEED, MIN_SPEED)
-DESIRED_SPEEDS_LIST = list(zip(CUMULATIVE_DISTANCES[:-1], DESIRED_SPEEDS))
-DISTANCES_ARRAY = np.array([d for d, _ in DESIRED_SPEEDS_LIST], dtype=np.float64)
-SPEEDS_ARRAY    = np.array([s for _, s in DESIRED_SPEEDS_LIST], dtype=np.float64)
-
-# Process pitlane points
-if ORIGINAL_PIT_LANE_POINTS:
-    # Use the first and last points directly (entrance and exit)
-    pitlane_entrance_point = ORIGINAL_PIT_LANE_POINTS[0]
-    pitlane_exit_point = ORIGINAL_PIT_LANE_POINTS[-1]
-
-    # Smooth the pitlane without making it a closed loop
-    PIT_LANE_POINTS = smooth_track(ORIGINAL_PIT_LANE_POINTS, per=False)
-    PIT_LANE_CUMULATIVE_DISTANCES = compute_cumulative_distances(PIT_LANE_POINTS)
-    PIT_LANE_TOTAL_LENGTH = PIT_LANE_CUMULATIVE_DISTANCES[-1]
-
-    # Compute pitlane entrance and exit distances along the track
-    PITLANE_ENTRANCE_DISTANCE = get_distance_along_track(
-        pitlane_entrance_point[0], pitlane_entrance_point[1], TRACK_POINTS, CUMULATIVE_DISTANCES)
-    PITLANE_EXIT_DISTANCE = get_distance_along_track(
-        pitlane_exit_point[0], pitlane_exit_point[1], TRACK_POINTS, CUMULATIVE_DISTANCES)
-    # Pitstop point is the middle of the pitlane
-    PIT_STOP_POINT = PIT_LANE_TOTAL_LENGTH / 2
-else:
-    PIT_LANE_POINTS = []
-    PIT_LANE_CUMULATIVE_DISTANCES = []
-    PIT_LANE_TOTAL_LENGTH = 0
-    PITLANE_ENTRANCE_DISTANCE = 0
-    PITLANE_EXIT_DISTANCE = 0
-    PIT_STOP_POINT = 0
+
+def compile_track(file_path):
+    """
+    Load a track file and derive everything the simulation needs from it.
+    Returns a dict keyed by the track constant names, see CompiledTrack.
+    """
+    with open(file_path, 'r') as file:
+        track_data = json.load(file)
+    return compile_track_data(track_data, file_path)
+
+def compile_track_data(track_data, file_path=None):
+    """Compile track data in the track file format (e.g. a layout still being edited)."""
+    max_laps = track_data.get('max_laps')
+    original_track_points = track_data['points']
+    start_finish_index = track_data.get('start_finish_index', 0)
+    original_pit_lane_points = track_data.get('pit_lane_points', [])
+
+    # Extract the coordinates of the start-finish point
+    start_finish_point = original_track_points[start_finish_index]
+
+    # Smooth the track
+    track_points = smooth_track(original_track_points, per=True)
+    cumulative_distances = compute_cumulative_distances(track_points)
+    total_track_length = cumulative_distances[-1]
+
+    start_finish_index_smoothed = find_closest_point_index(start_finish_point, track_points)
+
+    angle_diffs = compute_angle_differences(track_points)
+    desired_speeds = compute_desired_speeds(angle_diffs, MAX_SPEED, MIN_SPEED)
+    desired_speeds_list = list(zip(cumulative_distances[:-1], desired_speeds))
+
+    # Process pitlane points
+    if original_pit_lane_points:
+        # Use the first and last points directly (entrance and exit)
+        pitlane_entrance_point = original_pit_lane_points[0]
+        pitlane_exit_point = original_pit_lane_points[-1]
+
+        # Smooth the pitlane without making it a closed loop
+        pit_lane_points = smooth_track(original_pit_lane_points, per=False)
+        pit_lane_cumulative_distances = compute_cumulative_distances(pit_lane_points)
+        pit_lane_total_length = pit_lane_cumulative_distances[-1]
+
+        # Compute pitlane entrance and exit distances along the track
+        pitlane_entrance_distance = get_distance_along_track(
+            pitlane_entrance_point[0], pitlane_entrance_point[1], track_points, cumulative_distances)
+        pitlane_exit_distance = get_distance_along_track(
+            pitlane_exit_point[0], pitlane_exit_point[1], track_points, cumulative_distances)
+        # Pitstop point is the middle of the pitlane
+        pit_stop_point = pit_lane_total_length / 2
+    else:
+        pit_lane_points = []
+        pit_lane_cumulative_distances = []
+        pit_lane_total_length = 0
+        pitlane_entrance_distance = 0
+        pitlane_exit_distance = 0
+        pit_stop_point = 0
+
+    return {
+        "TRACK_FILE": str(file_path) if file_path is not None else None,
+        "TRACK_MAX_LAPS": max_laps,
+        "ORIGINAL_TRACK_POINTS": original_track_points,
+        "START_FINISH_INDEX": start_finish_index,
+        "ORIGINAL_PIT_LANE_POINTS": original_pit_lane_points,
+        "TRACK_POINTS": track_points,
+        "CUMULATIVE_DISTANCES": cumulative_distances,
+        "TOTAL_TRACK_LENGTH": total_track_length,
+        "START_FINISH_INDEX_SMOOTHED": start_finish_index_smoothed,
+        "ANGLE_DIFFS": angle_diffs,
+        "DESIRED_SPEEDS": desired_speeds,
+        "DESIRED_SPEEDS_LIST": desired_speeds_list,
+        "DISTANCES_ARRAY": np.array([d for d, _ in desired_speeds_list], dtype=np.float64),
+        "SPEEDS_ARRAY": np.array([s for _, s in desired_speeds_list], dtype=np.float64),
+        "PIT_LANE_POINTS": pit_lane_points,
+        "PIT_LANE_CUMULATIVE_DISTANCES": pit_lane_cumulative_distances,
+        "PIT_LANE_TOTAL_LENGTH": pit_lane_total_length,
+        "PITLANE_ENTRANCE_DISTANCE": pitlane_entrance_distance,
+        "PITLANE_EXIT_DISTANCE": pitlane_exit_distance,
+        "PIT_STOP_POINT": pit_stop_point,
+    }
+
+def bundle_path(file_path):
+    return Path(file_path).with_suffix(".npz")
+
+def source_hash(file_path):
+    with open(file_path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+def save_track_bundle(compiled, file_path):
+    """
+    Write a compiled track next to its .json file, so the game can load it without smoothing
+    the track again (and without scipy). The bundle records a hash of the .json it was built from.
+    """
+    meta = {name: compiled[name] for name in BUNDLE_SCALARS}
+    meta["BUNDLE_VERSION"] = BUNDLE_VERSION
+    meta["SOURCE_HASH"] = source_hash(file_path)
+    arrays = {name: np.asarray(compiled[name]) for name in BUNDLE_ARRAYS}
+    path = bundle_path(file_path)
+    with open(path, 'wb') as file:
+        np.savez(file, META=np.array(json.dumps(meta)), **arrays)
+    return path
+
+def load_track_bundle(file_path):
+    """
+    Load the compiled bundle of a track file, or return None if there is none or it is out of
+    date (the .json changed since the bundle was written, or the bundle layout changed).
+    """
+    path = bundle_path(file_path)
+    if not path.exists():
+        return None
+    try:
+        with np.load(path) as bundle:
+            meta = json.loads(str(bundle["META"]))
+            if meta.get("BUNDLE_VERSION") != BUNDLE_VERSION or meta.get("SOURCE_HASH") != source_hash(file_path):
+                return None
+            arrays = {name: bundle[name].tolist() for name in BUNDLE_ARRAYS}
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Ignoring track bundle {path}: {e}")
+        return None
+
+    # Restore the same container types compile_track() produces
+    for name in ("TRACK_POINTS", "PIT_LANE_POINTS"):
+        arrays[name] = [tuple(point) for point in arrays[name]]
+    compiled = {"TRACK_FILE": str(file_path)}
+    compiled.update({name: meta[name] for name in BUNDLE_SCALARS})
+    compiled.update(arrays)
+    desired_speeds_list = list(zip(compiled["CUMULATIVE_DISTANCES"][:-1], compiled["DESIRED_SPEEDS"]))
+    compiled["DESIRED_SPEEDS_LIST"] = desired_speeds_list
+    compiled["DISTANCES_ARRAY"] = np.array([d for d, _ in desired_speeds_list], dtype=np.float64)
+    compiled["SPEEDS_ARRAY"] = np.array([s for _, s in desired_speeds_list], dtype=np.float64)
+    return compiled
+
+def load_compiled_track(file_path):
+    """Compiled track data, from the bundle when it is up to date, otherwise compiled from the .json."""
+    return load_track_bundle(file_path) or compile_track(file_path)
+
+class CompiledTrack:
+    """
+    A compiled track with attribute access. The attribute names are the compiled keys in lower
+    case (track_points, total_track_length, pitlane_exit_distance, ...).
+    """
+
+    def __init__(self, compiled):
+        for name, value in compiled.items():
+            setattr(self, name.lower(), value)
+        self.fingerprint = track_fingerprint(compiled)
+
+def track_fingerprint(compiled):
+    """8-byte digest of the smoothed track and pit lane, identifying the layout a race ran on."""
+    digest = hashlib.sha256()
+    for name in ("TRACK_POINTS", "PIT_LANE_POINTS"):
+        digest.update(np.asarray(compiled[name], dtype=np.float64).tobytes())
+    return digest.digest()[:8]
+
+def use_track(compiled):
+    """
+    Make a compiled track the active one (track.current).
+    The simulation reads the active track through track.current whenever it needs it, so it must
+    not be imported by name. Only one track can be active per process; batch runners switch
+    tracks between jobs.
+    """
+    global current
+    current = CompiledTrack(compiled)
+
+# The default track is active until use_track() switches to another one
+track_path = Path(__file__).resolve().parent.parent / "tracks" / "track.json"
+current = CompiledTrack(load_compiled_track(track_path))
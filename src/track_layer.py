@@ -0,0 +1,69 @@
+# track_layer.py
+
+import pyxel
+import track
+
+PITBOX_SIZE = 10
+
+
+class TrackLayer:
+    """
+    The static part of a session scene (track, start/finish line, pit lane and team pitboxes),
+    rendered once into an off-screen image and copied to the screen with a single blt.
+
+    The image stores palette indices, so changing pyxel.colors needs no rebuild; the layer is
+    only redrawn when the track or the teams' pitbox positions or palette indices change.
+    """
+
+    def __init__(self):
+        self.image = None
+        self.key = None
+
+    def layer_key(self, teams_data):
+        pitboxes = tuple(
+            (tuple(team["pitbox_coords"]), team.get("color_index", 1)) for team in teams_data
+        )
+        return track.current.track_file, pyxel.width, pyxel.height, pitboxes
+
+    def render(self, teams_data):
+        width, height = pyxel.width, pyxel.height
+        if self.image is None or self.image.width != width or self.image.height != height:
+            self.image = pyxel.Image(width, height)
+        image = self.image
+        image.cls(0)
+        current = track.current
+
+        # Track
+        for i in range(len(current.track_points) - 1):
+            x1, y1 = current.track_points[i]
+            x2, y2 = current.track_points[i + 1]
+            image.line(x1, y1, x2, y2, 1)
+
+        # Start/finish line
+        sx, sy = current.track_points[current.start_finish_index_smoothed]
+        sx_next, sy_next = current.track_points[(current.start_finish_index_smoothed + 1) % len(current.track_points)]
+        image.line(sx, sy, sx_next, sy_next, 2)
+
+        # Pit lane
+        for i in range(len(current.pit_lane_points) - 1):
+            x1, y1 = current.pit_lane_points[i]
+            x2, y2 = current.pit_lane_points[i + 1]
+            image.line(x1, y1, x2, y2, 13)
+
+        # Team pitboxes, filled with the team's palette index
+        for team in teams_data:
+            pit_x, pit_y = team["pitbox_coords"]
+            top_left_x = pit_x - PITBOX_SIZE // 2
+            top_left_y = pit_y - PITBOX_SIZE // 2
+            team_color = team.get("color_index", 1)
+            image.rect(top_left_x, top_left_y, PITBOX_SIZE // 2, PITBOX_SIZE // 2, team_color)
+            image.rectb(top_left_x, top_left_y, PITBOX_SIZE // 2, PITBOX_SIZE // 2, 1)
+
+    def draw(self, teams_data):
+        """Blit the layer to the screen, rebuilding it first if the scene changed."""
+        key = self.layer_key(teams_data)
+        if key != self.key:
+            self.render(teams_data)
+            self.key = key
+        # Colour 0 is transparent so anything already drawn on the black background stays visible.
+        pyxel.blt(0, 0, self.image, 0, 0, self.image.width, self.image.height, 0)
@@ -0,0 +1,104 @@
+import concurrent.futures
+from dataclasses import dataclass
+import numpy as np
+
+# trackbuilder.py puts the game's src directory on sys.path before importing this module
+import track
+from track import compile_track_data, use_track, get_desired_speed_at_distance
+from car import Car
+
+FPS = 30
+PROFILE_SAMPLES = 100
+CORNER_SPEED_RATIO = 0.9  # a speed minimum below this share of the top speed counts as a corner
+
+
+@dataclass
+class LapPreviewResult:
+    lap_time: float  # seconds
+    top_speed: float
+    corner_speeds: list  # (distance, apex speed) per corner, in track order
+    profile: np.ndarray  # speed at PROFILE_SAMPLES evenly spaced distances around the lap
+
+
+def simulate_lap(track_data):
+    """
+    Drive one flying lap of the layout with a single car, using the game's car model.
+    The smoothed line is a periodic spline through every control point, so any edit moves the
+    whole line and the lap is always simulated from the start.
+    """
+    compiled = compile_track_data(track_data)
+    # Runs in the preview's own worker process, so switching the active track there is safe.
+    use_track(compiled)
+    total_length = compiled["TOTAL_TRACK_LENGTH"]
+
+    car = Car(1, 0, "Preview", 0, None, mode='qualifying')
+    car.on_pitlane = False
+    car.distance = 0.0
+    # Rolling start at the desired speed, so the lap approximates a flying lap
+    car.speed = get_desired_speed_at_distance(
+        0.0, track.current.distances_array, track.current.speeds_array, total_length, car)
+    frame = 0
+    distances, speeds = [], []
+
+    previous_distance = car.distance
+    while car.distance < total_length and car.is_active:
+        car.update_fuel()
+        car.update_tires()
+        car.update_speed()
+        distances.append(car.distance)
+        speeds.append(car.speed)
+        previous_distance = car.distance
+        car.distance += car.speed
+        frame += 1
+
+    # Interpolate the moment the line is crossed inside the last frame
+    last_step = car.distance - previous_distance
+    overshoot = (car.distance - total_length) / last_step if last_step > 0 else 0.0
+    lap_time = (frame - overshoot) / FPS
+
+    speed_array = np.asarray(speeds)
+    distance_array = np.asarray(distances)
+    top_speed = float(speed_array.max()) if len(speed_array) else 0.0
+    inner = speed_array[1:-1]
+    apexes = np.nonzero((inner < speed_array[:-2]) & (inner <= speed_array[2:])
+                        & (inner < CORNER_SPEED_RATIO * top_speed))[0] + 1
+    corner_speeds = [(float(distance_array[i]), float(speed_array[i])) for i in apexes]
+    profile = np.interp(np.linspace(0.0, total_length, PROFILE_SAMPLES), distance_array, speed_array)
+    return LapPreviewResult(lap_time, top_speed, corner_speeds, profile)
+
+
+class LapPreview:
+    """
+    Runs lap simulations for the layout being edited in a worker process, which has its own
+    active track.
+    The editor calls request() after an edit and poll() every frame; it never waits on the worker.
+    Only the newest pending layout is simulated when the worker becomes free.
+    """
+
+    def __init__(self):
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+        self.future = None
+        self.pending = None
+        self.result = None
+        self.error = None
+
+    @property
+    def busy(self):
+        return self.future is not None or self.pending is not None
+
+    def request(self, track_data):
+        self.pending = track_data
+        self.poll()
+
+    def poll(self):
+        if self.future is not None and self.future.done():
+            try:
+                self.result = self.future.result()
+                self.error = None
+            except Exception as e:
+                print(f"Lap preview failed: {e}")
+                self.error = str(e)
+            self.future = None
+        if self.future is None and self.pending is not None:
+            self.future = self.executor.submit(simulate_lap, self.pending)
+            self.pending = None
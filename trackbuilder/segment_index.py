@@ -0,0 +1,165 @@
+import math
+from dataclasses import dataclass
+
+
+@dataclass
+class Projection:
+    point: tuple  # closest point on the polyline
+    segment: int  # index of the segment (points[segment] -> points[segment + 1])
+    t: float  # position along that segment, 0..1
+    arc_length: float  # distance from the first point along the polyline
+    distance: float  # distance from the query point
+
+
+class CellMap(dict):
+    """Cell -> item indices, keeping the bounding box of the occupied cells up to date."""
+
+    def __init__(self):
+        super().__init__()
+        self.bounds = None  # (min cx, min cy, max cx, max cy), None while empty
+
+    def add(self, key, item):
+        self.setdefault(key, []).append(item)
+        if self.bounds is None:
+            self.bounds = (key[0], key[1], key[0], key[1])
+        else:
+            x1, y1, x2, y2 = self.bounds
+            self.bounds = (min(x1, key[0]), min(y1, key[1]), max(x2, key[0]), max(y2, key[1]))
+
+    def remove(self, key, item):
+        items = self[key]
+        items.remove(item)
+        if items:
+            return
+        del self[key]
+        # Only emptying a cell on the edge of the box can shrink it (undo, so rarely)
+        x1, y1, x2, y2 = self.bounds
+        if key[0] in (x1, x2) or key[1] in (y1, y2):
+            self.bounds = None
+            if self:
+                xs = [cx for cx, _ in self]
+                ys = [cy for _, cy in self]
+                self.bounds = (min(xs), min(ys), max(xs), max(ys))
+
+
+class SegmentIndex:
+    """
+    Uniform-grid spatial index over the vertices and segments of a polyline that grows and
+    shrinks at its end (add point / undo), so snapping queries only look at nearby cells
+    instead of scanning every control point.
+    """
+
+    def __init__(self, cell_size=25):
+        self.cell_size = cell_size
+        self.points = []
+        self.cumulative_lengths = []  # arc length at each vertex
+        self.vertex_cells = CellMap()  # cell -> vertex indices
+        self.segment_cells = CellMap()  # cell -> segment indices
+        self.segment_cell_keys = []  # cells each segment was inserted into, for removal
+
+    def __len__(self):
+        return len(self.points)
+
+    def cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def append(self, point):
+        point = (point[0], point[1])
+        index = len(self.points)
+        if self.points:
+            px, py = self.points[-1]
+            self.cumulative_lengths.append(self.cumulative_lengths[-1] + math.hypot(point[0] - px, point[1] - py))
+        else:
+            self.cumulative_lengths.append(0.0)
+        self.points.append(point)
+        self.vertex_cells.add(self.cell(*point), index)
+        if index > 0:
+            self.insert_segment(index - 1)
+
+    def pop(self):
+        """Remove the last point (and the segment ending in it)."""
+        index = len(self.points) - 1
+        if index < 0:
+            return None
+        if index > 0:
+            for key in self.segment_cell_keys.pop():
+                self.segment_cells.remove(key, index - 1)
+        point = self.points.pop()
+        self.cumulative_lengths.pop()
+        self.vertex_cells.remove(self.cell(*point), index)
+        return point
+
+    def insert_segment(self, segment):
+        (x1, y1), (x2, y2) = self.points[segment], self.points[segment + 1]
+        # Every cell overlapped by the segment's bounding box; segments are short compared to the
+        # cell size in practice, so this stays a handful of cells.
+        cx1, cy1 = self.cell(min(x1, x2), min(y1, y2))
+        cx2, cy2 = self.cell(max(x1, x2), max(y1, y2))
+        keys = [(cx, cy) for cx in range(cx1, cx2 + 1) for cy in range(cy1, cy2 + 1)]
+        for key in keys:
+            self.segment_cells.add(key, segment)
+        self.segment_cell_keys.append(keys)
+
+    def ring(self, cx, cy, radius):
+        """Cells at Chebyshev distance `radius` from (cx, cy)."""
+        if radius == 0:
+            yield cx, cy
+            return
+        for dx in range(-radius, radius + 1):
+            yield cx + dx, cy - radius
+            yield cx + dx, cy + radius
+        for dy in range(-radius + 1, radius):
+            yield cx - radius, cy + dy
+            yield cx + radius, cy + dy
+
+    def search(self, cells, x, y, measure):
+        """
+        Expand rings of cells around (x, y) until no unvisited cell can hold anything closer.
+        measure(item) returns (distance, result) for an item stored in `cells` (a CellMap).
+        """
+        if not cells:
+            return None
+        cx, cy = self.cell(x, y)
+        # Rings beyond the farthest corner of the occupied cells' bounding box are empty
+        x1, y1, x2, y2 = cells.bounds
+        max_radius = max(abs(x1 - cx), abs(x2 - cx), abs(y1 - cy), abs(y2 - cy))
+        best = None
+        seen = set()
+        for radius in range(max_radius + 1):
+            for key in self.ring(cx, cy, radius):
+                for item in cells.get(key, ()):
+                    if item in seen:
+                        continue
+                    seen.add(item)
+                    candidate = measure(item)
+                    # Ties go to the lowest index, like a linear scan would
+                    if best is None or candidate[0] < best[0] or (candidate[0] == best[0] and item < best[1]):
+                        best = (candidate[0], item, candidate[1])
+            # Anything in the next ring is at least radius * cell_size away
+            if best is not None and best[0] <= radius * self.cell_size:
+                break
+        return best
+
+    def nearest_vertex(self, x, y):
+        """Index of the closest control point, or None if there are none."""
+        best = self.search(self.vertex_cells, x, y,
+                           lambda i: (math.hypot(self.points[i][0] - x, self.points[i][1] - y), None))
+        return best[1] if best else None
+
+    def project(self, x, y):
+        """Exact closest point on the polyline as a Projection, or None if it has no points."""
+        if len(self.points) == 1:
+            px, py = self.points[0]
+            return Projection((px, py), 0, 0.0, 0.0, math.hypot(px - x, py - y))
+        best = self.search(self.segment_cells, x, y, lambda segment: self.project_on_segment(segment, x, y))
+        return best[2] if best else None
+
+    def project_on_segment(self, segment, x, y):
+        (x1, y1), (x2, y2) = self.points[segment], self.points[segment + 1]
+        dx, dy = x2 - x1, y2 - y1
+        length_squared = dx * dx + dy * dy
+        t = 0.0 if length_squared == 0 else max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / length_squared))
+        px, py = x1 + t * dx, y1 + t * dy
+        distance = math.hypot(px - x, py - y)
+        arc_length = self.cumulative_lengths[segment] + t * math.sqrt(length_squared)
+        return distance, Projection((px, py), segment, t, arc_length, distance)
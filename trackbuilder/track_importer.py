@@ -0,0 +1,293 @@
+"""
+Import real circuit layouts from coordinate traces (CSV or GeoJSON) into the track file format.
+
+A trace of tens of thousands of points is read in chunks, projected onto the 500x500 canvas and
+decimated with Ramer-Douglas-Peucker to a few dozen control points, which the builder and the
+game's track compiler smooth in milliseconds.
+
+Usage (from the trackbuilder directory):
+    python track_importer.py monza.geojson -o ../tracks/monza.json
+    python track_importer.py lap_trace.csv -o ../tracks/trace.json --max-points 60
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+from pathlib import Path
+import numpy as np
+
+CANVAS_SIZE = 500
+CANVAS_MARGIN = 30  # keeps the track clear of the screen edges
+CHUNK_ROWS = 65536
+EARTH_RADIUS = 6371000.0  # metres
+DEFAULT_EPSILON = 1.0  # canvas pixels; points closer than this to the simplified line are dropped
+DEFAULT_MAX_POINTS = 80
+DEFAULT_MAX_LAPS = 10
+CLOSED_TOLERANCE = 0.02  # a trace ending within this share of its extent of the start is a loop
+
+X_COLUMNS = ("x", "lon", "lng", "long", "longitude")
+Y_COLUMNS = ("y", "lat", "latitude")
+GEOGRAPHIC_COLUMNS = ("lon", "lng", "long", "longitude", "lat", "latitude")
+
+
+def is_number(value):
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def read_csv_chunks(file_path, chunk_rows=CHUNK_ROWS):
+    """
+    Yield (chunk, geographic) pairs from a CSV trace, `chunk` being an (n, 2) array of x/y (or
+    lon/lat) values. Columns are picked by header name (x/y, lon/lat, ...); without a header the
+    first two columns are used.
+    """
+    with open(file_path, "r", newline="") as file:
+        sample = file.read(4096)
+        file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t ")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(file, dialect)
+
+        first = next(reader, None)
+        if first is None:
+            return
+        columns, geographic, pending = (0, 1), False, [first]
+        if not all(is_number(value) for value in first[:2]):
+            header = [name.strip().lower() for name in first]
+            x_column = next((header.index(name) for name in X_COLUMNS if name in header), None)
+            y_column = next((header.index(name) for name in Y_COLUMNS if name in header), None)
+            if x_column is None or y_column is None:
+                raise ValueError(f"{file_path}: no x/y or lon/lat columns in header {first}")
+            columns = (x_column, y_column)
+            geographic = header[x_column] in GEOGRAPHIC_COLUMNS
+            pending = []
+
+        rows = itertools.chain(pending, reader)
+        while True:
+            chunk = [(row[columns[0]], row[columns[1]]) for row in itertools.islice(rows, chunk_rows) if row]
+            if not chunk:
+                break
+            yield np.asarray(chunk, dtype=np.float64), geographic
+
+
+def read_geojson(file_path):
+    """
+    Return the longest line in a GeoJSON file as an (n, 2) lon/lat array. LineString,
+    MultiLineString and Polygon (outer ring) geometries are accepted.
+    """
+    with open(file_path, "r") as file:
+        data = json.load(file)
+
+    lines = []
+
+    def collect(geometry):
+        if not geometry:
+            return
+        kind = geometry.get("type")
+        if kind == "FeatureCollection":
+            for feature in geometry.get("features", []):
+                collect(feature)
+        elif kind == "Feature":
+            collect(geometry.get("geometry"))
+        elif kind == "GeometryCollection":
+            for child in geometry.get("geometries", []):
+                collect(child)
+        elif kind == "LineString":
+            lines.append(geometry["coordinates"])
+        elif kind in ("MultiLineString", "Polygon"):
+            lines.extend(geometry["coordinates"][:1] if kind == "Polygon" else geometry["coordinates"])
+
+    collect(data)
+    if not lines:
+        raise ValueError(f"{file_path}: no LineString or Polygon geometry found")
+    # Coordinates may carry an elevation; only lon/lat are used
+    return np.asarray([point[:2] for point in max(lines, key=len)], dtype=np.float64)
+
+
+def is_geojson_file(file_path):
+    """
+    Whether a file is GeoJSON. .geojson always is; a .json file is GeoJSON when its top-level
+    object has a "type" member, otherwise it is taken to be a track file.
+    """
+    suffix = Path(file_path).suffix.lower()
+    if suffix == ".geojson":
+        return True
+    if suffix != ".json":
+        return False
+    with open(file_path, "r") as file:
+        data = json.load(file)
+    return isinstance(data, dict) and "type" in data
+
+
+def read_trace(file_path, chunk_rows=CHUNK_ROWS):
+    """Read a trace file into an (n, 2) array. Returns (points, geographic)."""
+    path = Path(file_path)
+    if path.suffix.lower() == ".json" and not is_geojson_file(path):
+        raise ValueError(f"{file_path} is a track file, not a coordinate trace")
+    if path.suffix.lower() in (".geojson", ".json"):
+        return read_geojson(path), True
+    chunks, geographic = [], False
+    for chunk, geographic in read_csv_chunks(path, chunk_rows):
+        chunks.append(chunk)
+    if not chunks:
+        raise ValueError(f"{file_path}: no points")
+    return np.concatenate(chunks), geographic
+
+
+def project_to_canvas(points, geographic=False, size=CANVAS_SIZE, margin=CANVAS_MARGIN, flip_y=None):
+    """
+    Scale and centre the trace on the canvas, keeping its aspect ratio. Longitude/latitude is
+    first projected to metres (equirectangular around the trace's mean latitude, which is exact
+    enough at circuit scale). Screen y grows downwards, so north-up coordinates are flipped.
+    Returns (canvas points, metres or source units per canvas pixel).
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if geographic:
+        longitude, latitude = np.radians(points[:, 0]), np.radians(points[:, 1])
+        x = EARTH_RADIUS * (longitude - longitude.mean()) * math.cos(latitude.mean())
+        y = EARTH_RADIUS * (latitude - latitude.mean())
+        points = np.column_stack((x, y))
+    if flip_y is None:
+        flip_y = geographic
+    if flip_y:
+        points = points * (1.0, -1.0)
+
+    low, high = points.min(axis=0), points.max(axis=0)
+    extent = float(max(high - low))
+    if extent == 0:
+        raise ValueError("trace has no extent")
+    scale = (size - 2 * margin) / extent
+    centred = (points - (low + high) / 2) * scale + size / 2
+    return centred, 1.0 / scale
+
+
+def segment_distances(points, start, end):
+    """Distance of points[start + 1:end] from the line through points[start] and points[end]."""
+    a, b = points[start], points[end]
+    inner = points[start + 1:end] - a
+    direction = b - a
+    length = math.hypot(*direction)
+    if length == 0:
+        return np.hypot(inner[:, 0], inner[:, 1])
+    return np.abs(inner[:, 0] * direction[1] - inner[:, 1] * direction[0]) / length
+
+
+def rdp_importance(points, ranges):
+    """
+    Ramer-Douglas-Peucker without recursion: for every point the tolerance at which RDP would
+    still keep it. A point is kept for epsilon if its importance is above epsilon, so any epsilon
+    or point budget can be applied afterwards without running the decimation again.
+    `ranges` are the (start, end) index pairs that are simplified independently; their end
+    points are always kept.
+    """
+    importance = np.zeros(len(points))
+    stack = []
+    for start, end in ranges:
+        importance[start] = importance[end] = np.inf
+        stack.append((start, end, np.inf))
+    while stack:
+        start, end, limit = stack.pop()
+        if end - start < 2:
+            continue
+        distances = segment_distances(points, start, end)
+        farthest = int(np.argmax(distances))
+        # A split point never outranks the split that created its range
+        value = min(float(distances[farthest]), limit)
+        index = start + 1 + farthest
+        importance[index] = value
+        stack.append((start, index, value))
+        stack.append((index, end, value))
+    return importance
+
+
+def simplify(points, epsilon=DEFAULT_EPSILON, max_points=None, closed=True):
+    """
+    Indices of the points kept by RDP with tolerance `epsilon`, reduced further to the
+    `max_points` most important ones if given. Closed traces are split at the point farthest
+    from the first one so that both halves of the loop are simplified symmetrically.
+    """
+    count = len(points)
+    if count <= 3:
+        return np.arange(count)
+    if closed:
+        looped = np.vstack((points, points[:1]))
+        farthest = int(np.argmax(np.hypot(*(points - points[0]).T)))
+        importance = rdp_importance(looped, [(0, farthest), (farthest, count)])[:count]
+    else:
+        importance = rdp_importance(points, [(0, count - 1)])
+
+    keep = importance > epsilon
+    if max_points is not None and np.count_nonzero(keep) > max_points:
+        # Stable sort so equally important points are taken in track order
+        keep[:] = False
+        keep[np.argsort(-importance, kind="stable")[:max(max_points, 3)]] = True
+    return np.nonzero(keep)[0]
+
+
+def clean_trace(points, closed=None):
+    """Drop repeated samples and the closing point of a loop. Returns (points, closed)."""
+    steps = np.hypot(*np.diff(points, axis=0).T)
+    points = points[np.concatenate(([True], steps > 0))]
+    if closed is None:
+        extent = float(max(points.max(axis=0) - points.min(axis=0)))
+        closed = math.hypot(*(points[-1] - points[0])) <= CLOSED_TOLERANCE * extent
+    if closed and len(points) > 1 and math.hypot(*(points[-1] - points[0])) == 0:
+        points = points[:-1]
+    return points, closed
+
+
+def import_track(file_path, epsilon=DEFAULT_EPSILON, max_points=DEFAULT_MAX_POINTS, max_laps=DEFAULT_MAX_LAPS,
+                 margin=CANVAS_MARGIN, flip_y=None):
+    """
+    Turn a trace file into track data in the track file format. The first sample of the trace
+    becomes the start/finish line; the pit lane is left for the builder.
+    """
+    raw, geographic = read_trace(file_path)
+    canvas_points, units_per_pixel = project_to_canvas(raw, geographic, margin=margin, flip_y=flip_y)
+    canvas_points, closed = clean_trace(canvas_points)
+    if len(canvas_points) < 3:
+        raise ValueError(f"{file_path}: need at least 3 distinct points, got {len(canvas_points)}")
+    if not closed:
+        print(f"Warning: {Path(file_path).name} does not end where it starts; it will be closed with a straight")
+    kept = simplify(canvas_points, epsilon, max_points, closed)
+    # The start/finish line (the first sample) goes to index 1: the smoothed loop starts and ends
+    # on the first control point, so a line placed there could resolve to the loop's last point.
+    kept = np.roll(kept, 1)
+    points = [[round(float(x), 2), round(float(y), 2)] for x, y in canvas_points[kept]]
+    print(f"Imported {len(raw)} samples as {len(points)} control points "
+          f"({units_per_pixel:.2f} {'m' if geographic else 'units'} per pixel)")
+    return {
+        "points": points,
+        "start_finish_index": 1,
+        "max_laps": max_laps,
+        "pit_lane_points": [],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a circuit from a CSV or GeoJSON coordinate trace")
+    parser.add_argument("trace", help="CSV (x/y or lon/lat columns) or GeoJSON file")
+    parser.add_argument("-o", "--output", required=True, help="track file to write")
+    parser.add_argument("--epsilon", type=float, default=DEFAULT_EPSILON, help="RDP tolerance in canvas pixels")
+    parser.add_argument("--max-points", type=int, default=DEFAULT_MAX_POINTS)
+    parser.add_argument("--max-laps", type=int, default=DEFAULT_MAX_LAPS)
+    parser.add_argument("--margin", type=int, default=CANVAS_MARGIN)
+    parser.add_argument("--flip-y", action="store_true", help="flip planar traces whose y axis points up")
+    args = parser.parse_args()
+
+    track_data = import_track(args.trace, args.epsilon, args.max_points, args.max_laps, args.margin,
+                              flip_y=True if args.flip_y else None)
+    with open(args.output, "w") as file:
+        json.dump(track_data, file, indent=4)
+    print(f"Track saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,37 @@
+import argparse
 import pyxel
 import json
 import math
+import concurrent.futures
+import sys
+from pathlib import Path
 import numpy as np
 from scipy.interpolate import splprep, splev
 
+# The game's track compiler lives in src/track.py; the builder uses it to write compiled bundles.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from track import compile_track, save_track_bundle, smooth_track as smooth_racing_line
+from lap_preview import LapPreview
+from segment_index import SegmentIndex
+from track_importer import import_track, is_geojson_file
+
+TRACK_FILE = "../tracks/track.json"
+
+# Polylines with at least this many control points are smoothed on a worker thread
+SMOOTHING_THREAD_THRESHOLD = 100
+
 class TrackBuilder:
-    def __init__(self):
+    def __init__(self, source=None, output=None):
         pyxel.init(500, 500)
+        # Where save_track writes: the given output, else the opened track file. Imported traces
+        # need an explicit output; a new track is saved as the default track.
+        self.output_path = output
         self.points = []
+        # Spatial index over the track's control points and segments, kept in step with self.points
+        self.track_index = SegmentIndex()
+        # Index over the smoothed line the game races on, used to snap the pit lane ends onto it
+        self.racing_line_index = None
+        self.racing_line_version = None
         self.looped = False
         self.start_finish_index = None
         self.max_laps = 10
@@ -15,10 +39,26 @@ class TrackBuilder:
         self.show_smoothed = True
         self.pit_lane_points = []
         self.drawing_pit_lane = False
+        # Smoothed polylines are cached per polyline and only recomputed after an edit
+        self.edit_versions = {"track": 0, "pit_lane": 0}
+        self.smoothed = {"track": [], "pit_lane": []}
+        self.smoothed_versions = {"track": -1, "pit_lane": -1}
+        self.smoothing_futures = {}
+        self.smoothing_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        # Lap-time preview of the looped layout, simulated in a worker process after every edit
+        self.lap_preview = LapPreview()
+        self.previewed_version = None
+        if source is not None:
+            self.open_track(source)
+        elif self.output_path is None:
+            self.output_path = TRACK_FILE
         pyxel.mouse(True)
         pyxel.run(self.update, self.draw)
 
     def save_track(self):
+        if self.output_path is None:
+            print("No output file for an imported trace; restart the builder with -o <track file> to save it")
+            return
         # Remove the last point if it’s the same as the first to avoid duplication
         if self.points and self.points[-1] == self.points[0]:
             points_to_save = self.points[:-1]
@@ -32,9 +72,53 @@ class TrackBuilder:
             "max_laps": self.max_laps,
             "pit_lane_points": self.pit_lane_points
         }
-        with open("../tracks/track.json", "w") as file:
+        with open(self.output_path, "w") as file:
             json.dump(track_data, file, indent=4)
-        print("Track saved to track.json")
+        print(f"Track saved to {self.output_path}")
+
+        # Also write the precompiled bundle (smoothed track, distances, speed profile, pit lane)
+        # so the game can load the track without smoothing it again.
+        if self.start_finish_index is not None:
+            try:
+                bundle = save_track_bundle(compile_track(self.output_path), self.output_path)
+                print(f"Compiled track saved to {bundle.name}")
+            except Exception as e:
+                print(f"Could not compile track bundle: {e}")
+
+    def open_track(self, source):
+        """Load a track file, or import a CSV/GeoJSON coordinate trace, for editing."""
+        if Path(source).suffix.lower() == ".json" and not is_geojson_file(source):
+            with open(source, "r") as file:
+                track_data = json.load(file)
+            if self.output_path is None:
+                self.output_path = str(source)
+        else:
+            track_data = import_track(source)
+        self.load_track_data(track_data)
+        print(f"Opened {source}")
+
+    def load_track_data(self, track_data):
+        points = [tuple(point) for point in track_data["points"]]
+        # Negative indices count from the end of the stored points, before the closing copy is added
+        start_finish_index = track_data.get("start_finish_index", 0)
+        if start_finish_index is not None and start_finish_index < 0:
+            start_finish_index += len(points)
+        # The editor keeps a looped track closed with a copy of its first point
+        self.points = points + [points[0]]
+        self.track_index = SegmentIndex()
+        # Index over the smoothed line the game races on, used to snap the pit lane ends onto it
+        self.racing_line_index = None
+        self.racing_line_version = None
+        for point in self.points:
+            self.track_index.append(point)
+        self.looped = True
+        self.start_finish_index = start_finish_index
+        self.max_laps = track_data.get("max_laps", self.max_laps)
+        self.pit_lane_points = [tuple(point) for point in track_data.get("pit_lane_points", [])]
+        self.drawing_pit_lane = False
+        self.action_history = []
+        self.invalidate_smoothing("track")
+        self.invalidate_smoothing("pit_lane")
 
     def update(self):
         if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
@@ -43,6 +127,8 @@ class TrackBuilder:
             if not self.looped:
                 # Adding points to the main track
                 self.points.append((x, y))
+                self.track_index.append((x, y))
+                self.invalidate_smoothing("track")
                 self.action_history.append(('add_point', (x, y)))
                 print(f"Added point {x}, {y}")
             elif self.drawing_pit_lane:
@@ -55,6 +141,7 @@ class TrackBuilder:
                     # Add pit lane points as clicked
                     self.pit_lane_points.append((x, y))
                     print(f"Added pit lane point {x}, {y}")
+                self.invalidate_smoothing("pit_lane")
                 self.action_history.append(('add_pit_lane_point', (x, y)))
         elif pyxel.btnp(pyxel.MOUSE_BUTTON_RIGHT) and self.drawing_pit_lane:
             # Finish pit lane drawing
@@ -62,13 +149,16 @@ class TrackBuilder:
             # Last pit lane point snaps to closest point on track
             closest_point = self.get_closest_point_on_track(x, y)
             self.pit_lane_points.append(closest_point)
+            self.invalidate_smoothing("pit_lane")
             self.action_history.append(('add_pit_lane_point', (x, y)))
             self.drawing_pit_lane = False
             print("Finished drawing pit lane.")
 
         if pyxel.btnp(pyxel.KEY_L) and len(self.points) > 1 and not self.looped:
             self.points.append(self.points[0])  # Connect to the starting point
+            self.track_index.append(self.points[0])
             self.looped = True
+            self.invalidate_smoothing("track")
             self.action_history.append(('loop_track', None))
             print("Track looped back to the start.")
 
@@ -108,6 +198,20 @@ class TrackBuilder:
             self.show_smoothed = not self.show_smoothed
             print(f"Show smoothed track: {self.show_smoothed}")
 
+        self.update_lap_preview()
+
+    def update_lap_preview(self):
+        """Ask for a new lap preview after the looped track changed and collect finished ones."""
+        if self.looped and self.previewed_version != self.edit_versions["track"]:
+            self.previewed_version = self.edit_versions["track"]
+            points = self.points[:-1] if self.points[-1] == self.points[0] else self.points
+            self.lap_preview.request({
+                "points": list(points),
+                "start_finish_index": self.start_finish_index or 0,
+                "pit_lane_points": [],
+            })
+        self.lap_preview.poll()
+
     def undo_last_action(self):
         if not self.action_history:
             print("No actions to undo.")
@@ -116,11 +220,15 @@ class TrackBuilder:
         if action == 'add_point':
             if self.points:
                 removed_point = self.points.pop()
+                self.track_index.pop()
+                self.invalidate_smoothing("track")
                 print(f"Undo add_point: Removed point {removed_point}")
         elif action == 'loop_track':
             if self.points and self.points[-1] == self.points[0]:
                 self.points.pop()
+                self.track_index.pop()
                 self.looped = False
+                self.invalidate_smoothing("track")
                 print("Undo loop_track: Track unlooped.")
         elif action == 'set_start_finish':
             self.start_finish_index = None
@@ -131,6 +239,7 @@ class TrackBuilder:
         elif action == 'add_pit_lane_point':
             if self.pit_lane_points:
                 removed_point = self.pit_lane_points.pop()
+                self.invalidate_smoothing("pit_lane")
                 print(f"Undo add_pit_lane_point: Removed pit lane point {removed_point}")
             if not self.pit_lane_points:
                 self.drawing_pit_lane = False
@@ -139,24 +248,25 @@ class TrackBuilder:
             print(f"Unknown action '{action}' to undo.")
 
     def get_closest_point_index(self, x, y):
-        min_dist = float("inf")
-        closest_index = None
-        for i, (px, py) in enumerate(self.points):
-            dist = (px - x) ** 2 + (py - y) ** 2
-            if dist < min_dist:
-                min_dist = dist
-                closest_index = i
-        return closest_index
+        return self.track_index.nearest_vertex(x, y)
+
+    def get_racing_line_index(self):
+        """SegmentIndex over the game's smoothed racing line, rebuilt after the track was edited."""
+        version = self.edit_versions["track"]
+        if self.racing_line_version != version:
+            self.racing_line_index = SegmentIndex()
+            for point in smooth_racing_line(self.points, per=True):
+                self.racing_line_index.append(point)
+            self.racing_line_version = version
+        return self.racing_line_index
 
     def get_closest_point_on_track(self, x, y):
-        min_dist = float("inf")
-        closest_point = None
-        for (px, py) in self.points:
-            dist = (px - x) ** 2 + (py - y) ** 2
-            if dist < min_dist:
-                min_dist = dist
-                closest_point = (px, py)
-        return closest_point
+        """Closest point on the smoothed racing line the game compiles from the control points."""
+        projection = self.get_racing_line_index().project(x, y)
+        if projection is None:
+            return None
+        print(f"Snapped to segment {projection.segment} at {projection.arc_length:.1f} along the track")
+        return (round(float(projection.point[0]), 2), round(float(projection.point[1]), 2))
 
     def smooth_track(self, points, num_points=200):
         """Returns smoothed points for visual effect without modifying the original points."""
@@ -195,6 +305,39 @@ class TrackBuilder:
             # Fall back to original points if smoothing fails
             return points
 
+    def invalidate_smoothing(self, name):
+        """Mark the cached smoothed polyline ("track" or "pit_lane") as out of date."""
+        self.edit_versions[name] += 1
+
+    def get_smoothed(self, name, points):
+        """
+        Return the smoothed polyline for the given control points, recomputing it only after an edit.
+        Large polylines are smoothed on a worker thread; until the result arrives the previous
+        smoothed polyline is returned so the editor keeps drawing at full frame rate.
+        """
+        version = self.edit_versions[name]
+        future = self.smoothing_futures.get(name)
+        if future is not None and future.done():
+            del self.smoothing_futures[name]
+            finished_version, smoothed_points = future.result()
+            self.smoothed[name] = smoothed_points
+            self.smoothed_versions[name] = finished_version
+            future = None
+        if self.smoothed_versions[name] == version:
+            return self.smoothed[name]
+
+        if len(points) >= SMOOTHING_THREAD_THRESHOLD:
+            # Only one job per polyline at a time; a newer edit is picked up once it finishes.
+            if future is None:
+                snapshot = list(points)
+                self.smoothing_futures[name] = self.smoothing_executor.submit(
+                    lambda: (version, self.smooth_track(snapshot)))
+            return self.smoothed[name]
+
+        self.smoothed[name] = self.smooth_track(points)
+        self.smoothed_versions[name] = version
+        return self.smoothed[name]
+
     def draw(self):
         pyxel.cls(0)
 
@@ -215,7 +358,7 @@ class TrackBuilder:
 
         # Draw smoothed track if enabled
         if self.looped and self.show_smoothed:
-            smoothed_points = self.smooth_track(self.points)
+            smoothed_points = self.get_smoothed("track", self.points)
             for i in range(len(smoothed_points) - 1):
                 x1, y1 = smoothed_points[i]
                 x2, y2 = smoothed_points[i + 1]
@@ -234,7 +377,7 @@ class TrackBuilder:
 
             # Draw smoothed pit lane if enabled
             if self.show_smoothed:
-                smoothed_pit_lane = self.smooth_track(self.pit_lane_points)
+                smoothed_pit_lane = self.get_smoothed("pit_lane", self.pit_lane_points)
                 for i in range(len(smoothed_pit_lane) - 1):
                     x1, y1 = smoothed_pit_lane[i]
                     x2, y2 = smoothed_pit_lane[i + 1]
@@ -252,5 +395,40 @@ class TrackBuilder:
         if self.drawing_pit_lane:
             pyxel.text(5, 450, "Drawing pit lane... Left-click to add points, right-click to finish.", 7)
 
-# Run the Track Builder
-TrackBuilder()
+        if self.looped:
+            self.draw_lap_preview(340, 380)
+
+    def draw_lap_preview(self, x, y, width=150, height=40):
+        """Predicted lap time, top speed and the speed trace around the lap."""
+        result = self.lap_preview.result
+        status = " (updating)" if self.lap_preview.busy else ""
+        if result is None:
+            pyxel.text(x, y, f"Lap preview{status or ': n/a'}", 7)
+            return
+        pyxel.text(x, y, f"Lap: {result.lap_time:.2f}s{status}", 7)
+        pyxel.text(x, y + 8, f"Top: {result.top_speed:.2f} Corners: {len(result.corner_speeds)}", 7)
+        if result.corner_speeds:
+            slowest = min(speed for _, speed in result.corner_speeds)
+            pyxel.text(x, y + 16, f"Slowest corner: {slowest:.2f}", 7)
+
+        # Speed trace, scaled to the top speed
+        graph_y = y + 26
+        pyxel.rectb(x, graph_y, width, height, 5)
+        profile = result.profile
+        top = max(result.top_speed, 1e-6)
+        step = (width - 2) / max(len(profile) - 1, 1)
+        for i in range(len(profile) - 1):
+            x1 = x + 1 + i * step
+            x2 = x + 1 + (i + 1) * step
+            y1 = graph_y + height - 2 - profile[i] / top * (height - 3)
+            y2 = graph_y + height - 2 - profile[i + 1] / top * (height - 3)
+            pyxel.line(x1, y1, x2, y2, 11)
+
+# Run the Track Builder, optionally on an existing track file or a CSV/GeoJSON trace to import.
+# Guarded so the lap preview's worker process does not start another builder when it imports this module.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Draw or edit a track")
+    parser.add_argument("source", nargs="?", help="track file to edit, or CSV/GeoJSON trace to import")
+    parser.add_argument("-o", "--output", help="track file to save to (required to save an imported trace)")
+    args = parser.parse_args()
+    TrackBuilder(args.source, args.output)